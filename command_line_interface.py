@@ -0,0 +1,486 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import sys
+import time
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def main(argv=None):
+    parser = _build_parser()
+    arguments = parser.parse_args(argv)
+
+    # Build jobs from the command line or from the jobs file
+    if arguments.command == 'batch':
+        with open(arguments.jobs_file, 'r') as file:
+            jobs = json.load(file)
+        parallel = arguments.parallel
+    else:
+        jobs = [_job_from_arguments(arguments)]
+        parallel = 1
+
+    # Progress messages go to stderr, so that stdout only contains the JSON output
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run_jobs(jobs, parallel))
+        _print_rpc_metrics()
+
+    output = results if arguments.command == 'batch' else results[0]
+    if arguments.command in ('report', 'diff', 'sweep', 'pack', 'lookup-tables', 'tune', 'fee-sweep', 'simulate', 'load', 'mix', 'wallet-pool') and arguments.table and 'result' in output:
+        print(output['result']['table'])
+    else:
+        print(json.dumps(output, indent=2, default=str))
+    return 0 if all(result['ok'] for result in results) else 1
+
+async def run_jobs(jobs, parallel=1):
+    # All jobs run in the same event loop, at most "parallel" at a time
+    semaphore = asyncio.Semaphore(max(1, parallel))
+
+    async def run_limited(index, job):
+        async with semaphore:
+            return await run_job(index, job)
+
+    return await asyncio.gather(*[run_limited(index, job) for index, job in enumerate(jobs)])
+
+async def run_job(index, job):
+    command = job.get('command')
+    result = {'job': index, 'command': command, 'ok': False}
+    if command not in JOB_COMMANDS:
+        result['error'] = f"Unknown command {command}."
+        return result
+    try:
+        result['result'] = await JOB_COMMANDS[command](job)
+        # Jobs can complete and still report a failure, e.g. regressions found by diff
+        result['ok'] = not result['result'].get('failed', False)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _build_parser():
+    parser = argparse.ArgumentParser(description="Non-interactive toolchain commands, results are printed as JSON.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_trace_parser = subparsers.add_parser('run-trace', help="Run an execution trace (CSV or JSON) of the execution_traces folder")
+    run_trace_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+
+    compile_parser = subparsers.add_parser('compile', help="Compile programs of the anchor_programs folder")
+    compile_parser.add_argument('programs', nargs='*', help="Programs to compile (default: all)")
+
+    deploy_parser = subparsers.add_parser('deploy', help="Deploy a compiled program")
+    deploy_parser.add_argument('program')
+    deploy_parser.add_argument('--cluster', required=True, choices=['Localnet', 'Devnet', 'Mainnet'])
+    deploy_parser.add_argument('--wallet', required=True, help="Wallet file name inside solana_wallets")
+
+    pda_parser = subparsers.add_parser('pda', help="Generate a PDA from seeds")
+    pda_parser.add_argument('program')
+    pda_parser.add_argument('--seed', action='append', default=[],
+                            help="Seed as wallet:<wallet_name>, pubkey:<key>, hex:<bytes> or text:<string> (repeatable)")
+
+    balance_parser = subparsers.add_parser('balance', help="Get the balance of a wallet")
+    balance_parser.add_argument('wallet', help="Wallet file name inside solana_wallets")
+    balance_parser.add_argument('--cluster', required=True, choices=['Localnet', 'Devnet', 'Mainnet'])
+
+    report_parser = subparsers.add_parser('report', help="Statistics of size, fees, slots and compute units of all the results files")
+    report_parser.add_argument('--group-by', default='program,instruction,network',
+                               help="Comma separated columns among program, instruction, network, trace_file, lookup_table")
+    report_parser.add_argument('--since-days', type=float, help="Only results written in the last days")
+    report_parser.add_argument('--program', help="Only results of this program")
+    report_parser.add_argument('--network', help="Only results of this network")
+    report_parser.add_argument('--fixed-contracts', action='store_true',
+                               help="Only results of the programs of the fixed_contracts folder")
+    report_parser.add_argument('--metrics', default='size_bytes,fee_lamports,slots,compute_units',
+                               help="Comma separated metrics among size_bytes, fee_lamports, slots, compute_units")
+    report_parser.add_argument('--no-ingest', dest='ingest', action='store_false',
+                               help="Use the stored results without reading results files again")
+    report_parser.add_argument('--table', action='store_true', help="Print a text table instead of JSON")
+
+    diff_parser = subparsers.add_parser('diff', help="Compare two results files (or folders), exit code is not zero on regressions")
+    diff_parser.add_argument('baseline')
+    diff_parser.add_argument('candidate')
+    diff_parser.add_argument('--size-threshold', type=float, help="Allowed increase of transaction size in bytes (default 0)")
+    diff_parser.add_argument('--fee-threshold', type=float, help="Allowed increase of fees in lamports (default 0)")
+    diff_parser.add_argument('--slots-threshold', type=float, help="Allowed increase of execution slots (default 2)")
+    diff_parser.add_argument('--cu-threshold', type=float, help="Allowed increase of compute units (default 0)")
+    diff_parser.add_argument('--percent-threshold', type=float,
+                             help="Also require the increase to be above this percentage to be a regression")
+    diff_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    sweep_parser = subparsers.add_parser('sweep', help="Size and fees of a trace step for every combination of arg ranges, computed offline")
+    sweep_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    sweep_parser.add_argument('step', help="ID of the step inside the trace")
+    sweep_parser.add_argument('--arg', action='append', default=[], required=True,
+                              help="Swept arg as name=start:stop[:step] or name=v1,v2,... (repeatable), the values are "
+                                   "lengths of strings, bytes and vectors or values of integers")
+    sweep_parser.add_argument('--table', action='store_true', help="Print a text table instead of JSON")
+
+    pack_parser = subparsers.add_parser('pack', help="Pack consecutive compatible steps of a trace into multi-instruction transactions")
+    pack_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    pack_parser.add_argument('--send', action='store_true', help="Send the packed transactions")
+    pack_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    lookup_tables_parser = subparsers.add_parser('lookup-tables', help="Size of the steps of a trace with address lookup tables of their recurring accounts")
+    lookup_tables_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    lookup_tables_parser.add_argument('--create', action='store_true',
+                                      help="Create (or extend) the lookup tables of the deployed programs, they are used by the next runs")
+    lookup_tables_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    tune_parser = subparsers.add_parser('tune', help="Tune the compute unit limit of each step of a trace from its measured units")
+    tune_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    tune_parser.add_argument('--margin', type=float, default=0.1, help="Margin added to the measured units (default 0.1, 10%%)")
+    tune_parser.add_argument('--price', type=int, help="Compute unit price in micro-lamports (SetComputeUnitPrice)")
+    tune_parser.add_argument('--send', action='store_true', help="Send the tuned transactions")
+    tune_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    fee_sweep_parser = subparsers.add_parser('fee-sweep', help="Send a trace at several compute unit prices and measure the time to land")
+    fee_sweep_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    fee_sweep_parser.add_argument('--levels', help="Compute unit prices in micro-lamports, e.g. 0,1000,10000")
+    fee_sweep_parser.add_argument('--seed-from-network', action='store_true',
+                                  help="Add percentiles of the recent prioritization fees of the trace accounts to the levels")
+    fee_sweep_parser.add_argument('--cluster', choices=['Localnet', 'Devnet', 'Mainnet'],
+                                  help="Send to this cluster instead of the one of the programs, e.g. a local validator")
+    fee_sweep_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    simulate_parser = subparsers.add_parser('simulate', help="Simulate all the steps of a trace concurrently, without sending anything")
+    simulate_parser.add_argument('trace', help="Trace file name, e.g. storage.csv")
+    simulate_parser.add_argument('--parallel', type=int, default=8, help="Maximum number of steps simulated at the same time")
+    simulate_parser.add_argument('--cluster', choices=['Localnet', 'Devnet', 'Mainnet'],
+                                 help="Simulate on this cluster instead of the one of the programs")
+    simulate_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    load_parser = subparsers.add_parser('load', help="Closed-loop load of a step of a JSON trace, replicated over wallets and PDAs")
+    load_parser.add_argument('trace', help="JSON trace file name, e.g. auction.json")
+    load_parser.add_argument('step', help="Sequence ID of the step sent under load")
+    load_parser.add_argument('--setup', help="Sequence IDs of the steps sent once for each replica before the load, e.g. 1,2")
+    load_parser.add_argument('--replicas', type=int, help="Replicas of the step (default the highest concurrency)")
+    load_parser.add_argument('--concurrency', help="Transactions in flight of each level, e.g. 1,2,4,8 (default 1 to 32)")
+    load_parser.add_argument('--duration', type=float, default=30, help="Seconds each level runs")
+    load_parser.add_argument('--cluster', choices=['Localnet', 'Devnet', 'Mainnet'], default='Localnet',
+                             help="Cluster loaded (default Localnet, solana-test-validator)")
+    load_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    mix_parser = subparsers.add_parser('mix', help="Open-loop Poisson arrivals of a weighted mix of steps of JSON traces")
+    mix_parser.add_argument('--step', action='append', required=True,
+                            help="Step of the mix as trace:step=weight, e.g. auction.json:3=60 (repeatable)")
+    mix_parser.add_argument('--setup', action='append', default=[],
+                            help="Steps sent once for each replica of a trace before the mix, e.g. auction.json:1,2 (repeatable)")
+    mix_parser.add_argument('--rate', required=True, help="Arrival rates in transactions per second, e.g. 5,10,20,50")
+    mix_parser.add_argument('--replicas', type=int, default=32, help="Replicas of each step of the mix")
+    mix_parser.add_argument('--duration', type=float, default=30, help="Seconds each rate runs")
+    mix_parser.add_argument('--seed', type=int, help="Seed of the arrivals, to repeat the same workload")
+    mix_parser.add_argument('--cluster', choices=['Localnet', 'Devnet', 'Mainnet'], default='Localnet',
+                            help="Cluster loaded (default Localnet, solana-test-validator)")
+    mix_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    wallet_pool_parser = subparsers.add_parser('wallet-pool', help="Wallets derived from a seed, funded in batches, for traces with many actors")
+    wallet_pool_parser.add_argument('action', choices=['create', 'fund', 'balances'])
+    wallet_pool_parser.add_argument('--size', type=int, help="Wallets of the pool (create)")
+    wallet_pool_parser.add_argument('--seed', help="Master seed in hex, to derive the same wallets again (create, default random)")
+    wallet_pool_parser.add_argument('--cluster', choices=['Localnet', 'Devnet', 'Mainnet'], default='Localnet',
+                                    help="Cluster of the balances (fund, balances; default Localnet)")
+    wallet_pool_parser.add_argument('--lamports', type=int, default=1_000_000_000,
+                                    help="Balance each wallet is topped up to (fund, default 1 SOL)")
+    wallet_pool_parser.add_argument('--funder', help="Wallet file paying the transfers (fund, default airdrops)")
+    wallet_pool_parser.add_argument('--table', action='store_true', help="Print a text report instead of JSON")
+
+    batch_parser = subparsers.add_parser('batch', help="Run a JSON list of jobs, e.g. [{\"command\": \"run-trace\", \"trace\": \"storage.csv\"}]")
+    batch_parser.add_argument('jobs_file')
+    batch_parser.add_argument('--parallel', type=int, default=4, help="Maximum number of jobs running at the same time")
+
+    # ADD HERE NEW COMMANDS
+
+    return parser
+
+def _job_from_arguments(arguments):
+    job = {key: value for key, value in vars(arguments).items() if value is not None}
+    if arguments.command == 'pda':
+        job['seeds'] = job.pop('seed')
+    elif arguments.command == 'sweep':
+        job['args'] = dict(arg.partition('=')[::2] for arg in job.pop('arg'))
+    elif arguments.command == 'mix':
+        job['mix'] = {name: float(weight or 1) for name, weight in (step.partition('=')[::2] for step in job.pop('step'))}
+        job['setup'] = {trace: _parse_list(steps) for trace, steps in (setup.rpartition(':')[::2] for setup in job['setup'])}
+    return job
+
+async def _run_trace_job(job):
+    trace = job['trace']
+    if trace.lower().endswith('.json'):
+        from solana_module.anchor_module.updated_automatic_insertion_manager import execute_execution_trace
+    else:
+        from solana_module.anchor_module.automatic_data_insertion_manager import execute_execution_trace
+
+    results_file = await execute_execution_trace(trace)
+    if results_file is None:
+        raise RuntimeError(f"Execution of trace {trace} stopped, see the log for details.")
+    return {'results_file': results_file, 'results': _read_results_file(results_file)}
+
+async def _compile_job(job):
+    from solana_module.anchor_module.program_compiler_and_deployer import compile_programs_async
+    program_ids = await compile_programs_async(job.get('programs') or None)
+    failed = [program for program, program_id in program_ids.items() if program_id is None]
+    if failed:
+        raise RuntimeError(f"Compilation failed for {', '.join(failed)}.")
+    return {'program_ids': program_ids}
+
+async def _deploy_job(job):
+    from solana_module.anchor_module.program_compiler_and_deployer import deploy_program_async
+    program_id = await deploy_program_async(job['program'], job['cluster'], job['wallet'])
+    if program_id is None:
+        raise RuntimeError(f"Deploy of {job['program']} failed.")
+    return {'program_id': program_id}
+
+async def _pda_job(job):
+    from solana_module.anchor_module.anchor_utils import derive_pda
+    seeds = [_parse_seed(seed) for seed in job.get('seeds', [])]
+    return {'pda': str(derive_pda(job['program'], seeds))}
+
+async def _balance_job(job):
+    from solana_module.solana_utils import fetch_balance
+    pubkey, lamports = await fetch_balance(job['wallet'], job['cluster'])
+    return {'pubkey': str(pubkey), 'lamports': lamports}
+
+async def _report_job(job):
+    from solana_module.anchor_module.results_analytics import ingest_results, load_results_store, filter_results, \
+        compute_statistics, format_report, fetch_fixed_contracts, GROUP_COLUMNS, METRICS
+    group_by = _parse_columns(job.get('group_by', 'program,instruction,network'), GROUP_COLUMNS, 'group columns')
+    metrics = _parse_columns(job.get('metrics', METRICS), METRICS, 'metrics')
+
+    store = ingest_results() if job.get('ingest', True) else load_results_store()
+    since = time.time() - job['since_days'] * 86400 if job.get('since_days') is not None else None
+    programs = fetch_fixed_contracts() if job.get('fixed_contracts') else job.get('program')
+    store = filter_results(store, since, program=programs, network=job.get('network'))
+    statistics = compute_statistics(store, group_by, metrics)
+    return {'statistics': statistics, 'table': format_report(statistics, group_by, metrics)}
+
+async def _diff_job(job):
+    from solana_module.anchor_module.results_diff import diff_results, format_diff_report
+    thresholds = {metric: job[option] for metric, option in
+                  (('size_bytes', 'size_threshold'), ('fee_lamports', 'fee_threshold'), ('slots', 'slots_threshold'),
+                   ('compute_units', 'cu_threshold'))
+                  if job.get(option) is not None}
+    diff = diff_results(job['baseline'], job['candidate'], thresholds, job.get('percent_threshold'))
+    diff['table'] = format_diff_report(diff)
+    return diff
+
+async def _sweep_job(job):
+    from solana_module.anchor_module.parameter_sweep import sweep_trace_step, format_sweep_report
+    sweep = sweep_trace_step(job['trace'], job['step'], job['args'])
+    sweep['table'] = format_sweep_report(sweep)
+    return sweep
+
+async def _pack_job(job):
+    from solana_module.anchor_module.trace_planner import plan_trace_file
+    from solana_module.anchor_module.transaction_packer import pack_plan, summarize_packing, send_packed_plan, \
+        format_packing_report
+    plan, errors = plan_trace_file(job['trace'])
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    packed = pack_plan(plan)
+    summary = summarize_packing(packed)
+    if job.get('send'):
+        summary['sent'] = await send_packed_plan(packed)
+    summary['table'] = format_packing_report(summary)
+    return summary
+
+async def _lookup_tables_job(job):
+    from solana_module.anchor_module.trace_planner import plan_trace_file
+    from solana_module.anchor_module.lookup_tables import prepare_lookup_tables, compare_lookup_sizes, \
+        format_lookup_report
+    plan, errors = plan_trace_file(job['trace'])
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    tables = await prepare_lookup_tables(plan, job.get('create', False))
+    report = compare_lookup_sizes(plan, tables)
+    report['table'] = format_lookup_report(report)
+    return report
+
+async def _tune_job(job):
+    from solana_module.anchor_module.trace_planner import plan_trace_file
+    from solana_module.anchor_module.compute_budget_tuner import tune_plan, format_tuning_report
+    plan, errors = plan_trace_file(job['trace'])
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    steps = await tune_plan(plan, job.get('margin', 0.1), job.get('price'), job.get('send', False))
+    return {'steps': steps, 'failed': any('error' in step for step in steps), 'table': format_tuning_report(steps)}
+
+async def _fee_sweep_job(job):
+    from solana_module.anchor_module.trace_planner import plan_trace_file
+    from solana_module.anchor_module.priority_fee_sweep import sweep_priority_fees, format_fee_curves
+    plan, errors = plan_trace_file(job['trace'])
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    # Each level of a JSON trace gets its own actor wallets and PDAs, as the replicas of the load command
+    replicate = None
+    if job['trace'].lower().endswith('.json'):
+        from solana_module.anchor_module.load_generator import replicate_trace
+
+        def replicate(index):
+            replica_plan, replica_errors = replicate_trace(job['trace'], index)
+            if replica_errors:
+                raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(replica_errors)}")
+            return replica_plan
+
+    levels = _parse_integers(job['levels']) if 'levels' in job else None
+    sweep = await sweep_priority_fees(plan, levels, job.get('seed_from_network', False), job.get('cluster'), replicate)
+    sweep['table'] = format_fee_curves(sweep['curves'], sweep['replicated'])
+    return sweep
+
+async def _simulate_job(job):
+    from solana_module.anchor_module.trace_planner import plan_trace_file
+    from solana_module.anchor_module.trace_simulator import simulate_plan, format_simulation_report
+    plan, errors = plan_trace_file(job['trace'])
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    steps = await simulate_plan(plan, job.get('parallel', 8), job.get('cluster'))
+    return {'steps': steps, 'failed': not all(step['success'] for step in steps),
+            'table': format_simulation_report(steps)}
+
+async def _load_job(job):
+    from solana_module.anchor_module.load_generator import build_replicas, run_load, format_load_report, \
+        DEFAULT_CONCURRENCY_LEVELS
+    concurrency_levels = _parse_integers(job.get('concurrency', DEFAULT_CONCURRENCY_LEVELS))
+    replicas, errors = build_replicas(job['trace'], str(job['step']), job.get('replicas', max(concurrency_levels)),
+                                      _parse_list(job.get('setup', [])))
+    if errors:
+        raise ValueError(f"Execution trace {job['trace']} is not valid: {' '.join(errors)}")
+
+    report = await run_load(replicas, concurrency_levels, job.get('duration', 30), job.get('cluster', 'Localnet'))
+    report['table'] = format_load_report(report)
+    return report
+
+async def _mix_job(job):
+    from solana_module.anchor_module.workload_mixer import build_workloads, run_workload, format_workload_report
+    workloads, errors = build_workloads(job['mix'], job.get('setup'), job.get('replicas', 32))
+    if errors:
+        raise ValueError(f"The mix is not valid: {' '.join(errors)}")
+
+    report = await run_workload(workloads, [float(rate) for rate in _parse_list(job['rate'])], job.get('duration', 30),
+                                job.get('cluster', 'Localnet'), job.get('seed'))
+    report['table'] = format_workload_report(report)
+    return report
+
+async def _wallet_pool_job(job):
+    from solana_module.anchor_module.wallet_pool import create_wallet_pool, fund_wallet_pool, refresh_pool_balances, \
+        format_pool_balances
+    if job['action'] == 'create':
+        if not job.get('size'):
+            raise ValueError("Give the size of the pool.")
+        pool = create_wallet_pool(job['size'], job.get('seed'))
+        return {'seed': pool['seed'], 'size': pool['size'], 'table': f"Wallet pool of {pool['size']} wallets created."}
+    elif job['action'] == 'fund':
+        funding = await fund_wallet_pool(job.get('cluster', 'Localnet'), job.get('lamports', 1_000_000_000), job.get('funder'))
+        return {**funding, 'failed': bool(funding['failed_transactions']), 'table': format_pool_balances(funding['balances'])}
+    balances = await refresh_pool_balances(job.get('cluster', 'Localnet'))
+    return {'balances': balances, 'table': format_pool_balances(balances)}
+
+def _parse_columns(columns, allowed_columns, description):
+    if isinstance(columns, str):
+        columns = [column.strip() for column in columns.split(',') if column.strip()]
+    invalid_columns = [column for column in columns if column not in allowed_columns]
+    if invalid_columns:
+        raise ValueError(f"Invalid {description} {', '.join(invalid_columns)}, expected {', '.join(allowed_columns)}.")
+    return columns
+
+def _print_rpc_metrics():
+    # Only if a client of a rate limited endpoint, or of a cluster with several endpoints, has been created
+    rate_limiter = sys.modules.get('solana_module.rpc_rate_limiter')
+    if rate_limiter is not None and rate_limiter.fetch_rate_limiter_metrics():
+        print(rate_limiter.format_rate_limiter_metrics(rate_limiter.fetch_rate_limiter_metrics()))
+    rpc_endpoints = sys.modules.get('solana_module.rpc_endpoints')
+    if rpc_endpoints is not None and rpc_endpoints.fetch_endpoint_metrics():
+        print(rpc_endpoints.format_endpoint_metrics(rpc_endpoints.fetch_endpoint_metrics()))
+
+def _parse_list(values):
+    # Comma separated values from the command line, lists from the jobs files
+    if isinstance(values, str):
+        return [value.strip() for value in values.split(',') if value.strip()]
+    return [str(value) for value in values]
+
+def _parse_integers(values):
+    return [int(value) for value in _parse_list(values)]
+
+def _parse_seed(seed):
+    kind, _, value = seed.partition(':')
+    if kind == 'wallet':
+        from solana_module.solana_utils import load_keypair_from_file, solana_base_path
+        keypair = load_keypair_from_file(f"{solana_base_path}/solana_wallets/{value}")
+        if keypair is None:
+            raise FileNotFoundError(f"Wallet {value} not found.")
+        return bytes(keypair.pubkey())
+    elif kind == 'pubkey':
+        from solders.pubkey import Pubkey
+        return bytes(Pubkey.from_string(value))
+    elif kind == 'hex':
+        return bytes.fromhex(value)
+    elif kind == 'text':
+        return value.encode()
+    raise ValueError(f"Invalid seed {seed}, expected wallet:, pubkey:, hex: or text:")
+
+def _read_results_file(file_path):
+    with open(file_path, 'r') as file:
+        if file_path.endswith('.json'):
+            return json.load(file)
+        return list(csv.DictReader(file))
+
+
+JOB_COMMANDS = {
+    'run-trace': _run_trace_job,
+    'compile': _compile_job,
+    'deploy': _deploy_job,
+    'pda': _pda_job,
+    'balance': _balance_job,
+    'report': _report_job,
+    'diff': _diff_job,
+    'sweep': _sweep_job,
+    'pack': _pack_job,
+    'lookup-tables': _lookup_tables_job,
+    'tune': _tune_job,
+    'fee-sweep': _fee_sweep_job,
+    'simulate': _simulate_job,
+    'load': _load_job,
+    'mix': _mix_job,
+    'wallet-pool': _wallet_pool_job,
+    # ADD HERE NEW JOB COMMANDS
+}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,12 +22,10 @@
 
 
 import asyncio
-from solana_module.anchor_module.automatic_data_insertion_manager import run_execution_trace
 from solana_module.anchor_module.anchor_utilities import choose_program_for_pda_generation, get_initialized_programs, \
     get_program_instructions, get_instruction_args, get_instruction_accounts, close_anchor_program, \
     remove_anchor_program
-from solana_module.anchor_module.program_compiler_and_deployer import compile_programs
-from solana_module.anchor_module.interactive_data_insertion_manager import choose_program_to_run
+# Compiler and data insertion managers (anchorpy, RPC client) are imported when chosen, since they are slow to import
 
 
 def choose_action():
@@ -46,6 +44,7 @@ def choose_action():
         # Manage choice
         choice = input()
         if choice == "1":
+            from solana_module.anchor_module.program_compiler_and_deployer import compile_programs
             compile_programs()
         elif choice == "2":
                 _choose_running_mode()
@@ -71,12 +70,14 @@ def _choose_running_mode():
         # Manage choice
         choice = input()
         if choice == "1":
+            from solana_module.anchor_module.interactive_data_insertion_manager import choose_program_to_run
             repeat = choose_program_to_run()
             if repeat:
                 choice = None
             else:
                 return
         elif choice == "2":
+            from solana_module.anchor_module.automatic_data_insertion_manager import run_execution_trace
             asyncio.run(run_execution_trace())
             return
         elif choice == "0":
@@ -20,15 +20,13 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import importlib
-import sys
-from pathlib import Path
-import toml
 import shutil
 import os
 from solana_module.anchor_module.anchor_utils import fetch_initialized_programs, generate_pda, fetch_program_instructions, \
-    fetch_args, load_idl, anchor_base_path, check_type, fetch_required_accounts, fetch_signer_accounts, choose_program, \
-    choose_instruction, check_if_array
+    load_idl, anchor_base_path, fetch_required_accounts, fetch_signer_accounts, choose_program, choose_instruction, \
+    fetch_idl_path, fetch_program_id
+from solana_module.anchor_module.program_registry import fetch_registered_program, remove_registered_program
+from solana_module.anchor_module.arg_codec import fetch_instruction_args
 from solana_module.solana_utils import perform_program_closure
 
 
@@ -50,7 +48,7 @@ def get_program_instructions():
     if not chosen_program:
         return
     else:
-        idl_file_path = f'{anchor_base_path}/.anchor_files/{chosen_program}/anchor_environment/target/idl/{chosen_program}.json'
+        idl_file_path = fetch_idl_path(chosen_program)
         idl = load_idl(idl_file_path)
         instructions = fetch_program_instructions(idl)
         if instructions is None:
@@ -65,7 +63,7 @@ def get_instruction_accounts():
     if not chosen_program:
         return
     else:
-        idl_file_path = f'{anchor_base_path}/.anchor_files/{chosen_program}/anchor_environment/target/idl/{chosen_program}.json'
+        idl_file_path = fetch_idl_path(chosen_program)
         idl = load_idl(idl_file_path)
         chosen_instruction = choose_instruction(idl)
         if not chosen_instruction:
@@ -88,28 +86,19 @@ def get_instruction_args():
     if not chosen_program:
         return
     else:
-        idl_file_path = f'{anchor_base_path}/.anchor_files/{chosen_program}/anchor_environment/target/idl/{chosen_program}.json'
+        idl_file_path = fetch_idl_path(chosen_program)
         idl = load_idl(idl_file_path)
         chosen_instruction = choose_instruction(idl)
         if not chosen_instruction:
             return
         else:
-            args = fetch_args(chosen_instruction, idl)
+            args = fetch_instruction_args(chosen_program, chosen_instruction)
             if len(args) == 0:
                 print("No arguments required by this instruction.")
             else:
                 print("Arguments:")
                 for arg in args:
-                    array_type, array_length = check_if_array(arg)
-                    # If it's not an array
-                    if array_type is None and array_length is None:
-                        print(f"- {arg['name']} ({check_type(arg['type'])})")
-                    # If it's an array of unsupported type
-                    elif array_type is None and array_length is not None:
-                        print(f"- {arg['name']} (array of unsupported type)")
-                    # If it's a supported type array
-                    else:
-                        print(f"- {arg['name']} ({array_type} array of length {array_length})")
+                    print(f"- {arg.name} ({arg.description})")
 
 def choose_program_for_pda_generation():
     repeat = True
@@ -128,7 +117,10 @@ def close_anchor_program():
         return
 
     cluster, wallet_name = _fetch_cluster_and_wallet(chosen_program)
-    program_id = str(_get_program_id(chosen_program))
+    if cluster is None:
+        print("The program hasn't been deployed with this toolchain, so it can't be closed.")
+        return
+    program_id = str(fetch_program_id(chosen_program))
 
     # Confirmation phase
     allowed_choices = ['y', 'Y', 'n', 'N']
@@ -138,7 +130,7 @@ def close_anchor_program():
         choice = input()
         if choice == 'y' or choice == 'Y':
             result = perform_program_closure(program_id, cluster, wallet_name)
-            if not result.stderr:
+            if result is not None and result.succeeded:
                 _remove_initialized_program(chosen_program)
         elif choice == 'n' or choice == 'N':
             return
@@ -171,45 +163,9 @@ def remove_anchor_program():
 # ====================================================
 
 def _fetch_cluster_and_wallet(program_name):
-    file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
-    config = toml.load(file_path)
-
-    # Edit values
-    cluster = config['provider']['cluster']
-    wallet_path = config['provider']['wallet']
-    if wallet_path is None:
-        return None, None
-    wallet_name = wallet_path.removeprefix('../../../../solana_wallets/')
-    return cluster, wallet_name
-
-def _get_program_id(program_name):
-    # Update absolute path in the root folder of the package
-    program_root = Path(f"{anchor_base_path}/.anchor_files/{program_name}").resolve()
-
-    if not program_root.exists():
-        raise FileNotFoundError(f"The folder {program_root} does not exist. Check program name")
-
-    # Path to program id
-    module_path = program_root / "anchorpy_files" / "program_id.py"
-
-    if not module_path.exists():
-        raise FileNotFoundError(f"The file {module_path} does not exist. Verify instruction name.")
-
-    # Add program root to sys.path to enable relative imports
-    if str(program_root) not in sys.path:
-        sys.path.append(str(program_root))
-
-    # Complete name of the module to import
-    module_name = f"anchorpy_files.program_id"
-
-    # Dynamic import of the module
-    module = importlib.import_module(module_name)
-
-    # Verify that the function exists
-    if not hasattr(module, 'PROGRAM_ID'):
-        raise AttributeError(f"The module {module_name} does not contain the program id.")
-
-    return getattr(module, "PROGRAM_ID")
+    # Cluster and wallet of the last deploy made through the toolchain
+    program = fetch_registered_program(program_name)
+    return program.get('cluster'), program.get('wallet')
 
 def _remove_initialized_program(program_name):
     folder_to_remove = f"{anchor_base_path}/.anchor_files/{program_name}"
@@ -219,3 +175,4 @@ def _remove_initialized_program(program_name):
         print("Program removed from toolchain.")
     else:
         print("Program folder does not exists.")
+    remove_registered_program(program_name)
@@ -24,40 +24,26 @@
 import os
 import json
 import re
-import toml
 import importlib
 import importlib.util
-from based58 import b58encode
 from solders.pubkey import Pubkey
 from solana_module.solana_utils import solana_base_path, choose_wallet, load_keypair_from_file, selection_menu
+from solana_module.anchor_module.program_registry import fetch_registered_programs, fetch_registered_program
 
 
 anchor_base_path = f"{solana_base_path}/anchor_module"
 
+# Parsed IDLs, keyed by path and modification time
+_loaded_idls = dict()
+
 
 # ====================================================
 # PUBLIC FUNCTIONS
 # ====================================================
 
 def fetch_initialized_programs():
-    path_to_explore = f"{anchor_base_path}/.anchor_files"
-    programs_with_anchorpy_files = []
-
-    # Check if the base directory exists before proceeding
-    if not os.path.exists(path_to_explore):
-        return programs_with_anchorpy_files
-
-    # Iterate program folders
-    for program in os.listdir(path_to_explore):
-        program_path = os.path.join(path_to_explore, program)
-
-        # Check if anchorpy_files folder is present
-        if os.path.isdir(program_path):
-            anchorpy_path = os.path.join(program_path, 'anchorpy_files')
-            if os.path.isdir(anchorpy_path):
-                programs_with_anchorpy_files.append(program)
-
-    return programs_with_anchorpy_files
+    # Programs with anchorpy files, as recorded in the program registry
+    return fetch_registered_programs()
 
 def fetch_program_instructions(idl):
     instructions = []
@@ -92,9 +78,8 @@ def choose_instruction(idl):
         return selection_menu('instruction', instructions)
 
 def fetch_cluster(program_name):
-    file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
-    config = toml.load(file_path)
-    cluster = config['provider']['cluster']
+    # Cluster of the last deploy made through the toolchain
+    cluster = fetch_registered_program(program_name).get('cluster')
     if cluster == "Localnet" or cluster == "Devnet" or cluster == "Mainnet":
         return cluster, True
     else:
@@ -106,6 +91,52 @@ def load_idl(file_path):
     with open(file_path, 'r') as f:
         return json.load(f)
 
+def load_cached_idl(file_path):
+    # Parse the IDL only once until the file changes, returns the IDL and its modification time
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"The IDL {file_path} does not exist. Check program name")
+    modification_time = os.path.getmtime(file_path)
+    key = (file_path, modification_time)
+    if key not in _loaded_idls:
+        _loaded_idls[key] = load_idl(file_path)
+    return _loaded_idls[key], modification_time
+
+def fetch_source_idl_path(program_name):
+    # IDL generated by Anchor build (Anchor 0.31 format)
+    return f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json"
+
+def fetch_converted_idl_path(program_name):
+    # IDL converted for anchorpy (Anchor 0.29 format), kept side by side with the source one
+    return f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}_anchorpy.json"
+
+def fetch_program_id(program_name, idl=None):
+    # Program ID recorded in the program registry
+    program_id = fetch_registered_program(program_name).get('program_id')
+    if program_id:
+        return Pubkey.from_string(program_id)
+
+    # Anchor 0.31 IDLs carry the program address
+    if idl is None and os.path.exists(fetch_source_idl_path(program_name)):
+        idl = load_idl(fetch_source_idl_path(program_name))
+    if idl is not None and idl.get('address'):
+        return Pubkey.from_string(idl['address'])
+
+    # Otherwise use the program ID written by anchorpy client-gen
+    module_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchorpy_files/program_id.py"
+    if not os.path.exists(module_path):
+        raise FileNotFoundError(f"Program ID of {program_name} not found.")
+    spec = importlib.util.spec_from_file_location("program_id", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PROGRAM_ID
+
+def fetch_idl_path(program_name):
+    converted_idl_path = fetch_converted_idl_path(program_name)
+    if os.path.exists(converted_idl_path):
+        return converted_idl_path
+    # Programs compiled by older versions of the toolchain have the converted IDL in place of the source one
+    return fetch_source_idl_path(program_name)
+
 def fetch_signer_accounts(instruction, idl):
     # Find the instruction in the IDL
     instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction)
@@ -138,8 +169,7 @@ def generate_pda(program_name, launched_from_utilities):
                 pda_key, repeat = _choose_number_of_seed(program_name)
             elif choice == "2":
                 random_bytes = os.urandom(32)
-                base58_str = b58encode(random_bytes).decode("utf-8")
-                pda_key = Pubkey.from_string(base58_str)
+                pda_key = Pubkey.from_bytes(random_bytes)
                 print(f'Extracted pda is: {pda_key}')
                 return pda_key
             elif choice == "3" and not launched_from_utilities:
@@ -156,6 +186,15 @@ def generate_pda(program_name, launched_from_utilities):
 
     return pda_key
 
+def input_token_account_manually():
+    print("Insert the token account (must be 44 characters long)")
+    return input()
+
+def derive_pda(program_name, seeds):
+    # Seeds are given as bytes, the same way they are built by the interactive generation
+    program_id = fetch_program_id(program_name)
+    return Pubkey.find_program_address(seeds, program_id)[0]
+
 def fetch_args(instruction, idl):
     # Find instruction
     instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction)
@@ -0,0 +1,342 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import json
+import re
+from collections import namedtuple
+from solders.pubkey import Pubkey
+from solana_module.anchor_module.anchor_utils import load_cached_idl, fetch_source_idl_path
+
+
+# Allowed ranges for each integer width
+INTEGER_RANGES = {
+    "u8": (0, 2**8 - 1), "i8": (-2**7, 2**7 - 1),
+    "u16": (0, 2**16 - 1), "i16": (-2**15, 2**15 - 1),
+    "u32": (0, 2**32 - 1), "i32": (-2**31, 2**31 - 1),
+    "u64": (0, 2**64 - 1), "i64": (-2**63, 2**63 - 1),
+    "u128": (0, 2**128 - 1), "i128": (-2**127, 2**127 - 1),
+    "u256": (0, 2**256 - 1), "i256": (-2**255, 2**255 - 1),
+}
+
+# Textual values accepted as an empty Option
+NONE_VALUES = ("", "none", "null")
+
+CompiledArg = namedtuple('CompiledArg', ['name', 'type', 'description', 'convert'])
+
+# Compiled args of each instruction, keyed by IDL modification time to follow re-compilations
+_compiled_instructions = dict()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def fetch_instruction_args(program_name, instruction_name):
+    # Source IDL is used because the converted one doesn't keep type definitions
+    idl_file_path = fetch_source_idl_path(program_name)
+    idl, modification_time = load_cached_idl(idl_file_path)
+    key = (program_name, instruction_name, modification_time)
+    if key not in _compiled_instructions:
+        _compiled_instructions[key] = compile_instruction_args(idl, instruction_name)
+    return _compiled_instructions[key]
+
+def compile_instruction_args(idl, instruction_name):
+    instruction_dict = next((instr for instr in idl['instructions'] if instr['name'] == instruction_name), None)
+    if instruction_dict is None:
+        raise ValueError(f"Instruction {instruction_name} not found in the IDL.")
+
+    types = _index_types(idl)
+    compiled_args = []
+    for arg in instruction_dict.get('args', []):
+        name = _to_snake(arg['name'])
+        convert = _compile_converter(arg['type'], types, name)
+        compiled_args.append(CompiledArg(name, arg['type'], describe_type(arg['type'], types), convert))
+    return compiled_args
+
+def convert_args(compiled_args, values):
+    # Values is a dict {arg_name: raw value}, raw values can be strings or typed JSON values
+    final_args = dict()
+    for compiled_arg in compiled_args:
+        if compiled_arg.name not in values:
+            raise ValueError(f"Missing value for arg {compiled_arg.name}.")
+        final_args[compiled_arg.name] = compiled_arg.convert(values[compiled_arg.name])
+    return final_args
+
+def describe_type(idl_type, types=None):
+    types = types or {}
+    if isinstance(idl_type, str):
+        if idl_type in INTEGER_RANGES:
+            low, high = INTEGER_RANGES[idl_type]
+            return f"integer ({idl_type}, from {low} to {high})"
+        elif idl_type == "bool":
+            return "boolean (true/false)"
+        elif idl_type in ("f32", "f64"):
+            return f"floating point number ({idl_type})"
+        elif idl_type == "string":
+            return "string"
+        elif idl_type == "bytes":
+            return "bytes (text or list of integers)"
+        elif idl_type in ("pubkey", "publicKey"):
+            return "public key"
+        return f"unsupported type {idl_type}"
+
+    if 'array' in idl_type:
+        inner_type, length = idl_type['array']
+        return f"array of length {length} of {describe_type(inner_type, types)}, values separated by spaces"
+    if 'vec' in idl_type:
+        return f"vector of {describe_type(idl_type['vec'], types)}, values separated by spaces"
+    if 'option' in idl_type or 'coption' in idl_type:
+        inner_type = idl_type.get('option', idl_type.get('coption'))
+        return f"optional {describe_type(inner_type, types)} (leave empty for none)"
+    if 'defined' in idl_type:
+        type_name = _defined_name(idl_type)
+        type_def = types.get(type_name)
+        if type_def is None:
+            return f"unsupported type {type_name}"
+        if type_def['kind'] == 'enum':
+            variants = ', '.join(variant['name'] for variant in type_def['variants'])
+            return f"enum {type_name} (one of {variants}, variants with fields as JSON)"
+        return f"struct {type_name} (JSON object)"
+    return f"unsupported type {idl_type}"
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _to_snake(name):
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+def _index_types(idl):
+    return {type_def['name']: type_def['type'] for type_def in idl.get('types', [])}
+
+def _defined_name(idl_type):
+    defined = idl_type['defined']
+    return defined['name'] if isinstance(defined, dict) else defined
+
+def _compile_converter(idl_type, types, path):
+    if isinstance(idl_type, str):
+        return _compile_simple_converter(idl_type, path)
+
+    if 'array' in idl_type:
+        inner_type, length = idl_type['array']
+        return _compile_sequence_converter(inner_type, length, types, path)
+    if 'vec' in idl_type:
+        return _compile_sequence_converter(idl_type['vec'], None, types, path)
+    if 'option' in idl_type or 'coption' in idl_type:
+        inner_type = idl_type.get('option', idl_type.get('coption'))
+        return _compile_option_converter(_compile_converter(inner_type, types, path))
+    if 'defined' in idl_type:
+        type_name = _defined_name(idl_type)
+        if type_name not in types:
+            raise ValueError(f"Type {type_name} of {path} not defined in the IDL.")
+        type_def = types[type_name]
+        if type_def['kind'] == 'struct':
+            return _compile_struct_converter(type_def.get('fields', []), types, path)
+        elif type_def['kind'] == 'enum':
+            return _compile_enum_converter(type_def['variants'], types, path)
+
+    raise ValueError(f"Unsupported type {idl_type} for {path}.")
+
+def _compile_simple_converter(idl_type, path):
+    if idl_type in INTEGER_RANGES:
+        return _compile_integer_converter(idl_type, path)
+    elif idl_type == "bool":
+        return lambda value: _convert_bool(value, path)
+    elif idl_type in ("f32", "f64"):
+        return lambda value: _convert_float(value, path)
+    elif idl_type == "string":
+        return lambda value: _convert_string(value, path)
+    elif idl_type == "bytes":
+        return lambda value: _convert_bytes(value, path)
+    elif idl_type in ("pubkey", "publicKey"):
+        return lambda value: _convert_pubkey(value, path)
+    raise ValueError(f"Unsupported type {idl_type} for {path}.")
+
+def _compile_integer_converter(idl_type, path):
+    low, high = INTEGER_RANGES[idl_type]
+
+    def convert_integer(value):
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid value {value!r} for {path}: expected {idl_type} integer.")
+        if isinstance(value, str):
+            value = _parse_integer(value, idl_type, path)
+        elif isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"Invalid value {value!r} for {path}: expected {idl_type} integer.")
+            value = int(value)
+        elif not isinstance(value, int):
+            raise ValueError(f"Invalid value {value!r} for {path}: expected {idl_type} integer.")
+        if value < low or value > high:
+            raise ValueError(f"Value {value} for {path} out of range for {idl_type} ({low} to {high}).")
+        return value
+    return convert_integer
+
+def _parse_integer(text, idl_type, path):
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    # Hexadecimal, octal and binary literals (e.g. 0xff)
+    try:
+        return int(text, 0)
+    except ValueError:
+        raise ValueError(f"Invalid value {text!r} for {path}: expected {idl_type} integer.") from None
+
+def _compile_sequence_converter(inner_type, length, types, path):
+    convert_item = _compile_converter(inner_type, types, f"{path}[]")
+    is_byte_sequence = inner_type == 'u8'
+
+    def convert_sequence(value):
+        if isinstance(value, str):
+            stripped = value.strip()
+            # Nested values can be written as JSON, simple ones separated by spaces
+            value = json.loads(stripped) if stripped.startswith('[') else stripped.split()
+        elif isinstance(value, (bytes, bytearray)) and is_byte_sequence:
+            value = list(value)
+        elif not isinstance(value, (list, tuple)):
+            raise ValueError(f"Invalid value {value!r} for {path}: expected a list of values.")
+
+        if length is not None and len(value) != length:
+            raise ValueError(f"Expected array of length {length} for {path}, but got {len(value)}")
+
+        converted = [convert_item(item) for item in value]
+        # u8 sequences are handed over as bytes, so they are copied in bulk by the encoder
+        return bytes(converted) if is_byte_sequence else converted
+    return convert_sequence
+
+def _compile_option_converter(convert_inner):
+    def convert_option(value):
+        if value is None or (isinstance(value, str) and value.strip().lower() in NONE_VALUES):
+            return None
+        return convert_inner(value)
+    return convert_option
+
+def _compile_struct_converter(fields, types, path):
+    if fields and not isinstance(fields[0], dict):
+        # Tuple struct, values are given as a list
+        converters = [_compile_converter(field_type, types, f"{path}.{i}") for i, field_type in enumerate(fields)]
+
+        def convert_tuple(value):
+            value = _parse_json(value, path)
+            if not isinstance(value, (list, tuple)) or len(value) != len(converters):
+                raise ValueError(f"Invalid value for {path}: expected a list of {len(converters)} values.")
+            return [convert(item) for convert, item in zip(converters, value)]
+        return convert_tuple
+
+    converters = [(_to_snake(field['name']), field['name'], _compile_converter(field['type'], types, f"{path}.{field['name']}"))
+                  for field in fields]
+
+    def convert_struct(value):
+        value = _parse_json(value, path)
+        if not isinstance(value, dict):
+            raise ValueError(f"Invalid value for {path}: expected a JSON object.")
+        converted = dict()
+        for snake_name, idl_name, convert in converters:
+            # Field names are accepted both as in the IDL and in snake case
+            if snake_name in value:
+                converted[snake_name] = convert(value[snake_name])
+            elif idl_name in value:
+                converted[snake_name] = convert(value[idl_name])
+            else:
+                raise ValueError(f"Missing field {idl_name} for {path}.")
+        return converted
+    return convert_struct
+
+def _compile_enum_converter(variants, types, path):
+    converters = dict()
+    for variant in variants:
+        fields = variant.get('fields')
+        convert_fields = _compile_struct_converter(fields, types, f"{path}.{variant['name']}") if fields else None
+        converters[variant['name']] = (variant['name'], convert_fields)
+        converters[_to_snake(variant['name'])] = (variant['name'], convert_fields)
+
+    def convert_enum(value):
+        if isinstance(value, str) and not value.strip().startswith('{'):
+            variant_name, variant_value = value.strip(), None
+        else:
+            value = _parse_json(value, path)
+            if not isinstance(value, dict) or len(value) != 1:
+                raise ValueError(f"Invalid value for {path}: expected a variant name or {{variant: fields}}.")
+            variant_name, variant_value = next(iter(value.items()))
+
+        if variant_name not in converters:
+            raise ValueError(f"Unknown variant {variant_name} for {path}.")
+        idl_name, convert_fields = converters[variant_name]
+        if convert_fields is None:
+            return idl_name
+        if variant_value is None:
+            raise ValueError(f"Variant {idl_name} of {path} requires fields.")
+        return {idl_name: convert_fields(variant_value)}
+    return convert_enum
+
+def _parse_json(value, path):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON for {path}: {value!r}") from None
+    return value
+
+def _convert_bool(value, path):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError(f"Invalid value {value!r} for {path}: expected true or false.")
+
+def _convert_float(value, path):
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid value {value!r} for {path}: expected a floating point number.")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value {value!r} for {path}: expected a floating point number.") from None
+
+def _convert_string(value, path):
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid value {value!r} for {path}: expected a string.")
+    return value
+
+def _convert_bytes(value, path):
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, (list, tuple)):
+        try:
+            return bytes(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {path}: bytes must be integers from 0 to 255.") from None
+    raise ValueError(f"Invalid value {value!r} for {path}: expected bytes.")
+
+def _convert_pubkey(value, path):
+    if isinstance(value, Pubkey):
+        return value
+    try:
+        return Pubkey.from_string(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid public key {value!r} for {path}.") from None
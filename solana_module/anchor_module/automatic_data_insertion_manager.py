@@ -1,20 +1,16 @@
 import csv
 import os
-import re
 import asyncio
-from solders.pubkey import Pubkey
 from anchorpy import Wallet, Provider
-from solana_module.anchor_module.transaction_manager import build_transaction, measure_transaction_size, \
-    compute_transaction_fees, send_transaction
-from solana_module.solana_utils import load_keypair_from_file, solana_base_path, create_client, selection_menu
-from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs, \
-    fetch_program_instructions, fetch_required_accounts, fetch_signer_accounts, fetch_args, check_type, convert_type, \
-    fetch_cluster, load_idl, check_if_array , check_if_vec
-
-from spl.token.async_client import AsyncToken
-from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
-from solders.pubkey import Pubkey as SoldersPubkey
-from solana.rpc.async_api import AsyncClient
+from solana_module.anchor_module.transaction_manager import build_transaction_from_instruction, \
+    measure_transaction_size, compute_transaction_fees
+from solana_module.solana_utils import create_client, selection_menu
+from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs
+from solana_module.anchor_module.trace_planner import plan_csv_trace, print_plan_errors, PlannedWait
+from solana_module.anchor_module.lookup_tables import load_lookup_tables
+from solana_module.anchor_module.compute_profiler import simulate_compute_units
+from solana_module.anchor_module.delivery_engine import deliver_transaction
+from solana_module.anchor_module.plan_cache import compute_plan_key, load_cached_plan, save_cached_plan
 
 # ====================================================
 # PUBLIC FUNCTIONS
@@ -27,230 +23,85 @@ async def run_execution_trace():
         print("No program has been initialized yet.")
         return
 
-    results = []
-
     execution_traces = _find_execution_traces()
     file_name = selection_menu('execution trace', execution_traces)
     if file_name is None:
         return
-    csv_file = _read_csv(f"{anchor_base_path}/execution_traces/{file_name}")
+    return await execute_execution_trace(file_name)
 
-    # Create async client outside the loop
-    client = AsyncClient("https://api.devnet.solana.com")
+async def execute_execution_trace(file_name):
+    # Fetch initialized programs
+    initialized_programs = fetch_initialized_programs()
+    if len(initialized_programs) == 0:
+        print("No program has been initialized yet.")
+        return
 
-    try:
-        # For each execution trace
-        for index, row in enumerate(csv_file, start=1):
-            # Check if it's a slot waiting command
-            if row[0].startswith("S:"):
-                extracted_key = row[0].removeprefix('S:').strip()
-                print(f"\n\nthis is my extracted key {extracted_key}\n\n")
-                target_slot = int(extracted_key)
+    results = []
 
-                first_response = await client.get_slot()
-                first_current_slot = first_response.value
-                target_end_slot = first_current_slot + target_slot
+    trace_path = f"{anchor_base_path}/execution_traces/{file_name}"
+    csv_file = _read_csv(trace_path)
+    if csv_file is None:
+        print(f"Execution trace {file_name} not found.")
+        return
 
-                print(f"Waiting for slot {target_slot} ...")
+    # Planning phase: the whole trace is resolved and validated before sending anything,
+    # unless the same trace has already been planned with the same programs and wallets
+    plan_key = compute_plan_key(trace_path)
+    plan = load_cached_plan(plan_key)
+    if plan is None:
+        plan, errors = plan_csv_trace(csv_file)
+        if errors:
+            print_plan_errors(file_name, errors)
+            return
+        save_cached_plan(plan_key, plan)
+    else:
+        print(f"Using the cached plan of {file_name}.")
 
-                while True:
-                    try:
-                        response = await client.get_slot()
-                        current_slot = response.value
-                        current_value = target_end_slot - current_slot
+    # Create async client outside the loop
+    client = create_client("Devnet")
+    clients_for_transaction = dict()
+    lookup_tables = dict()
 
-                        if current_value <= 0:
-                            print(f"Target reached! Current slot: {target_slot - current_value}, target was: {target_slot}")
-                            break
+    try:
+        # For each planned step
+        for index, step in enumerate(plan, start=1):
+            # Check if it's a slot waiting command
+            if isinstance(step, PlannedWait):
+                await wait_for_slots(client, step.slots)
+                continue
 
-                        print(f"Current slot: {target_slot - current_value}, target slot: {target_slot}")
-                        await asyncio.sleep(1)
+            print(f"Working on execution trace with ID {step.step_id}...")
 
-                    except Exception as e:
-                        print(f"Error checking slot: {e}")
-                        await asyncio.sleep(2)
+            # One client for each cluster, reused by all the steps
+            if step.cluster not in clients_for_transaction:
+                clients_for_transaction[step.cluster] = create_client(step.cluster)
+            client_for_transaction = clients_for_transaction[step.cluster]
+            provider = Provider(client_for_transaction, Wallet(step.provider))
 
-                continue
+            # Lookup table created for the program, if any, loaded once for each program and cluster
+            lookup_key = (step.program_name, step.cluster)
+            if lookup_key not in lookup_tables:
+                lookup_tables[lookup_key] = await load_lookup_tables(client_for_transaction, *lookup_key)
 
-            # Normal execution trace processing
-            execution_trace = [x.strip() for x in re.split(r"[;,]", row[0])]
-
-            # Get execution trace ID
-            trace_id = execution_trace[0]
-            print(f"Working on execution trace with ID {trace_id}...")
-
-            # Manage program
-            program_name = execution_trace[1]
-            if program_name not in initialized_programs:
-                print(f"Program {program_name} not initialized yet (execution trace {trace_id}).")
-                return
-
-            # Manage instruction
-            idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
-            idl = load_idl(idl_file_path)
-            instructions = fetch_program_instructions(idl)
-            instruction = execution_trace[2]
-            if instruction not in instructions:
-                print(f"Instruction {instruction} not found for the program {program_name} (execution trace {trace_id}).")
-
-            # Manage accounts
-            required_accounts = fetch_required_accounts(instruction, idl)
-            signer_accounts = fetch_signer_accounts(instruction, idl)
-            final_accounts = dict()
-            signer_accounts_keypairs = dict()
-            
-            # Initialize remaining accounts list
-            remaining_accounts = []
-            from solders.instruction import AccountMeta
-            
-            i = 3
-            for account in required_accounts:
-                # If it is a wallet
-                if execution_trace[i].startswith("W:"):
-                    wallet_name = execution_trace[i].removeprefix('W:')
-                    file_path = f"{solana_base_path}/solana_wallets/{wallet_name}"
-                    keypair = load_keypair_from_file(file_path)
-                    if keypair is None:
-                        print(f"Wallet for account {account} not found at path {file_path}.")
-                        return
-                    if account in signer_accounts:
-                        signer_accounts_keypairs[account] = keypair
-                    final_accounts[account] = keypair.pubkey()
-                # If it is a PDA
-                elif execution_trace[i].startswith("P:"):
-                    extracted_key = execution_trace[i].removeprefix('P:')
-                    try:
-                        pda_key = Pubkey.from_string(extracted_key)
-                        final_accounts[account] = pda_key
-                    except Exception as e:
-                        print(f"Invalid PDA key format for account {account}: {extracted_key}. Error: {e}")
-                        return
-                # If it is a Token Account (manual input)
-                elif execution_trace[i].startswith("T:"):
-                    extracted_key = execution_trace[i].removeprefix('T:')
-                    try:
-                        token_account_key = Pubkey.from_string(extracted_key)
-                        final_accounts[account] = token_account_key
-                        print(f"Token account {account} added with address: {token_account_key}")
-                    except Exception as e:
-                        print(f"Invalid token account key format for account {account}: {extracted_key}. Error: {e}")
-                        return
-                else:
-                    print(f"Invalid account prefix for account {account}. Expected 'W:', 'P:', or 'T:' but got: {execution_trace[i]}")
-                    print("Please use:")
-                    print("  - 'W:wallet_name' for wallet accounts")
-                    print("  - 'P:pda_address' for PDA accounts")
-                    print("  - 'T:token_account_address' for token accounts")
-                    return
-                i += 1
-
-            # FIXED: Process remaining accounts after required accounts
-            # Continue processing remaining accounts (R: prefix)
-            while i < len(execution_trace) and execution_trace[i].startswith("R:"):
-                wallet_name = execution_trace[i].removeprefix('R:')
-                file_path = f"{solana_base_path}/solana_wallets/{wallet_name}"
-                keypair = load_keypair_from_file(file_path)
-                if keypair is None:
-                    print(f"Wallet for remaining account not found at path {file_path}.,remember to put the remaning accounts right after the reequired ones")
-                    return
-                
-                pubkey = keypair.pubkey()
-                new_account_meta = AccountMeta(
-                    pubkey=pubkey,
-                    is_signer=False,  # Remaining accounts are typically non-signers
-                    is_writable=False
-                )
-                remaining_accounts.append(new_account_meta)
-                print(f"✓ Remaining account added as payee: {pubkey}")
-                i += 1
-
-            # Manage args
-            required_args = fetch_args(instruction, idl)
-            final_args = dict()
-            for arg in required_args:
-                # Manage arrays
-                array_type, array_length = check_if_array(arg)
-                vec_type = check_if_vec(arg)
-                if array_type is not None and array_length is not None:
-                    array_values = execution_trace[i].split()
-
-                    # Check if array has correct length
-                    if len(array_values) != array_length:
-                        print(f"Error: Expected array of length {array_length}, but got {len(array_values)}")
-                        return
-
-                    # Convert array elements basing on the type
-                    valid_values = []
-                    for j in range(len(array_values)):
-                        converted_value = convert_type(array_type, array_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j} in the array. Please try again.")
-                            return
-
-                    final_args[arg['name']] = valid_values
-                #vectors handling
-                elif vec_type is not None:
-                    vec_values = execution_trace[i].split()
-                    #check if vec has more than zero 
-                    if len(vec_values) == 0:
-                        print("vec cannot have zero elements")
-                        return
-                    
-                    # Convert vec elements basing on the type
-                    valid_values = []
-                    for j in range(len(vec_values)):
-                        converted_value = convert_type(vec_type, vec_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j} in the vector. Please try again.")
-                            return
-
-                    final_args[arg['name']] = valid_values
-
-                # Manage classical args
-                else:
-                    type = check_type(arg["type"])
-                    if type is None:
-                        print(f"Unsupported type for arg {arg['name']}")
-                        return
-
-                    if type == "bytes":              
-                            aux = execution_trace[i].encode('utf-8')
-                            final_args[arg['name']] = aux
-                            
-                    else:
-                        converted_value = convert_type(type, execution_trace[i])
-                        final_args[arg['name']] = converted_value
-
-                i += 1
-
-            # Manage provider
-            provider_keypair_path = f"{solana_base_path}/solana_wallets/{execution_trace[i]}"
-            keypair = load_keypair_from_file(provider_keypair_path)
-            if keypair is None:
-                print("Provider wallet not found.")
-            cluster, is_deployed = fetch_cluster(program_name)
-            client_for_transaction = create_client(cluster)
-            provider_wallet = Wallet(keypair)
-            provider = Provider(client_for_transaction, provider_wallet)
-
-            # FIXED: Pass remaining_accounts to build_transaction
-            transaction = await build_transaction(program_name, instruction, final_accounts, final_args, 
-                                                signer_accounts_keypairs, client_for_transaction, provider, remaining_accounts)
+            transaction = await build_transaction_from_instruction(step.instruction, step.signers,
+                                                                   client_for_transaction, provider,
+                                                                   lookup_tables[lookup_key])
             size = measure_transaction_size(transaction)
             fees = await compute_transaction_fees(client_for_transaction, transaction)
-
-            # CSV building
-            csv_row = [trace_id, instruction, size, fees]
-
-            i += 1
-            if str(execution_trace[i]).lower() == 'true':
-                if is_deployed:
-                    transaction_hash = await send_transaction(provider, transaction)
-                    csv_row.append(transaction_hash)
+            compute_units = await simulate_compute_units(client_for_transaction, transaction) or {}
+
+            # CSV building, with the lookup table the transaction was compiled against: it changes the size
+            csv_row = [step.step_id, step.instruction_name, size, fees, compute_units.get('units_consumed'),
+                       _fetch_lookup_table_address(lookup_tables[lookup_key])]
+
+            if step.send_transaction:
+                if step.is_deployed:
+                    # Rebuilt with a fresh blockhash only if it expires without landing
+                    delivery = await deliver_transaction(
+                        client_for_transaction, transaction,
+                        lambda: build_transaction_from_instruction(step.instruction, step.signers, client_for_transaction,
+                                                                   provider, lookup_tables[lookup_key]))
+                    csv_row += [delivery.signature, delivery.outcome, delivery.attempts]
                 else:
                     csv_row.append('Program not deployed with toolchain')
 
@@ -260,11 +111,38 @@ async def run_execution_trace():
 
     finally:
         await client.close()
+        for client_for_transaction in clients_for_transaction.values():
+            await client_for_transaction.close()
 
     # CSV writing
     file_name_without_extension = file_name.removesuffix(".csv")
     file_path = _write_csv(file_name_without_extension, results)
     print(f"Results written successfully to {file_path}")
+    return file_path
+
+async def wait_for_slots(client, target_slot):
+    first_response = await client.get_slot()
+    first_current_slot = first_response.value
+    target_end_slot = first_current_slot + target_slot
+
+    print(f"Waiting for slot {target_slot} ...")
+
+    while True:
+        try:
+            response = await client.get_slot()
+            current_slot = response.value
+            current_value = target_end_slot - current_slot
+
+            if current_value <= 0:
+                print(f"Target reached! Current slot: {target_slot - current_value}, target was: {target_slot}")
+                break
+
+            print(f"Current slot: {target_slot - current_value}, target slot: {target_slot}")
+            await asyncio.sleep(1)
+
+        except Exception as e:
+            print(f"Error checking slot: {e}")
+            await asyncio.sleep(2)
 
 
 # ====================================================
@@ -279,6 +157,9 @@ def _find_execution_traces():
 
     return [f for f in os.listdir(path) if f.lower().endswith('.csv')]
 
+def _fetch_lookup_table_address(lookup_tables):
+    return str(lookup_tables[0].key) if lookup_tables else ''
+
 def _read_csv(file_path):
     if os.path.exists(file_path):
         with open(file_path, mode='r') as file:
@@ -304,7 +185,11 @@ def _write_csv(file_name, results):
             'Operation_Name',
             'Transaction_Size_Bytes', 
             'Transaction_Fees_Lamports',
-            'Transaction_Hash_or_Status'
+            'Compute_Units',
+            'Lookup_Table',
+            'Transaction_Hash_or_Status',
+            'Delivery_Outcome',
+            'Delivery_Attempts'
         ]
         csv_writer.writerow(header)
         
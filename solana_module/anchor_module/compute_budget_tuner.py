@@ -0,0 +1,178 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import math
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.program_registry import fetch_registered_program, update_registered_program
+from solana_module.anchor_module.trace_planner import PlannedStep, PlannedWait
+from solana_module.anchor_module.transaction_manager import build_packed_transaction, fetch_fee_payer, \
+    LAMPORTS_PER_SIGNATURE
+from solana_module.anchor_module.transaction_packer import MAX_TRANSACTION_COMPUTE_UNITS, \
+    DEFAULT_INSTRUCTION_COMPUTE_UNITS, wait_planned_slots
+from solana_module.anchor_module.size_predictor import predict_instructions_size, count_transaction_keys
+from solana_module.anchor_module.compute_profiler import simulate_compute_units
+from solana_module.anchor_module.delivery_engine import deliver_transaction
+
+
+# Default margin added to the measured units
+DEFAULT_MARGIN = 0.1
+
+MICRO_LAMPORTS_PER_LAMPORT = 1_000_000
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def tune_plan(plan, margin=DEFAULT_MARGIN, micro_lamports=None, send=False):
+    # Compute unit limit of each step from its measured units, simulated only when they aren't cached
+    results = []
+    clients = dict()
+    try:
+        for index, step in enumerate(plan):
+            # Waits of the trace only matter when the tuned steps are sent
+            if isinstance(step, PlannedWait):
+                if send:
+                    await wait_planned_slots(plan, index, clients)
+                continue
+            if not isinstance(step, PlannedStep):
+                continue
+            if step.cluster not in clients:
+                clients[step.cluster] = create_client(step.cluster)
+            client = clients[step.cluster]
+
+            result = {'step_id': step.step_id, 'program': step.program_name, 'instruction': step.instruction_name}
+            units_consumed = fetch_cached_compute_units(step)
+            result['source'] = 'cache'
+            if units_consumed is None:
+                units_consumed, error = await measure_compute_units(client, step)
+                result['source'] = 'simulation'
+                if error is not None:
+                    result['error'] = error
+                    results.append(result)
+                    continue
+                cache_compute_units(step, units_consumed)
+
+            compute_unit_limit = compute_tuned_limit(units_consumed, margin)
+            result.update(units_consumed=units_consumed, compute_unit_limit=compute_unit_limit)
+            result.update(compare_tuned_step(step, compute_unit_limit, micro_lamports))
+
+            if send and step.send_transaction and step.is_deployed:
+                def build():
+                    return build_tuned_transaction(step, client, compute_unit_limit, micro_lamports)
+
+                delivery = await deliver_transaction(client, await build(), build)
+                result.update(transaction_hash=delivery.signature, outcome=delivery.outcome, attempts=delivery.attempts)
+            results.append(result)
+    finally:
+        for client in clients.values():
+            await client.close()
+    return results
+
+async def measure_compute_units(client, step):
+    # Simulation with the maximum limit, so that steps above the default allocation can be measured
+    transaction = await build_tuned_transaction(step, client, MAX_TRANSACTION_COMPUTE_UNITS)
+    simulation = await simulate_compute_units(client, transaction)
+    if simulation is None:
+        return None, "simulation failed"
+    if simulation['error'] is not None or simulation['units_consumed'] is None:
+        return None, f"simulation failed: {simulation['error']}"
+    return simulation['units_consumed'], None
+
+def compute_tuned_limit(units_consumed, margin=DEFAULT_MARGIN):
+    return min(MAX_TRANSACTION_COMPUTE_UNITS, math.ceil(units_consumed * (1 + margin)))
+
+async def build_tuned_transaction(step, client, compute_unit_limit, micro_lamports=None, lookup_tables=()):
+    # Same transaction as the untuned one, with ComputeBudget instructions before the step instruction
+    payer = fetch_fee_payer(step.instruction, step.signers, step.provider)
+    return await build_packed_transaction(compute_budget_instructions(compute_unit_limit, micro_lamports)
+                                          + [step.instruction], step.signers.values(), payer, not step.signers,
+                                          client, lookup_tables)
+
+def compute_budget_instructions(compute_unit_limit, micro_lamports=None):
+    ixs = [set_compute_unit_limit(compute_unit_limit)]
+    if micro_lamports:
+        ixs.append(set_compute_unit_price(micro_lamports))
+    return ixs
+
+def compute_priority_fee(compute_unit_limit, micro_lamports):
+    # Priority fee is paid on the requested units, not on the consumed ones
+    return math.ceil(compute_unit_limit * (micro_lamports or 0) / MICRO_LAMPORTS_PER_LAMPORT)
+
+def compare_tuned_step(step, compute_unit_limit, micro_lamports=None):
+    # Size and fee of the step with the default allocation and with the tuned limit, at the same price
+    payer = fetch_fee_payer(step.instruction, step.signers, step.provider).pubkey()
+    versioned = not step.signers
+    base_fee = LAMPORTS_PER_SIGNATURE * count_transaction_keys([step.instruction], payer)[0]
+
+    default_ixs = ([set_compute_unit_price(micro_lamports)] if micro_lamports else []) + [step.instruction]
+    tuned_ixs = compute_budget_instructions(compute_unit_limit, micro_lamports) + [step.instruction]
+    return {
+        'size_bytes': predict_instructions_size(default_ixs, payer, versioned),
+        'tuned_size_bytes': predict_instructions_size(tuned_ixs, payer, versioned),
+        'fee_lamports': base_fee + compute_priority_fee(DEFAULT_INSTRUCTION_COMPUTE_UNITS, micro_lamports),
+        'tuned_fee_lamports': base_fee + compute_priority_fee(compute_unit_limit, micro_lamports),
+    }
+
+def fetch_cached_compute_units(step):
+    # Cached units are valid until the program is deployed again
+    cache = fetch_registered_program(step.program_name).get('compute_units', {})
+    if cache.get('deployed_at') != _fetch_deployed_at(step.program_name) or cache.get('cluster') != step.cluster:
+        return None
+    return cache.get('units', {}).get(_compute_units_key(step))
+
+def cache_compute_units(step, units_consumed):
+    cache = fetch_registered_program(step.program_name).get('compute_units', {})
+    deployed_at = _fetch_deployed_at(step.program_name)
+    if cache.get('deployed_at') != deployed_at or cache.get('cluster') != step.cluster:
+        cache = {'deployed_at': deployed_at, 'cluster': step.cluster, 'units': {}}
+    cache['units'][_compute_units_key(step)] = units_consumed
+    update_registered_program(step.program_name, compute_units=cache)
+
+def format_tuning_report(results):
+    lines = []
+    for result in results:
+        description = f"Step {result['step_id']} {result['program']}.{result['instruction']}"
+        if 'error' in result:
+            lines.append(f"{description}: {result['error']}")
+            continue
+        lines.append(f"{description}: {result['units_consumed']} units consumed ({result['source']}), "
+                     f"limit {result['compute_unit_limit']}, size {result['size_bytes']} -> {result['tuned_size_bytes']} "
+                     f"bytes, fee {result['fee_lamports']} -> {result['tuned_fee_lamports']} lamports")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _compute_units_key(step):
+    # Arg shape is the length of the encoded instruction data: it follows the lengths of strings and vectors,
+    # and it is known for cached plans too
+    return f"{step.instruction_name}/{len(step.instruction.data)}"
+
+def _fetch_deployed_at(program_name):
+    return fetch_registered_program(program_name).get('deployed_at')
@@ -0,0 +1,88 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import re
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID
+from solana_module.anchor_module.instruction_encoder import CONST_ACCOUNTS
+
+
+# Log lines written by the runtime for each program invocation
+INVOKE_LOG = re.compile(r"^Program (\w+) invoke \[(\d+)\]$")
+CONSUMED_LOG = re.compile(r"^Program (\w+) consumed (\d+) of (\d+) compute units$")
+RESULT_LOG = re.compile(r"^Program (\w+) (success|failed)")
+
+# Names of the programs filled by the toolchain, shown in place of their IDs
+KNOWN_PROGRAMS = {str(address): name for name, address in CONST_ACCOUNTS.items()}
+KNOWN_PROGRAMS[str(COMPUTE_BUDGET_PROGRAM_ID)] = 'compute_budget_program'
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def simulate_compute_units(client, tx):
+    # Compute units of a built transaction, from its simulation (signatures are not verified)
+    try:
+        response = await client.simulate_transaction(tx, sig_verify=False)
+    except Exception as e:
+        print(f"Error simulating transaction: {e}")
+        return None
+
+    result = response.value
+    return {
+        'units_consumed': result.units_consumed,
+        'invocations': parse_compute_logs(result.logs or []),
+        'error': str(result.err) if result.err is not None else None,
+    }
+
+def parse_compute_logs(logs):
+    # One entry for each invocation, CPIs included, in invocation order. Consumed units of a program
+    # include the ones of the programs it invokes, own units don't. Builtin programs (e.g. the System
+    # program) don't log their consumption, so their units are None
+    invocations = []
+    stack = []
+    for line in logs:
+        match = INVOKE_LOG.match(line)
+        if match:
+            invocation = {'program': KNOWN_PROGRAMS.get(match.group(1), match.group(1)), 'depth': int(match.group(2)),
+                          'units_consumed': None, 'units_limit': None, 'own_units': None, '_inner_units': 0}
+            invocations.append(invocation)
+            stack.append(invocation)
+            continue
+
+        match = CONSUMED_LOG.match(line)
+        if match and stack:
+            invocation = stack[-1]
+            invocation['units_consumed'] = int(match.group(2))
+            invocation['units_limit'] = int(match.group(3))
+            invocation['own_units'] = invocation['units_consumed'] - invocation['_inner_units']
+            continue
+
+        if RESULT_LOG.match(line) and stack:
+            invocation = stack.pop()
+            if stack and invocation['units_consumed'] is not None:
+                stack[-1]['_inner_units'] += invocation['units_consumed']
+
+    for invocation in invocations:
+        del invocation['_inner_units']
+    return invocations
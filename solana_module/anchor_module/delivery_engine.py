@@ -0,0 +1,123 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import time
+from collections import namedtuple
+from solders.transaction_status import TransactionConfirmationStatus
+from solana.rpc.commitment import Finalized
+from solana.rpc.types import TxOpts
+from solana.transaction import Transaction
+
+
+# Seconds between two broadcasts of the same signed transaction
+REBROADCAST_INTERVAL = 2
+
+# Seconds between two checks of the status of the transaction
+POLL_INTERVAL = 0.5
+
+# Times a transaction is rebuilt with a fresh blockhash, after the previous one expired without landing
+MAX_REBUILDS = 3
+
+# Outcome is landed, failed (landed with an error), rejected (refused by the preflight checks) or expired
+# (not landed with any blockhash). Attempts are the broadcasts of all the builds
+Delivery = namedtuple('Delivery', ['signature', 'outcome', 'attempts', 'rebuilds', 'error'])
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def deliver_transaction(client, transaction, rebuild, max_rebuilds=MAX_REBUILDS):
+    # The signed transaction is broadcast again every REBROADCAST_INTERVAL seconds until it lands or its
+    # blockhash expires. It is rebuilt by rebuild() (with a fresh blockhash, and signed again) only when the
+    # expiry is finalized and the transaction has no status: then it can't land anymore and it can't be
+    # executed twice
+    attempts = 0
+    signature = None
+    for rebuilds in range(max_rebuilds + 1):
+        if rebuilds:
+            transaction = await rebuild()
+        raw = transaction.serialize() if isinstance(transaction, Transaction) else bytes(transaction)
+        signature = transaction.signatures[0]
+
+        # Upper bound of the last valid block height of the transaction: a blockhash fetched
+        # after the build is at least as recent as the one of the transaction
+        last_valid_block_height = (await client.get_latest_blockhash()).value.last_valid_block_height
+
+        attempts += 1
+        try:
+            await client.send_raw_transaction(raw, opts=TxOpts(skip_confirmation=True))
+        except Exception as e:
+            # Refused by the preflight checks, so it hasn't been forwarded: an unknown blockhash is rebuilt
+            if 'BlockhashNotFound' in str(e) and rebuilds < max_rebuilds:
+                continue
+            return Delivery(str(signature), 'rejected', attempts, rebuilds, f"{type(e).__name__}: {e}")
+
+        status = await _wait_for_status(client, signature, raw, last_valid_block_height)
+        attempts += status.rebroadcasts
+        if status.value is not None:
+            if status.value.err is not None:
+                return Delivery(str(signature), 'failed', attempts, rebuilds, str(status.value.err))
+            return Delivery(str(signature), 'landed', attempts, rebuilds, None)
+        if rebuilds < max_rebuilds:
+            print(f"Transaction {signature} expired without landing, rebuilding it with a fresh blockhash...")
+    return Delivery(str(signature), 'expired', attempts, max_rebuilds, "Blockhash expired without landing")
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+_Status = namedtuple('_Status', ['value', 'rebroadcasts'])
+
+async def _wait_for_status(client, signature, raw, last_valid_block_height):
+    # Status once confirmed or failed, None once the blockhash expired without any status
+    rebroadcasts = 0
+    last_broadcast = time.perf_counter()
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        status = (await client.get_signature_statuses([signature])).value[0]
+        if status is not None:
+            if status.err is not None or status.confirmation_status in \
+                    (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized):
+                return _Status(status, rebroadcasts)
+            # Processed: it may still be dropped with its fork, then it is broadcast again
+            continue
+        if time.perf_counter() - last_broadcast < REBROADCAST_INTERVAL:
+            continue
+
+        # Expired at the finalized block height, so no later block can include it: the status found in the
+        # history, if any, is final even when the recent statuses don't have it anymore
+        if (await client.get_block_height(Finalized)).value > last_valid_block_height:
+            status = (await client.get_signature_statuses([signature], search_transaction_history=True)).value[0]
+            return _Status(status, rebroadcasts)
+
+        try:
+            await client.send_raw_transaction(raw, opts=TxOpts(skip_confirmation=True, skip_preflight=True))
+            rebroadcasts += 1
+        except Exception as e:
+            print(f"Error broadcasting transaction {signature}: {e}")
+        last_broadcast = time.perf_counter()
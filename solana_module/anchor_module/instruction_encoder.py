@@ -0,0 +1,365 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import hashlib
+import re
+import struct
+from solders.instruction import AccountMeta, Instruction
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYS_PROGRAM_ID
+from solders.sysvar import RENT, CLOCK
+from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
+
+
+# Accounts filled automatically when they are not given by the caller (same as anchorpy client-gen)
+CONST_ACCOUNTS = {
+    "system_program": SYS_PROGRAM_ID,
+    "token_program": TOKEN_PROGRAM_ID,
+    "associated_token_program": ASSOCIATED_TOKEN_PROGRAM_ID,
+    "rent": RENT,
+    "clock": CLOCK,
+}
+
+# Borsh primitives with a fixed size, packed with struct (little endian)
+PRIMITIVE_FORMATS = {
+    "bool": "?",
+    "u8": "B", "i8": "b",
+    "u16": "H", "i16": "h",
+    "u32": "I", "i32": "i",
+    "u64": "Q", "i64": "q",
+    "f32": "f", "f64": "d",
+}
+
+# Integers too big for struct, encoded with int.to_bytes
+BIG_INTEGER_SIZES = {
+    "u128": (16, False), "i128": (16, True),
+    "u256": (32, False), "i256": (32, True),
+}
+
+_U32 = struct.Struct('<I')
+
+
+class InstructionEncoder:
+    # Precompiled encoder of a single instruction: account metas template plus args packing routine
+    __slots__ = ('name', 'program_id', 'discriminator', 'accounts', 'arg_names', '_encode_args')
+
+    def __init__(self, name, program_id, discriminator, accounts, arg_names, encode_args):
+        self.name = name
+        self.program_id = program_id
+        self.discriminator = discriminator
+        self.accounts = accounts
+        self.arg_names = arg_names
+        self._encode_args = encode_args
+
+    def encode_data(self, args):
+        return self.discriminator + self._encode_args(args or {})
+
+    def build_account_metas(self, accounts, remaining_accounts=None):
+        accounts = accounts or {}
+        metas = []
+        for name, is_writable, is_signer, is_optional, fixed_address in self.accounts:
+            pubkey = accounts.get(name)
+            if pubkey is None:
+                if fixed_address is not None:
+                    pubkey = fixed_address
+                elif is_optional:
+                    # Anchor uses the program ID as placeholder for missing optional accounts
+                    metas.append(AccountMeta(self.program_id, is_signer=False, is_writable=False))
+                    continue
+                else:
+                    raise ValueError(f"Missing account {name} for instruction {self.name}.")
+            elif isinstance(pubkey, str):
+                pubkey = Pubkey.from_string(pubkey)
+            metas.append(AccountMeta(pubkey, is_signer=is_signer, is_writable=is_writable))
+
+        if remaining_accounts:
+            metas.extend(remaining_accounts)
+        return metas
+
+    def encode(self, accounts, args, remaining_accounts=None, program_id=None):
+        return Instruction(program_id or self.program_id, self.encode_data(args),
+                           self.build_account_metas(accounts, remaining_accounts))
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def compile_instruction_encoder(idl, instruction_name, program_id=None):
+    instruction_dict = next((instr for instr in idl['instructions'] if instr['name'] == instruction_name), None)
+    if instruction_dict is None:
+        raise ValueError(f"Instruction {instruction_name} not found in the IDL.")
+
+    if program_id is None:
+        program_id = fetch_idl_program_id(idl)
+    if isinstance(program_id, str):
+        program_id = Pubkey.from_string(program_id)
+
+    # Discriminator is written in Anchor 0.31 IDLs, otherwise it is derived from the instruction name
+    discriminator = instruction_dict.get('discriminator')
+    if discriminator is not None:
+        discriminator = bytes(discriminator)
+    else:
+        discriminator = compute_discriminator(instruction_name)
+
+    accounts = [_compile_account(account) for account in _flatten_accounts(instruction_dict['accounts'])]
+
+    types = _index_types(idl)
+    fields = [(_to_snake(arg['name']), arg['type']) for arg in instruction_dict.get('args', [])]
+    encode_args = _compile_fields(fields, types)
+
+    return InstructionEncoder(instruction_name, program_id, discriminator, accounts, [name for name, _ in fields], encode_args)
+
+def compile_type_encoder(idl_type, idl=None):
+    return _compile_type(idl_type, _index_types(idl) if idl else {})
+
+def compute_discriminator(instruction_name):
+    return hashlib.sha256(f"global:{_to_snake(instruction_name)}".encode()).digest()[:8]
+
+def fetch_idl_program_id(idl):
+    # Anchor 0.31 IDLs store the address at the top level, 0.29 ones (if any) inside metadata
+    address = idl.get('address') or idl.get('metadata', {}).get('address')
+    return Pubkey.from_string(address) if address else None
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _to_snake(name):
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+def _flatten_accounts(accounts):
+    # Composite accounts (nested "accounts" lists) are expanded in declaration order
+    flat = []
+    for account in accounts:
+        if 'accounts' in account:
+            flat.extend(_flatten_accounts(account['accounts']))
+        else:
+            flat.append(account)
+    return flat
+
+def _compile_account(account):
+    name = _to_snake(account['name'])
+    is_writable = bool(account.get('isMut', account.get('writable', False)))
+    is_signer = bool(account.get('isSigner', account.get('signer', False)))
+    is_optional = bool(account.get('isOptional', account.get('optional', False)))
+    if 'address' in account:
+        fixed_address = Pubkey.from_string(account['address'])
+    else:
+        fixed_address = CONST_ACCOUNTS.get(name)
+    return name, is_writable, is_signer, is_optional, fixed_address
+
+def _index_types(idl):
+    return {type_def['name']: type_def['type'] for type_def in idl.get('types', [])}
+
+def _compile_fields(fields, types):
+    # Consecutive fixed-size primitives are merged in a single struct call
+    steps = []
+    group_names = []
+    group_format = ''
+
+    def flush_group():
+        if group_names:
+            steps.append(_make_group_step(tuple(group_names), struct.Struct('<' + group_format)))
+
+    for name, field_type in fields:
+        field_format = PRIMITIVE_FORMATS.get(field_type) if isinstance(field_type, str) else None
+        if field_format is not None:
+            group_names.append(name)
+            group_format += field_format
+        else:
+            flush_group()
+            group_names = []
+            group_format = ''
+            steps.append(_make_field_step(name, _compile_type(field_type, types)))
+    flush_group()
+
+    if not steps:
+        return lambda values: b''
+    if len(steps) == 1:
+        return steps[0]
+
+    def encode_fields(values):
+        return b''.join([step(values) for step in steps])
+    return encode_fields
+
+def _make_group_step(names, packer):
+    pack = packer.pack
+
+    def encode_group(values):
+        try:
+            return pack(*[_field_value(values, name) for name in names])
+        except struct.error as e:
+            raise ValueError(f"Invalid value for one of {', '.join(names)}: {e}") from e
+    return encode_group
+
+def _make_field_step(name, encode):
+    def encode_field(values):
+        return encode(_field_value(values, name))
+    return encode_field
+
+def _field_value(values, name):
+    try:
+        return values[name]
+    except KeyError:
+        raise ValueError(f"Missing value for {name}.") from None
+
+def _compile_type(idl_type, types):
+    if isinstance(idl_type, str):
+        return _compile_simple_type(idl_type)
+
+    if 'array' in idl_type:
+        inner_type, length = idl_type['array']
+        return _compile_array(inner_type, length, types)
+    if 'vec' in idl_type:
+        return _compile_vec(idl_type['vec'], types)
+    if 'option' in idl_type:
+        return _compile_option(_compile_type(idl_type['option'], types), b'\x00', b'\x01')
+    if 'coption' in idl_type:
+        return _compile_option(_compile_type(idl_type['coption'], types), b'\x00\x00\x00\x00', b'\x01\x00\x00\x00')
+    if 'defined' in idl_type:
+        defined = idl_type['defined']
+        type_name = defined['name'] if isinstance(defined, dict) else defined
+        if type_name not in types:
+            raise ValueError(f"Type {type_name} not defined in the IDL.")
+        return _compile_defined(types[type_name], types)
+
+    raise ValueError(f"Unsupported type {idl_type}.")
+
+def _compile_simple_type(idl_type):
+    if idl_type in PRIMITIVE_FORMATS:
+        pack = struct.Struct('<' + PRIMITIVE_FORMATS[idl_type]).pack
+        return pack
+    if idl_type in BIG_INTEGER_SIZES:
+        size, signed = BIG_INTEGER_SIZES[idl_type]
+        return lambda value: int(value).to_bytes(size, 'little', signed=signed)
+    if idl_type == 'string':
+        return _encode_string
+    if idl_type == 'bytes':
+        return _encode_bytes
+    if idl_type in ('pubkey', 'publicKey'):
+        return _encode_pubkey
+    raise ValueError(f"Unsupported type {idl_type}.")
+
+def _compile_array(inner_type, length, types):
+    # [u8; N] values (hashes, seeds) are copied in bulk
+    if inner_type == 'u8':
+        def encode_byte_array(value):
+            data = value.encode() if isinstance(value, str) else bytes(value)
+            if len(data) != length:
+                raise ValueError(f"Expected array of length {length}, but got {len(data)}")
+            return data
+        return encode_byte_array
+
+    if isinstance(inner_type, str) and inner_type in PRIMITIVE_FORMATS:
+        pack = struct.Struct('<' + PRIMITIVE_FORMATS[inner_type] * length).pack
+
+        def encode_primitive_array(value):
+            if len(value) != length:
+                raise ValueError(f"Expected array of length {length}, but got {len(value)}")
+            return pack(*value)
+        return encode_primitive_array
+
+    encode_item = _compile_type(inner_type, types)
+
+    def encode_array(value):
+        if len(value) != length:
+            raise ValueError(f"Expected array of length {length}, but got {len(value)}")
+        return b''.join([encode_item(item) for item in value])
+    return encode_array
+
+def _compile_vec(inner_type, types):
+    if inner_type == 'u8':
+        return _encode_bytes
+
+    if isinstance(inner_type, str) and inner_type in PRIMITIVE_FORMATS:
+        item_format = PRIMITIVE_FORMATS[inner_type]
+
+        def encode_primitive_vec(value):
+            return struct.pack(f'<I{len(value)}{item_format}', len(value), *value)
+        return encode_primitive_vec
+
+    encode_item = _compile_type(inner_type, types)
+
+    def encode_vec(value):
+        return _U32.pack(len(value)) + b''.join([encode_item(item) for item in value])
+    return encode_vec
+
+def _compile_option(encode_inner, none_tag, some_tag):
+    def encode_option(value):
+        if value is None:
+            return none_tag
+        return some_tag + encode_inner(value)
+    return encode_option
+
+def _compile_defined(type_def, types):
+    if type_def['kind'] == 'struct':
+        return _compile_struct_fields(type_def.get('fields', []), types)
+    if type_def['kind'] == 'enum':
+        return _compile_enum(type_def['variants'], types)
+    raise ValueError(f"Unsupported defined type kind {type_def['kind']}.")
+
+def _compile_struct_fields(fields, types):
+    if fields and not isinstance(fields[0], dict):
+        # Tuple struct, values are given as a list
+        encoders = [_compile_type(field_type, types) for field_type in fields]
+        return lambda value: b''.join([encode(item) for encode, item in zip(encoders, value)])
+    return _compile_fields([(_to_snake(field['name']), field['type']) for field in fields], types)
+
+def _compile_enum(variants, types):
+    # Variant value is its name (unit variants) or {name: fields}
+    compiled_variants = {}
+    for index, variant in enumerate(variants):
+        fields = variant.get('fields')
+        encode_fields = _compile_struct_fields(fields, types) if fields else None
+        compiled_variants[variant['name']] = (bytes([index]), encode_fields)
+        compiled_variants[_to_snake(variant['name'])] = compiled_variants[variant['name']]
+
+    def encode_enum(value):
+        if isinstance(value, str):
+            variant_name, variant_value = value, None
+        else:
+            variant_name, variant_value = next(iter(value.items()))
+        if variant_name not in compiled_variants:
+            raise ValueError(f"Unknown enum variant {variant_name}.")
+        tag, encode_fields = compiled_variants[variant_name]
+        if encode_fields is None:
+            return tag
+        return tag + encode_fields(variant_value)
+    return encode_enum
+
+def _encode_string(value):
+    data = value.encode('utf-8')
+    return _U32.pack(len(data)) + data
+
+def _encode_bytes(value):
+    data = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+    return _U32.pack(len(data)) + data
+
+def _encode_pubkey(value):
+    if isinstance(value, str):
+        value = Pubkey.from_string(value)
+    return bytes(value)
@@ -26,8 +26,9 @@ import asyncio
 from anchorpy import Provider, Wallet
 from solana_module.solana_utils import create_client, choose_wallet, load_keypair_from_file, solana_base_path
 from solana_module.anchor_module.anchor_utils import fetch_required_accounts, fetch_signer_accounts, generate_pda, \
-    fetch_args, check_type, convert_type, fetch_cluster, anchor_base_path, load_idl, choose_program, choose_instruction, \
-    check_if_array , check_if_vec , input_token_account_manually ,check_if_bytes_type
+    fetch_cluster, load_idl, choose_program, choose_instruction, input_token_account_manually, \
+    fetch_idl_path
+from solana_module.anchor_module.arg_codec import fetch_instruction_args
 from solana_module.anchor_module.transaction_manager import build_transaction, measure_transaction_size, compute_transaction_fees, send_transaction
 
 # ====================================================
@@ -53,7 +54,7 @@ def choose_program_to_run():
 # ====================================================
 
 def _choose_instruction_to_run(program_name):
-    idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
+    idl_file_path = fetch_idl_path(program_name)
     idl = load_idl(idl_file_path)
 
     repeat = True
@@ -375,8 +376,8 @@ def _ask_yes_no(question):
 
 def _setup_args(instruction, idl, program_name, accounts, signer_account_keypairs, remaining_accounts=None):
     """Modified to accept remaining_accounts parameter"""
-    required_args = fetch_args(instruction, idl)
-    repeat = _manage_args(required_args, program_name, instruction, accounts, signer_account_keypairs, remaining_accounts)
+    compiled_args = fetch_instruction_args(program_name, instruction)
+    repeat = _manage_args(compiled_args, program_name, instruction, accounts, signer_account_keypairs, remaining_accounts)
     if repeat:
         return True
     else:
@@ -391,97 +392,21 @@ def _manage_args(args, program_name, instruction, accounts, signer_account_keypa
     while repeat:
         while i < len(args):
             arg = args[i]
-            print(f"Insert {arg['name']} value. ", end="", flush=True)
-
-        
-            vec_type = check_if_vec(arg)
-            array_type, array_length = check_if_array(arg)
-            if array_type is None and array_length is not None:
-                print(f"Unsupported type for arg {arg['name']}")
-                return False
-            elif array_type is not None and array_length is not None:
-                print(f"It is an array of {array_type} type and length {array_length}. Please insert array values separated by spaces (Insert 00 to go back to previous section).")
-                value = input()
-                if value == '00':
-                    if i == 0:
-                        return None, True
-                    else:
-                        i -= 1
-                else:
-                    array_values = value.split()
-
-                    # Check if array has correct length
-                    if len(array_values) != array_length:
-                        print(f"Error: Expected array of length {array_length}, but got {len(array_values)}")
-                        continue
-
-                    # Convert array elements basing on the type
-                    valid_values = []
-                    for j in range(len(array_values)):
-                        converted_value = convert_type(array_type, array_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j}. Please try again.")
-                            break
-                    else:
-                        final_args[arg['name']] = valid_values
-                        i += 1
-
-            #vectors handling
-            elif vec_type is not None:
-                print(f"It is a vector of {vec_type} type. Please insert array values separated by spaces (Insert 00 to go back to previous section).")
-                value = input()     
-                if value == '00':
-                    if i == 0:
-                        return None, True
-                    else:
-                         i -= 1
+            print(f"Insert {arg.name} value. ", end="", flush=True)
+            print(f"It is a {arg.description} (Insert 00 to go back to previous section).")
+            text_input = input()
+            if text_input == '00':
+                if i == 0:
+                    return True
                 else:
-                    vec_values = value.split()
-
-                    if len(vec_values) == 0:
-                        print("the shares_amounts must be more than 0")
-                    else:
-                        valid_values = []
-                        for j in range(len(vec_values)):
-                            converted_value = convert_type(vec_type, vec_values[j])
-                            if converted_value is not None:
-                                valid_values.append(converted_value)
-                            else:
-                                print(f"Invalid input at index {j}. Please try again.")
-                                break
-                        else:
-                            final_args[arg['name']] = valid_values
-                            i += 1
-
+                    i -= 1
             else:
-                # Single value management
-                type = check_type(arg['type'])
-                if type is None:
-                    print(f"Unsupported type for arg {arg['name']}")
-                    return False
-                print(f"It is a {type} (Insert 00 to go back to previous section).")
-                text_input = input()
-                if text_input == '00':
-                    if i == 0:
-                        return None, True
-                    else:
-                        i -= 1
-                else:
-                    if type == "bytes":              
-                            aux = text_input.encode('utf-8')
-                            final_args[arg['name']] = aux
-                            i += 1
-
-                    else:    
-                        converted_value = convert_type(type, text_input)
-                        if converted_value is not None:
-                            final_args[arg['name']] = converted_value
-                            i += 1
-                        else:
-                            print("Invalid input. Please try again.")
-                            continue
+                # Conversion and range checks are done by the compiled codec of the instruction
+                try:
+                    final_args[arg.name] = arg.convert(text_input)
+                    i += 1
+                except ValueError as e:
+                    print(f"Invalid input: {e} Please try again.")
 
         repeat = _manage_provider(program_name, instruction, accounts, final_args, signer_account_keypairs, remaining_accounts)
         if i == 0:
@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+# Values are recorded in microseconds keeping their SUB_BUCKET_BITS most significant bits (as in HdrHistogram):
+# the top bit is always set, so there are 2^(SUB_BUCKET_BITS - 1) sub-buckets for each power of two and the error
+# of the recorded values is below 1 / 2^(SUB_BUCKET_BITS - 1), 0.8%, whatever their magnitude
+SUB_BUCKET_BITS = 8
+
+# Percentiles of the latency summaries
+SUMMARY_PERCENTILES = {'p50': 50, 'p90': 90, 'p99': 99, 'p99.9': 99.9}
+
+
+class LatencyHistogram:
+    __slots__ = ['counts', 'count', 'total', 'min', 'max']
+
+    def __init__(self):
+        self.counts = dict()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, latency_ms):
+        value = max(0, round(latency_ms * 1000))
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percentile):
+        # Highest value of the bucket of the percentile, in milliseconds
+        if self.count == 0:
+            return None
+        rank = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_value(index), self.max) / 1000
+        return self.max / 1000
+
+    def summary(self):
+        if self.count == 0:
+            return {'count': 0}
+        summary = {'count': self.count, 'mean': round(self.total / self.count / 1000, 3), 'min': self.min / 1000}
+        for name, percentile in SUMMARY_PERCENTILES.items():
+            summary[name] = self.percentile(percentile)
+        summary['max'] = self.max / 1000
+        return summary
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _bucket_index(value):
+    # Values below 2^SUB_BUCKET_BITS are exact, the others keep their SUB_BUCKET_BITS most significant bits
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return (shift << SUB_BUCKET_BITS) | (value >> shift)
+
+def _bucket_value(index):
+    shift = index >> SUB_BUCKET_BITS
+    sub_bucket = index & ((1 << SUB_BUCKET_BITS) - 1)
+    return ((sub_bucket + 1) << shift) - 1 if shift else sub_bucket
@@ -0,0 +1,241 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import copy
+import itertools
+import json
+import os
+import time
+from collections import namedtuple
+from solana_module.solana_utils import create_client, solana_base_path
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.trace_planner import plan_json_trace
+from solana_module.anchor_module.transaction_manager import submit_transaction, wait_for_confirmation
+from solana_module.anchor_module.transaction_packer import DEFAULT_INSTRUCTION_COMPUTE_UNITS, \
+    MAX_TRANSACTION_COMPUTE_UNITS
+from solana_module.anchor_module.compute_budget_tuner import build_tuned_transaction
+from solana_module.anchor_module.latency_histogram import LatencyHistogram
+from solana_module.anchor_module.wallet_pool import fetch_pool_wallet_names, is_wallet_name
+
+
+# Transactions in flight of each level of the concurrency sweep
+DEFAULT_CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+
+# Seconds each concurrency level runs
+DEFAULT_DURATION = 30
+
+# Seconds after which a sent transaction not confirmed yet is dropped
+DROP_TIMEOUT = 30
+
+# Replicas whose setup steps are sent at the same time
+SETUP_CONCURRENCY = 8
+
+# Setup steps (e.g. the initialization of the PDAs) and load step of a replica of the template
+LoadReplica = namedtuple('LoadReplica', ['replica_id', 'setup', 'step'])
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def build_replicas(trace_name, step_id, count, setup_ids=()):
+    # The template step (and its setup steps) of a JSON trace, planned once for each replica with its own
+    # actor wallets and PDAs: the string values used as PDA seeds get the replica number, so that replicas don't
+    # share accounts, and actors are bound to the wallets of the pool in turn
+    trace, executions = _load_template(trace_name)
+    missing_ids = [str(sequence_id) for sequence_id in [*setup_ids, step_id] if str(sequence_id) not in executions]
+    if missing_ids:
+        raise ValueError(f"Execution trace {trace_name} has no step {', '.join(missing_ids)}.")
+
+    wallets = fetch_wallet_pool()
+    replicas = []
+    errors = []
+    for replica_id in range(count):
+        steps, replica_errors = _plan_replica(trace, executions, [*setup_ids, step_id], replica_id, wallets)
+        if replica_errors:
+            errors += [f"Replica {replica_id}: {error}" for error in replica_errors]
+            continue
+        replicas.append(LoadReplica(replica_id, steps[:-1], steps[-1]))
+    return replicas, errors
+
+def replicate_trace(trace_name, replica_id):
+    # Plan of the whole JSON trace for a replica, with the actor wallets and PDAs of build_replicas
+    trace, executions = _load_template(trace_name)
+    return _plan_replica(trace, executions, list(executions), replica_id, fetch_wallet_pool())
+
+def fetch_wallet_pool():
+    # The derived wallets of the wallet pool if there is one, otherwise the wallet files
+    pool_wallet_names = fetch_pool_wallet_names()
+    if pool_wallet_names:
+        return pool_wallet_names
+    wallets_path = f"{solana_base_path}/solana_wallets"
+    return sorted(name for name in os.listdir(wallets_path) if name.endswith('.json'))
+
+async def run_load(replicas, concurrency_levels=None, duration=DEFAULT_DURATION, cluster='Localnet'):
+    # Closed loop: at each level the given number of transactions is kept in flight, each one sent as soon as
+    # the previous one lands or is dropped, and each one using a replica not in flight
+    client = create_client(cluster)
+    try:
+        replicas = await run_setup(client, replicas)
+        if not replicas:
+            print("No replica is ready to be loaded.")
+            return {'replicas': 0, 'levels': []}
+
+        levels = []
+        for concurrency in concurrency_levels or DEFAULT_CONCURRENCY_LEVELS:
+            if concurrency > len(replicas):
+                print(f"Only {len(replicas)} replicas for {concurrency} transactions in flight, "
+                      f"the level is limited by the replicas.")
+            print(f"Running {concurrency} transactions in flight for {duration} seconds...")
+            levels.append(await _run_level(client, replicas, concurrency, duration))
+    finally:
+        await client.close()
+    return {'replicas': len(replicas), 'levels': levels}
+
+async def run_setup(client, replicas):
+    # Setup steps of each replica are sent in order, replicas without errors are returned
+    semaphore = asyncio.Semaphore(SETUP_CONCURRENCY)
+
+    async def setup(replica):
+        async with semaphore:
+            for step in replica.setup:
+                outcome, _ = await send_load_transaction(client, step, 0)
+                if outcome != 'landed':
+                    print(f"Replica {replica.replica_id}: setup step {step.step_id} {outcome}, replica discarded.")
+                    return None
+            return replica
+
+    if not any(replica.setup for replica in replicas):
+        return list(replicas)
+    print(f"Sending the setup steps of {len(replicas)} replicas...")
+    return [replica for replica in await asyncio.gather(*(setup(replica) for replica in replicas))
+            if replica is not None]
+
+async def send_load_transaction(client, step, sequence):
+    # Returns the outcome (landed, failed or dropped) and the latency in ms of the landed transactions.
+    # Replicas send the same instruction many times: the compute unit limit changes with the sequence
+    # number, so that no transaction is a duplicate of a previous one with the same blockhash
+    compute_unit_limit = DEFAULT_INSTRUCTION_COMPUTE_UNITS + \
+        sequence % (MAX_TRANSACTION_COMPUTE_UNITS - DEFAULT_INSTRUCTION_COMPUTE_UNITS)
+    try:
+        transaction = await build_tuned_transaction(step, client, compute_unit_limit)
+        start_time = time.perf_counter()
+        signature = await submit_transaction(client, transaction, skip_preflight=True)
+        status = await wait_for_confirmation(client, signature, DROP_TIMEOUT)
+    except Exception as e:
+        print(f"Step {step.step_id}: {type(e).__name__}: {e}")
+        return 'dropped', None
+    if status is None:
+        return 'dropped', None
+    if status.err is not None:
+        return 'failed', None
+    return 'landed', (time.perf_counter() - start_time) * 1000
+
+def format_load_report(report):
+    lines = [f"{report['replicas']} replicas",
+             f"{'in flight':>9}  {'TPS':>8}  {'sent':>6}  {'landed':>6}  {'failed':>6}  {'dropped':>7}  "
+             f"{'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'p99.9 ms':>8}  {'max ms':>8}"]
+    for level in report['levels']:
+        latency = level['latency_ms']
+        percentiles = "  ".join(f"{_format_latency(latency.get(name)):>8}"
+                                for name in ('p50', 'p90', 'p99', 'p99.9', 'max'))
+        lines.append(f"{level['concurrency']:>9}  {level['tps']:>8}  {level['sent']:>6}  {level['landed']:>6}  "
+                     f"{level['failed']:>6}  {level['dropped']:>7}  {percentiles}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _load_template(trace_name):
+    trace_path = f"{anchor_base_path}/execution_traces/{trace_name}"
+    if not trace_name.lower().endswith('.json'):
+        raise ValueError(f"Templates must be JSON traces with actors, {trace_name} is not.")
+    if not os.path.exists(trace_path):
+        raise FileNotFoundError(f"Execution trace {trace_name} not found.")
+    with open(trace_path, 'r', encoding='utf-8') as file:
+        trace = json.load(file)
+
+    executions = {str(execution.get("sequence_id", index)): execution
+                  for index, execution in enumerate(trace.get("trace_execution", []), start=1)}
+    return trace, executions
+
+def _plan_replica(trace, executions, sequence_ids, replica_id, wallets):
+    actors = trace.get("trace_actors", [])
+    if actors and not wallets:
+        raise FileNotFoundError("No wallet in the solana_wallets folder or in the wallet pool to bind the actors to.")
+    bound_actors = {actor: wallets[(replica_id * len(actors) + index) % len(wallets)]
+                    for index, actor in enumerate(actors)}
+    replica_trace = {"trace_title": trace.get("trace_title"), "trace_execution": [
+        _replicate_execution(executions[str(sequence_id)], replica_id, bound_actors) for sequence_id in sequence_ids]}
+    return plan_json_trace(replica_trace, bound_actors)
+
+def _replicate_execution(execution, replica_id, actors):
+    # Literal seeds (e.g. the constant prefixes of the program) and actors are left as they are
+    execution = copy.deepcopy(execution)
+    sections = [execution.get(section, {}) for section in ("solana", "args")]
+    seed_names = {param for section in sections for value in section.values()
+                  if isinstance(value, dict) and value.get("opt") == "s" for param in value.get("param", [])}
+    for section in sections:
+        for name in seed_names & section.keys():
+            value = section[name]
+            if isinstance(value, str) and value not in actors and not is_wallet_name(value):
+                section[name] = f"{value}_{replica_id}"
+    return execution
+
+async def _run_level(client, replicas, concurrency, duration):
+    pool = asyncio.Queue()
+    for replica in replicas:
+        pool.put_nowait(replica)
+    histogram = LatencyHistogram()
+    counts = {'sent': 0, 'landed': 0, 'failed': 0, 'dropped': 0}
+    sequence = itertools.count(1)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            replica = await pool.get()
+            if time.perf_counter() >= deadline:
+                pool.put_nowait(replica)
+                break
+            try:
+                counts['sent'] += 1
+                outcome, latency_ms = await send_load_transaction(client, replica.step, next(sequence))
+            finally:
+                pool.put_nowait(replica)
+            counts[outcome] += 1
+            if latency_ms is not None:
+                histogram.record(latency_ms)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    return {'concurrency': concurrency, 'elapsed_s': round(elapsed, 2), **counts,
+            'tps': round(counts['landed'] / elapsed, 2), 'latency_ms': histogram.summary()}
+
+def _format_latency(value):
+    return '-' if value is None else f"{value:.1f}"
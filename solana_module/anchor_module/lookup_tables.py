@@ -0,0 +1,241 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import struct
+from solders.address_lookup_table_account import AddressLookupTable, AddressLookupTableAccount, \
+    derive_lookup_table_address, ID as LOOKUP_TABLE_PROGRAM_ID, LOOKUP_TABLE_MAX_ADDRESSES
+from solders.instruction import AccountMeta, Instruction
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYS_PROGRAM_ID
+from solana.rpc.commitment import Confirmed, Finalized
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.program_registry import fetch_registered_program, update_registered_program
+from solana_module.anchor_module.trace_planner import PlannedStep
+from solana_module.anchor_module.transaction_manager import build_packed_transaction, fetch_fee_payer
+from solana_module.anchor_module.size_predictor import predict_step_size, predict_instructions_size
+
+
+# Addresses added by each extend transaction, to stay within the packet limit
+MAX_ADDRESSES_PER_EXTENSION = 30
+
+# Deactivation slot of tables which are still active
+ACTIVE_TABLE_SLOT = 2**64 - 1
+
+# Instructions of the address lookup table program (bincode enum tags)
+_CREATE_LOOKUP_TABLE = 0
+_EXTEND_LOOKUP_TABLE = 2
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def collect_lookup_addresses(plan):
+    # Accounts used by at least two steps of the same program and cluster. Signers, fee payers and
+    # invoked programs can't be loaded from a table, programs passed as accounts can
+    uses = dict()
+    for step in plan:
+        if not isinstance(step, PlannedStep):
+            continue
+        payer = fetch_fee_payer(step.instruction, step.signers, step.provider).pubkey()
+        step_uses = uses.setdefault((step.program_name, step.cluster), dict())
+        # Each account is counted once per step, in order of appearance
+        eligible = {meta.pubkey for meta in step.instruction.accounts if not meta.is_signer}
+        eligible -= {payer, step.instruction.program_id}
+        for meta in step.instruction.accounts:
+            if meta.pubkey in eligible:
+                eligible.discard(meta.pubkey)
+                step_uses[meta.pubkey] = step_uses.get(meta.pubkey, 0) + 1
+
+    return {key: [address for address, count in step_uses.items() if count > 1][:LOOKUP_TABLE_MAX_ADDRESSES]
+            for key, step_uses in uses.items()}
+
+def fetch_cached_lookup_table(program_name, cluster):
+    # Lookup table created for the program on the cluster, recorded in the program registry
+    return fetch_registered_program(program_name).get('lookup_tables', {}).get(cluster)
+
+async def load_lookup_tables(client, program_name, cluster):
+    # Active cached table of the program, as needed to compile v0 messages (empty list if there is none)
+    cached_table = fetch_cached_lookup_table(program_name, cluster)
+    if cached_table is None:
+        return []
+    table = await _fetch_lookup_table(client, Pubkey.from_string(cached_table['address']))
+    if table is None or table.meta.deactivation_slot != ACTIVE_TABLE_SLOT:
+        return []
+    return [AddressLookupTableAccount(Pubkey.from_string(cached_table['address']), list(table.addresses))]
+
+async def prepare_lookup_tables(plan, create=False):
+    # Lookup table of each program and cluster of the plan: the cached one, extended with the missing
+    # recurring accounts when creating, a new one when creating, or the proposed addresses otherwise
+    first_steps = dict()
+    for step in plan:
+        if isinstance(step, PlannedStep):
+            first_steps.setdefault((step.program_name, step.cluster), step)
+
+    tables = dict()
+    clients = dict()
+    try:
+        for (program_name, cluster), addresses in collect_lookup_addresses(plan).items():
+            if not addresses:
+                continue
+            if cluster not in clients:
+                clients[cluster] = create_client(cluster)
+            first_step = first_steps[(program_name, cluster)]
+            if create and first_step.is_deployed:
+                tables[(program_name, cluster)] = await _create_or_extend_lookup_table(
+                    clients[cluster], program_name, cluster, addresses, first_step.provider)
+                continue
+
+            cached_tables = await load_lookup_tables(clients[cluster], program_name, cluster)
+            if cached_tables:
+                tables[(program_name, cluster)] = {'status': 'cached', 'table': cached_tables[0]}
+            else:
+                tables[(program_name, cluster)] = {'status': 'proposed',
+                                                   'table': AddressLookupTableAccount(Pubkey.default(), addresses)}
+    finally:
+        for client in clients.values():
+            await client.close()
+    return tables
+
+def compare_lookup_sizes(plan, tables):
+    # Size of each step without and with the lookup table of its program
+    steps = []
+    for step in plan:
+        if not isinstance(step, PlannedStep):
+            continue
+        size = predict_step_size(step)
+        prepared_table = tables.get((step.program_name, step.cluster))
+        size_with_tables = size
+        if prepared_table is not None:
+            payer = fetch_fee_payer(step.instruction, step.signers, step.provider)
+            size_with_tables = predict_instructions_size([step.instruction], payer.pubkey(), True,
+                                                         [prepared_table['table']])
+        steps.append({'step_id': step.step_id, 'program': step.program_name, 'instruction': step.instruction_name,
+                      'size_bytes': size, 'size_with_lookup_tables': size_with_tables,
+                      'saved_bytes': size - size_with_tables})
+
+    lookup_tables = [{'program': program_name, 'cluster': cluster, 'status': prepared_table['status'],
+                      'address': str(prepared_table['table'].key) if prepared_table['status'] != 'proposed' else None,
+                      'addresses': [str(address) for address in prepared_table['table'].addresses]}
+                     for (program_name, cluster), prepared_table in tables.items()]
+    return {'lookup_tables': lookup_tables, 'steps': steps,
+            'size_bytes': sum(step['size_bytes'] for step in steps),
+            'size_with_lookup_tables': sum(step['size_with_lookup_tables'] for step in steps)}
+
+def format_lookup_report(report):
+    lines = []
+    for lookup_table in report['lookup_tables']:
+        address = lookup_table['address'] or 'not created'
+        lines.append(f"Lookup table of {lookup_table['program']} on {lookup_table['cluster']} ({lookup_table['status']}, "
+                     f"{address}): {len(lookup_table['addresses'])} addresses")
+    for step in report['steps']:
+        lines.append(f"Step {step['step_id']} {step['program']}.{step['instruction']}: {step['size_bytes']} -> "
+                     f"{step['size_with_lookup_tables']} bytes")
+    lines.append(f"Total: {report['size_bytes']} -> {report['size_with_lookup_tables']} bytes")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _create_or_extend_lookup_table(client, program_name, cluster, addresses, authority):
+    # The cached table is reused when it's still active and owned by the same authority
+    status = 'cached'
+    table_address = None
+    existing_addresses = []
+    cached_table = fetch_cached_lookup_table(program_name, cluster)
+    if cached_table is not None and cached_table['authority'] == str(authority.pubkey()):
+        table = await _fetch_lookup_table(client, Pubkey.from_string(cached_table['address']))
+        if table is not None and table.meta.deactivation_slot == ACTIVE_TABLE_SLOT:
+            table_address = Pubkey.from_string(cached_table['address'])
+            existing_addresses = list(table.addresses)
+
+    if table_address is None:
+        recent_slot = (await client.get_slot(Finalized)).value
+        ix, table_address = _create_lookup_table_instruction(authority.pubkey(), authority.pubkey(), recent_slot)
+        await _send_and_confirm(client, [ix], authority)
+        status = 'created'
+        print(f"Lookup table {table_address} created for {program_name} on {cluster}.")
+
+        lookup_tables = fetch_registered_program(program_name).get('lookup_tables', {})
+        lookup_tables[cluster] = {'address': str(table_address), 'authority': str(authority.pubkey())}
+        update_registered_program(program_name, lookup_tables=lookup_tables)
+
+    existing = set(existing_addresses)
+    missing_addresses = [address for address in addresses if address not in existing]
+    missing_addresses = missing_addresses[:LOOKUP_TABLE_MAX_ADDRESSES - len(existing_addresses)]
+    for start in range(0, len(missing_addresses), MAX_ADDRESSES_PER_EXTENSION):
+        chunk = missing_addresses[start:start + MAX_ADDRESSES_PER_EXTENSION]
+        ix = _extend_lookup_table_instruction(table_address, authority.pubkey(), authority.pubkey(), chunk)
+        await _send_and_confirm(client, [ix], authority)
+    if missing_addresses:
+        if status == 'cached':
+            status = 'extended'
+        print(f"Lookup table {table_address} extended with {len(missing_addresses)} addresses, waiting for activation...")
+        await _wait_for_activation(client, table_address)
+
+    return {'status': status,
+            'table': AddressLookupTableAccount(table_address, existing_addresses + missing_addresses)}
+
+async def _fetch_lookup_table(client, table_address):
+    response = await client.get_account_info(table_address, commitment=Confirmed)
+    if response.value is None:
+        return None
+    return AddressLookupTable.deserialize(bytes(response.value.data))
+
+async def _wait_for_activation(client, table_address):
+    # Addresses can be used from the slot after the one in which they were added
+    table = await _fetch_lookup_table(client, table_address)
+    while (await client.get_slot(Confirmed)).value <= table.meta.last_extended_slot:
+        await asyncio.sleep(0.4)
+
+async def _send_and_confirm(client, ixs, payer):
+    transaction = await build_packed_transaction(ixs, [payer], payer, False, client)
+    response = await client.send_raw_transaction(transaction.serialize())
+    await client.confirm_transaction(response.value, commitment=Confirmed)
+
+def _create_lookup_table_instruction(authority, payer, recent_slot):
+    table_address, bump_seed = derive_lookup_table_address(authority, recent_slot)
+    data = struct.pack('<IQB', _CREATE_LOOKUP_TABLE, recent_slot, bump_seed)
+    accounts = [
+        AccountMeta(table_address, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(LOOKUP_TABLE_PROGRAM_ID, data, accounts), table_address
+
+def _extend_lookup_table_instruction(table_address, authority, payer, addresses):
+    # New addresses are a bincode vector: u64 length followed by the keys
+    data = struct.pack('<IQ', _EXTEND_LOOKUP_TABLE, len(addresses)) + b''.join(bytes(address) for address in addresses)
+    accounts = [
+        AccountMeta(table_address, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(LOOKUP_TABLE_PROGRAM_ID, data, accounts)
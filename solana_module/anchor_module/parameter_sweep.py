@@ -0,0 +1,162 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import itertools
+from solders.pubkey import Pubkey
+from solana_module.anchor_module.arg_codec import fetch_instruction_args, INTEGER_RANGES
+from solana_module.anchor_module.trace_planner import plan_trace_file, PlannedStep
+from solana_module.anchor_module.transaction_manager import fetch_instruction_encoder, build_offline_transaction, \
+    estimate_base_fee
+from solana_module.anchor_module.size_predictor import predict_transaction_size, PACKET_LIMIT
+
+
+# Values used for the items of swept vectors when the trace step gives none
+DEFAULT_VALUES = {'bool': False, 'string': '', 'bytes': b'', 'pubkey': Pubkey.default(), 'publicKey': Pubkey.default(),
+                  'f32': 0.0, 'f64': 0.0}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def sweep_trace_step(trace_name, step_id, ranges):
+    # Ranges is a dict {arg_name: range spec}, every combination of the ranges is evaluated
+    step = _plan_trace_step(trace_name, step_id)
+    compiled_args = {compiled_arg.name: compiled_arg for compiled_arg in
+                     fetch_instruction_args(step.program_name, step.instruction_name)}
+    swept_values = dict()
+    for arg_name, spec in ranges.items():
+        if arg_name not in compiled_args:
+            raise ValueError(f"Instruction {step.instruction_name} has no arg {arg_name}, "
+                             f"expected one of {', '.join(compiled_args)}.")
+        swept_values[arg_name] = parse_range(spec)
+
+    # Accounts don't change between points, so the fee is the same for all of them and
+    # every point only changes the length of the instruction data
+    encoder = fetch_instruction_encoder(step.program_name, step.instruction_name)
+    signer_pubkeys = [keypair.pubkey() for keypair in step.signers.values()]
+    fee = estimate_base_fee(build_offline_transaction(step.instruction, signer_pubkeys, step.provider.pubkey()))
+
+    points = []
+    for magnitudes in itertools.product(*swept_values.values()):
+        point = dict(zip(swept_values, magnitudes))
+        args = dict(step.args)
+        for arg_name, magnitude in point.items():
+            compiled_arg = compiled_args[arg_name]
+            args[arg_name] = _sample_value(compiled_arg.type, magnitude, step.args.get(arg_name), arg_name)
+        data_length = len(encoder.encode_data(args))
+        size = predict_transaction_size(step.instruction, signer_pubkeys, step.provider.pubkey(), data_length)
+        points.append({'point': point, 'data_bytes': data_length, 'size_bytes': size, 'fee_lamports': fee,
+                       'exceeds_packet_limit': size > PACKET_LIMIT})
+
+    first_crossing = next((point['point'] for point in points if point['exceeds_packet_limit']), None)
+    return {'trace': trace_name, 'step_id': step.step_id, 'program': step.program_name,
+            'instruction': step.instruction_name, 'packet_limit': PACKET_LIMIT, 'points': points,
+            'first_crossing': first_crossing}
+
+def parse_range(spec):
+    # "start:stop[:step]" (stop included) or a comma separated list of values
+    if isinstance(spec, (list, tuple)):
+        return [int(value) for value in spec]
+    spec = str(spec).strip()
+    if ':' in spec:
+        parts = [int(part) for part in spec.split(':')]
+        if len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] <= 0):
+            raise ValueError(f"Invalid range {spec}, expected start:stop[:step] with a positive step.")
+        return list(range(parts[0], parts[1] + 1, parts[2] if len(parts) == 3 else 1))
+    values = [int(value) for value in spec.split(',') if value.strip()]
+    if not values:
+        raise ValueError("Empty range, expected start:stop[:step] or a comma separated list of values.")
+    return values
+
+def format_sweep_report(sweep):
+    # Text table of the sweep, the points above the packet limit are marked
+    arg_names = list(sweep['points'][0]['point']) if sweep['points'] else []
+    columns = arg_names + ['data_bytes', 'size_bytes', 'fee_lamports', '']
+    cells = [[str(point['point'][name]) for name in arg_names]
+             + [str(point['data_bytes']), str(point['size_bytes']), str(point['fee_lamports']),
+                'over limit' if point['exceeds_packet_limit'] else '']
+             for point in sweep['points']]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) if cells else len(column)
+              for i, column in enumerate(columns)]
+
+    lines = [f"{sweep['program']}.{sweep['instruction']} (step {sweep['step_id']} of {sweep['trace']}), "
+             f"packet limit {sweep['packet_limit']} bytes"]
+    lines.append("  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+    lines.append("  ".join('-' * width for width in widths).rstrip())
+    for line in cells:
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+    if sweep['first_crossing'] is None:
+        lines.append("The packet limit is never crossed.")
+    else:
+        crossing = ', '.join(f"{name}={value}" for name, value in sweep['first_crossing'].items())
+        lines.append(f"The packet limit is first crossed at {crossing}.")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _plan_trace_step(trace_name, step_id):
+    plan, errors = plan_trace_file(trace_name)
+    if errors:
+        raise ValueError(f"Execution trace {trace_name} is not valid: {' '.join(errors)}")
+
+    step = next((step for step in plan if isinstance(step, PlannedStep) and str(step.step_id) == str(step_id)), None)
+    if step is None:
+        raise ValueError(f"Step {step_id} not found in execution trace {trace_name}.")
+    return step
+
+def _sample_value(idl_type, magnitude, trace_value, arg_name):
+    # Magnitude is the length of strings, bytes and vectors, or the value of integers
+    if isinstance(idl_type, str):
+        if idl_type == 'string':
+            return 'a' * magnitude
+        if idl_type == 'bytes':
+            return bytes(magnitude)
+        if idl_type in INTEGER_RANGES:
+            low, high = INTEGER_RANGES[idl_type]
+            if not low <= magnitude <= high:
+                raise ValueError(f"Value {magnitude} of {arg_name} is out of range for {idl_type}.")
+            return magnitude
+    elif 'vec' in idl_type:
+        if idl_type['vec'] == 'u8':
+            return bytes(magnitude)
+        item = trace_value[0] if trace_value else _default_value(idl_type['vec'], arg_name)
+        return [item] * magnitude
+    elif 'option' in idl_type or 'coption' in idl_type:
+        if magnitude == 0:
+            return None
+        return _sample_value(idl_type.get('option', idl_type.get('coption')), magnitude, trace_value, arg_name)
+    raise ValueError(f"Arg {arg_name} can't be swept, only strings, bytes, vectors, integers and their options can.")
+
+def _default_value(idl_type, arg_name):
+    if isinstance(idl_type, str):
+        if idl_type in INTEGER_RANGES:
+            return 0
+        if idl_type in DEFAULT_VALUES:
+            return DEFAULT_VALUES[idl_type]
+    raise ValueError(f"Items of {arg_name} can't be generated, give at least one item in the trace.")
@@ -0,0 +1,260 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from solders.instruction import Instruction, AccountMeta
+from solders.pubkey import Pubkey
+from solana_module.solana_utils import load_keypair_from_file, solana_base_path
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.program_registry import fetch_registered_programs, fetch_registered_program
+from solana_module.anchor_module.trace_planner import PlannedStep, PlannedWait
+from solana_module.anchor_module.wallet_pool import fetch_wallet_pool, fetch_pool_keypairs
+
+
+# Binary plan layout (little endian):
+#   header: magic, version, number of steps
+#   wait step: tag 0, slots (u64)
+#   transaction step: tag 1, flags (u8), step ID, program name, instruction name, cluster (u16 length + UTF-8),
+#                     program ID (32 bytes), accounts (u16 count, each 32 bytes pubkey + u8 flags),
+#                     data (u32 length + bytes), signers (u16 count, each account name + 32 bytes pubkey),
+#                     provider pubkey (32 bytes)
+# Keypairs are never written, signers are stored as public keys and resolved through the wallets folder
+PLAN_MAGIC = b'TPLN'
+PLAN_VERSION = 1
+WAIT_TAG = 0
+STEP_TAG = 1
+
+# Plan files larger than this are memory-mapped instead of being read in memory
+MMAP_THRESHOLD = 1024 * 1024
+
+plan_cache_path = f"{anchor_base_path}/.plan_cache"
+
+_HEADER = struct.Struct('<4sHI')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+
+# Flags of transaction steps and account metas
+_IS_DEPLOYED = 1
+_SEND_TRANSACTION = 2
+_IS_SIGNER = 1
+_IS_WRITABLE = 2
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def compute_plan_key(trace_path):
+    # A plan depends on the trace, on the IDL, ID and cluster of every program and on the available wallets
+    digest = hashlib.sha256()
+    with open(trace_path, 'rb') as file:
+        digest.update(file.read())
+
+    for program_name in fetch_registered_programs():
+        program = fetch_registered_program(program_name)
+        for field in (program_name, program.get('source_idl_hash'), program.get('program_id'), program.get('cluster')):
+            digest.update(f"{field}\0".encode())
+
+    wallets_path = f"{solana_base_path}/solana_wallets"
+    for wallet_name in sorted(os.listdir(wallets_path)):
+        with open(os.path.join(wallets_path, wallet_name), 'rb') as file:
+            digest.update(wallet_name.encode() + b'\0' + hashlib.sha256(file.read()).digest())
+
+    # Pool wallets are derived from the seed of the pool
+    pool = fetch_wallet_pool()
+    if pool is not None:
+        digest.update(f"{pool['seed']}\0{pool['size']}\0".encode())
+
+    return digest.hexdigest()
+
+def load_cached_plan(plan_key):
+    # Returns the plan saved with this key, None if there isn't one or it can't be used
+    file_path = _get_plan_path(plan_key)
+    if not os.path.exists(file_path):
+        return None
+    try:
+        return load_plan(file_path)
+    except (ValueError, struct.error) as e:
+        print(f"Cached plan {file_path} is not valid, the trace will be planned again ({e}).")
+        return None
+
+def save_cached_plan(plan_key, plan):
+    os.makedirs(plan_cache_path, exist_ok=True)
+    file_path = _get_plan_path(plan_key)
+
+    # Write a temporary file and rename it, so that a partial plan is never loaded
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=plan_cache_path, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(serialize_plan(plan))
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return file_path
+
+def serialize_plan(plan):
+    chunks = [_HEADER.pack(PLAN_MAGIC, PLAN_VERSION, len(plan))]
+    for step in plan:
+        if isinstance(step, PlannedWait):
+            chunks.append(_U8.pack(WAIT_TAG) + _U64.pack(step.slots))
+            continue
+
+        flags = (_IS_DEPLOYED if step.is_deployed else 0) | (_SEND_TRANSACTION if step.send_transaction else 0)
+        chunks.append(_U8.pack(STEP_TAG) + _U8.pack(flags))
+        for text in (str(step.step_id), step.program_name, step.instruction_name, step.cluster):
+            chunks.append(_pack_string(text))
+
+        instruction = step.instruction
+        chunks.append(bytes(instruction.program_id))
+        chunks.append(_U16.pack(len(instruction.accounts)))
+        for meta in instruction.accounts:
+            meta_flags = (_IS_SIGNER if meta.is_signer else 0) | (_IS_WRITABLE if meta.is_writable else 0)
+            chunks.append(bytes(meta.pubkey) + _U8.pack(meta_flags))
+        chunks.append(_U32.pack(len(instruction.data)) + bytes(instruction.data))
+
+        chunks.append(_U16.pack(len(step.signers)))
+        for account, keypair in step.signers.items():
+            chunks.append(_pack_string(account) + bytes(keypair.pubkey()))
+        chunks.append(bytes(step.provider.pubkey()))
+    return b''.join(chunks)
+
+def load_plan(file_path):
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return deserialize_plan(file.read())
+
+        # Large plans are parsed straight from the mapped file
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            buffer = memoryview(mapped_file)
+            try:
+                return deserialize_plan(buffer)
+            finally:
+                buffer.release()
+
+def deserialize_plan(buffer):
+    magic, version, n_steps = _HEADER.unpack_from(buffer, 0)
+    if magic != PLAN_MAGIC or version != PLAN_VERSION:
+        raise ValueError("unknown plan format")
+    offset = _HEADER.size
+
+    keypairs = _WalletIndex()
+    plan = []
+    for _ in range(n_steps):
+        tag = buffer[offset]
+        offset += 1
+        if tag == WAIT_TAG:
+            plan.append(PlannedWait(_U64.unpack_from(buffer, offset)[0]))
+            offset += _U64.size
+            continue
+        elif tag != STEP_TAG:
+            raise ValueError(f"unknown step tag {tag}")
+
+        flags = buffer[offset]
+        offset += 1
+        texts = []
+        for _ in range(4):
+            text, offset = _unpack_string(buffer, offset)
+            texts.append(text)
+        step_id, program_name, instruction_name, cluster = texts
+
+        program_id = Pubkey.from_bytes(bytes(buffer[offset:offset + 32]))
+        offset += 32
+        n_accounts = _U16.unpack_from(buffer, offset)[0]
+        offset += _U16.size
+        metas = []
+        for _ in range(n_accounts):
+            meta_flags = buffer[offset + 32]
+            metas.append(AccountMeta(Pubkey.from_bytes(bytes(buffer[offset:offset + 32])),
+                                     is_signer=bool(meta_flags & _IS_SIGNER), is_writable=bool(meta_flags & _IS_WRITABLE)))
+            offset += 33
+        data_length = _U32.unpack_from(buffer, offset)[0]
+        offset += _U32.size
+        data = bytes(buffer[offset:offset + data_length])
+        offset += data_length
+
+        n_signers = _U16.unpack_from(buffer, offset)[0]
+        offset += _U16.size
+        signers = dict()
+        for _ in range(n_signers):
+            account, offset = _unpack_string(buffer, offset)
+            signers[account] = keypairs.fetch(bytes(buffer[offset:offset + 32]))
+            offset += 32
+        provider = keypairs.fetch(bytes(buffer[offset:offset + 32]))
+        offset += 32
+
+        plan.append(PlannedStep(step_id, program_name, instruction_name, Instruction(program_id, data, metas), signers,
+                                provider, cluster, bool(flags & _IS_DEPLOYED), bool(flags & _SEND_TRANSACTION)))
+    return plan
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+class _WalletIndex:
+    # Keypairs of the wallets folder by public key, loaded only if a plan has signers
+    __slots__ = ('keypairs',)
+
+    def __init__(self):
+        self.keypairs = None
+
+    def fetch(self, pubkey_bytes):
+        if self.keypairs is None:
+            self.keypairs = dict()
+            wallets_path = f"{solana_base_path}/solana_wallets"
+            for wallet_name in os.listdir(wallets_path):
+                if wallet_name.endswith('.json'):
+                    try:
+                        keypair = load_keypair_from_file(os.path.join(wallets_path, wallet_name))
+                    except (ValueError, TypeError):
+                        continue
+                    self.keypairs[bytes(keypair.pubkey())] = keypair
+            for keypair in fetch_pool_keypairs():
+                self.keypairs[bytes(keypair.pubkey())] = keypair
+        keypair = self.keypairs.get(pubkey_bytes)
+        if keypair is None:
+            raise ValueError(f"wallet of {Pubkey.from_bytes(pubkey_bytes)} not found")
+        return keypair
+
+def _get_plan_path(plan_key):
+    return f"{plan_cache_path}/{plan_key}.plan"
+
+def _pack_string(text):
+    encoded = text.encode('utf-8')
+    return _U16.pack(len(encoded)) + encoded
+
+def _unpack_string(buffer, offset):
+    length = _U16.unpack_from(buffer, offset)[0]
+    offset += _U16.size
+    return bytes(buffer[offset:offset + length]).decode('utf-8'), offset + length
@@ -0,0 +1,191 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import statistics
+import time
+from solana.rpc.commitment import Processed
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.trace_planner import PlannedStep, PlannedWait
+from solana_module.anchor_module.transaction_manager import compute_transaction_fees, submit_transaction, \
+    wait_for_confirmation
+from solana_module.anchor_module.transaction_packer import DEFAULT_INSTRUCTION_COMPUTE_UNITS, wait_planned_slots
+from solana_module.anchor_module.compute_budget_tuner import build_tuned_transaction, measure_compute_units, \
+    fetch_cached_compute_units, cache_compute_units, compute_tuned_limit
+
+
+# Compute unit prices (micro-lamports) swept when no level is given
+DEFAULT_PRICE_LEVELS = [0, 1_000, 10_000, 100_000]
+
+# Percentiles of the recent prioritization fees used as levels when seeding from the network
+SEED_PERCENTILES = [25, 50, 75, 90]
+
+# Accounts accepted by getRecentPrioritizationFees
+MAX_FEE_ACCOUNTS = 128
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def sweep_priority_fees(plan, levels=None, seed_from_network=False, cluster=None, replicate=None):
+    # The sendable steps of the plan are sent again at each compute unit price, measuring fee and time to land.
+    # Cluster overrides the one of the steps, e.g. Localnet for deterministic runs on a local validator.
+    # replicate(index) returns the plan sent at the level of that index, with its own accounts, so that steps
+    # creating accounts land at every level; without it the same plan, with the same accounts, is sent again
+    steps = [step for step in plan if isinstance(step, PlannedStep)]
+    levels = list(levels or [])
+    records = []
+    clients = dict()
+    try:
+        if seed_from_network and steps:
+            seed_cluster = cluster or steps[0].cluster
+            clients[seed_cluster] = create_client(seed_cluster)
+            levels += await fetch_seed_levels(clients[seed_cluster], steps)
+        levels = sorted(set(levels or DEFAULT_PRICE_LEVELS))
+
+        compute_unit_limits = dict()
+        for index, level in enumerate(levels):
+            print(f"Sending the trace with compute unit price {level}...")
+            level_plan = replicate(index) if replicate is not None else plan
+            for step_index, step in enumerate(level_plan):
+                if isinstance(step, PlannedWait):
+                    await wait_planned_slots(level_plan, step_index, clients, cluster)
+                    continue
+                step_cluster = cluster or step.cluster
+                if step_cluster not in clients:
+                    clients[step_cluster] = create_client(step_cluster)
+                record = {'level': level, 'step_id': step.step_id, 'program': step.program_name,
+                          'instruction': step.instruction_name}
+                if not step.send_transaction:
+                    record['error'] = 'Transaction not sent'
+                elif not step.is_deployed and cluster is None:
+                    record['error'] = 'Program not deployed with toolchain'
+                else:
+                    if step.step_id not in compute_unit_limits:
+                        compute_unit_limits[step.step_id] = await _fetch_compute_unit_limit(clients[step_cluster], step)
+                    record.update(await _send_at_level(clients[step_cluster], step, level,
+                                                       compute_unit_limits[step.step_id]))
+                records.append(record)
+    finally:
+        for client in clients.values():
+            await client.close()
+    return {'levels': levels, 'replicated': replicate is not None, 'records': records,
+            'curves': build_fee_curves(records)}
+
+async def fetch_seed_levels(client, steps):
+    # Percentiles of the prices paid in the recent slots by transactions writing the same accounts
+    accounts = list(dict.fromkeys(str(meta.pubkey) for step in steps for meta in step.instruction.accounts
+                                  if meta.is_writable))[:MAX_FEE_ACCOUNTS]
+    fees = await fetch_recent_prioritization_fees(client, accounts)
+    fees = sorted(fee for fee in fees if fee > 0)
+    if not fees:
+        return [0]
+    return [0] + [fees[min(len(fees) - 1, len(fees) * percentile // 100)] for percentile in SEED_PERCENTILES]
+
+async def fetch_recent_prioritization_fees(client, accounts):
+    # Not wrapped by the RPC client, so the request is sent through its HTTP session
+    body = {'jsonrpc': '2.0', 'id': 1, 'method': 'getRecentPrioritizationFees', 'params': [accounts]}
+    response = await client._provider.session.post(client._provider.endpoint_uri, json=body)
+    result = response.json()
+    if 'error' in result:
+        raise RuntimeError(f"getRecentPrioritizationFees failed: {result['error'].get('message')}")
+    return [entry['prioritizationFee'] for entry in result['result']]
+
+def build_fee_curves(records):
+    # Fee and latency of each instruction at each level, over the landed transactions
+    groups = dict()
+    for record in records:
+        groups.setdefault((record['program'], record['instruction']), dict()).setdefault(record['level'], []).append(record)
+
+    curves = []
+    for (program, instruction), levels in groups.items():
+        points = []
+        for level, level_records in sorted(levels.items()):
+            landed = [record for record in level_records if 'error' not in record]
+            points.append({
+                'level': level,
+                'sent': len(level_records),
+                'landed': len(landed),
+                'fee_lamports': _mean(record['fee_lamports'] for record in landed),
+                'latency_slots': _mean(record['latency_slots'] for record in landed),
+                'latency_ms': _mean(record['latency_ms'] for record in landed),
+            })
+        curves.append({'program': program, 'instruction': instruction, 'points': points})
+    return curves
+
+def format_fee_curves(curves, replicated=True):
+    lines = []
+    if not replicated:
+        lines.append("The same accounts are used at every level: steps creating accounts only land at the first one.")
+    for curve in curves:
+        lines.append(f"{curve['program']}.{curve['instruction']}")
+        lines.append(f"  {'price':>10}  {'fee':>10}  {'slots':>8}  {'ms':>10}  landed")
+        for point in curve['points']:
+            lines.append(f"  {point['level']:>10}  {_format_value(point['fee_lamports']):>10}  "
+                         f"{_format_value(point['latency_slots']):>8}  {_format_value(point['latency_ms']):>10}  "
+                         f"{point['landed']}/{point['sent']}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _fetch_compute_unit_limit(client, step):
+    # Measured units plus the default margin, the default allocation if they can't be measured
+    units_consumed = fetch_cached_compute_units(step)
+    if units_consumed is None:
+        units_consumed, error = await measure_compute_units(client, step)
+        if error is not None:
+            print(f"Step {step.step_id}: {error}, using the default limit.")
+            return DEFAULT_INSTRUCTION_COMPUTE_UNITS
+        cache_compute_units(step, units_consumed)
+    return compute_tuned_limit(units_consumed)
+
+async def _send_at_level(client, step, level, compute_unit_limit):
+    try:
+        transaction = await build_tuned_transaction(step, client, compute_unit_limit, level)
+        fee = await compute_transaction_fees(client, transaction)
+        start_slot = (await client.get_slot(Processed)).value
+        start_time = time.perf_counter()
+        signature = await submit_transaction(client, transaction)
+        status = await wait_for_confirmation(client, signature)
+        latency_ms = (time.perf_counter() - start_time) * 1000
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+    if status is None:
+        return {'transaction_hash': str(signature), 'error': 'Transaction not confirmed'}
+    if status.err is not None:
+        return {'transaction_hash': str(signature), 'error': str(status.err)}
+    return {'transaction_hash': str(signature), 'fee_lamports': fee, 'latency_slots': status.slot - start_slot,
+            'latency_ms': round(latency_ms, 1)}
+
+def _mean(values):
+    values = list(values)
+    return round(statistics.fmean(values), 2) if values else None
+
+def _format_value(value):
+    return '-' if value is None else f"{value:g}"
@@ -21,13 +21,25 @@
 # THE SOFTWARE.
 
 
+import asyncio
 import json
 import toml
 import re
 import os
 import platform
-from solana_module.solana_utils import choose_wallet, run_command, choose_cluster
-from solana_module.anchor_module.anchor_utils import anchor_base_path, load_idl
+from solana_module.solana_utils import choose_wallet, choose_cluster
+from solana_module.command_runner import run_command_async, UNSUPPORTED_OS_EXIT_CODE
+from solana_module.anchor_module.anchor_utils import anchor_base_path, load_idl, fetch_source_idl_path, \
+    fetch_converted_idl_path
+from solana_module.anchor_module.program_registry import fetch_registered_program, update_registered_program, \
+    compute_file_hash, current_timestamp
+
+
+# Per-command timeouts (in seconds)
+INITIALIZATION_TIMEOUT = 300
+BUILD_TIMEOUT = 1800
+ANCHORPY_TIMEOUT = 300
+DEPLOY_TIMEOUT = 600
 
 
 # ====================================================
@@ -35,49 +47,76 @@ from solana_module.anchor_module.anchor_utils import anchor_base_path, load_idl
 # ====================================================
 
 def compile_programs():
-    program_id = None
-    programs_path = f"{anchor_base_path}/anchor_programs" # Path where anchor programs are placed
-
     operating_system = platform.system()
 
-    # Read programs
-    file_names, programs = _read_rs_files(programs_path)
-
-    if not file_names:
-        print('No programs to compile in anchor_programs folder.')
-        return
-
-    # For each program
-    for file_name,program in zip(file_names, programs):
-        print(f"Compiling program: {file_name}")
-        file_name_without_extension = file_name.removesuffix(".rs") # Get filename without .rs extension
+    # Compiling phase, all programs are built concurrently
+    program_ids = asyncio.run(compile_programs_async(operating_system=operating_system))
 
-        # Compiling phase
-        done, program_id = _compile_program(file_name_without_extension, operating_system, program) # Compile program
-        if not done:
-            return
-
-        result =_convert_idl_for_anchorpy(file_name_without_extension)
-        if result is None:
-            return
-
-        # Anchorpy initialization phase
-        if program_id: # If deploy succeed, initialize anchorpy
-            _initialize_anchorpy(file_name_without_extension, program_id, operating_system)
+    # For each successfully compiled program
+    for program_name, program_id in program_ids.items():
+        if program_id is None:
+            continue
 
         # Deploying phase
         allowed_choice = ['y', 'n', 'Y', 'N']
         choice = None
         while choice not in allowed_choice:
-            print("Deploy compiled program? (y/n):")
+            print(f"Deploy compiled program {program_name}? (y/n):")
             choice = input()
             if choice == "y" or choice == "Y":
-                _deploy_program(file_name_without_extension, operating_system)
+                _deploy_program(program_name, operating_system)
             elif choice == "n" or choice == "N":
-                return
+                break
             else:
                 print('Please insert a valid choice.')
 
+async def compile_programs_async(program_names=None, operating_system=None):
+    programs_path = f"{anchor_base_path}/anchor_programs" # Path where anchor programs are placed
+    if operating_system is None:
+        operating_system = platform.system()
+
+    # Read programs
+    file_names, programs = _read_rs_files(programs_path)
+
+    # Keep only requested programs, if any
+    if program_names is not None:
+        selected = [(file_name, program) for file_name, program in zip(file_names, programs)
+                    if file_name.removesuffix(".rs") in program_names]
+        file_names = [file_name for file_name, _ in selected]
+        programs = [program for _, program in selected]
+
+    if not file_names:
+        print('No programs to compile in anchor_programs folder.')
+        return dict()
+
+    names_without_extension = [file_name.removesuffix(".rs") for file_name in file_names] # Get filenames without .rs extension
+    return await _compile_programs_concurrently(names_without_extension, programs, operating_system)
+
+async def deploy_program_async(program_name, cluster, wallet_name, operating_system=None):
+    if operating_system is None:
+        operating_system = platform.system()
+
+    # Modify generated file to set chosen cluster
+    _modify_cluster_wallet(program_name, cluster, wallet_name)
+
+    # Define deploy commands to be executed
+    deploy_commands = [
+        f"cd {anchor_base_path}/.anchor_files/{program_name}/anchor_environment/",  # Change directory to environment folder
+        "anchor deploy",  # Deploy program
+    ]
+
+    # Merge commands with '&&' to execute them on the same shell
+    deploy_concatenated_command = " && ".join(deploy_commands)
+
+    # Run Anchor deploy
+    program_id = await _run_deploying_commands(program_name, operating_system, deploy_concatenated_command)
+
+    # Record where the program lives, only once the deploy succeeded
+    if program_id is not None:
+        update_registered_program(program_name, program_id=program_id, cluster=cluster, wallet=wallet_name,
+                                  deployed_at=current_timestamp())
+    return program_id
+
 
 
 
@@ -94,6 +133,7 @@ def _read_rs_files(programs_path):
     # Check if the folder exists
     if not os.path.isdir(programs_path):
         print(f"The path '{programs_path}' does not exist.")
+        return [], []
     else:
         # Get all .rs in the programs path
         file_names = [f for f in os.listdir(programs_path) if f.endswith(".rs")]
@@ -107,20 +147,38 @@ def _read_rs_files(programs_path):
 
         return file_names, anchor_programs
 
-def _compile_program(program_name, operating_system, program):
+async def _compile_programs_concurrently(program_names, programs, operating_system):
+    tasks = [_compile_program(program_name, operating_system, program) for program_name, program in zip(program_names, programs)]
+    results = await asyncio.gather(*tasks)
+    return dict(zip(program_names, results))
+
+async def _compile_program(program_name, operating_system, program):
+    print(f"Compiling program: {program_name}.rs")
+
     # Initialization phase
-    done = _perform_anchor_initialization(program_name, operating_system)
+    done = await _perform_anchor_initialization(program_name, operating_system)
     if not done:
-        return False
+        print(f"Compilation of {program_name} failed.")
+        return None
 
     # Build phase
-    done, program_id = _perform_anchor_build(program_name, program, operating_system)
+    done, program_id = await _perform_anchor_build(program_name, program, operating_system)
     if not done:
-        return False
+        print(f"Compilation of {program_name} failed.")
+        return None
 
-    return True, program_id
+    # IDL conversion phase
+    result = _convert_idl_for_anchorpy(program_name)
+    if result is None:
+        return None
+
+    # Anchorpy initialization phase
+    if program_id:
+        await _initialize_anchorpy(program_name, program_id, operating_system)
 
-def _perform_anchor_initialization(program_name, operating_system):
+    return program_id
+
+async def _perform_anchor_initialization(program_name, operating_system):
     # Define Anchor initialization commands to be executed
     initialization_commands = [
         f"mkdir -p {anchor_base_path}/.anchor_files/{program_name}", # Create folder for new program
@@ -132,9 +190,9 @@ def _perform_anchor_initialization(program_name, operating_system):
     initialization_concatenated_command = " && ".join(initialization_commands)
 
     # Run Anchor initialization
-    return _run_anchor_initialization_commands(operating_system, initialization_concatenated_command)
+    return await _run_anchor_initialization_commands(program_name, operating_system, initialization_concatenated_command)
 
-def _perform_anchor_build(program_name, program, operating_system):
+async def _perform_anchor_build(program_name, program, operating_system):
     # Define Anchor build commands to be executed
     build_commands = [
         f"cd {anchor_base_path}/.anchor_files/{program_name}/anchor_environment",  # Change directory to new anchor environment
@@ -146,38 +204,44 @@ def _perform_anchor_build(program_name, program, operating_system):
     build_concatenated_command = " && ".join(build_commands)
 
     # Run Anchor build
-    return _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command)
+    return await _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command)
 
-def _run_anchor_initialization_commands(operating_system, initialization_concatenated_command):
-    # Initialize Anchor project
-    print("Initializing Anchor project...")
-    result = run_command(operating_system, initialization_concatenated_command)
+async def _run_anchor_initialization_commands(program_name, operating_system, initialization_concatenated_command):
+    # Initialize Anchor project, output is streamed while the command runs
+    print(f"Initializing Anchor project for {program_name}...")
+    result = await run_command_async(operating_system, initialization_concatenated_command,
+                                     timeout=INITIALIZATION_TIMEOUT, prefix=program_name)
 
     # Error checks
-    if result is None:
+    if result.returncode == UNSUPPORTED_OS_EXIT_CODE:
         print("Unsupported operating system.")
         return False
-    # If there are error while initializing Anchor project, print them
-    elif result.stderr:
-        print(result.stderr)
+    elif not result.succeeded:
+        # anchor init fails if the environment already exists, which is fine when re-compiling a program
+        environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+        return os.path.isdir(environment_path)
 
-    return True # Sometimes stderr is just a warning, so we return true anyway
+    return True
 
-def _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command):
-    print("Building Anchor program, this may take a while... Please be patient.")
+async def _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command):
+    print(f"Building Anchor program {program_name}, this may take a while... Please be patient.")
     program_id = _write_program_in_lib_rs(program_name, program)
-    result = run_command(operating_system, build_concatenated_command)
-    if result is None:
+    result = await run_command_async(operating_system, build_concatenated_command,
+                                     timeout=BUILD_TIMEOUT, prefix=program_name)
+    if result.returncode == UNSUPPORTED_OS_EXIT_CODE:
         print("Unsupported operating system.")
-        return False
-    elif '-Znext' in result.stderr:
+        return False, None
+    elif not result.succeeded and '-Znext' in result.stderr:
         # try by imposing cargo version 3
         _impose_cargo_lock_version(program_name)
-        result = run_command(operating_system, build_concatenated_command)
-        if result.stderr:
-            print(result.stderr)
+        result = await run_command_async(operating_system, build_concatenated_command,
+                                         timeout=BUILD_TIMEOUT, prefix=program_name)
 
-    return True, program_id # Sometimes stderr is just a warning, so we return true anyway
+    if not result.succeeded:
+        print(f"Build of {program_name} failed (exit code {result.returncode}).")
+        return False, None
+
+    return True, program_id
 
 def _write_program_in_lib_rs(program_name, program):
     program, program_id = _update_program_id(program_name, program)
@@ -214,14 +278,27 @@ def _impose_cargo_lock_version(program_name):
             file.write(line)
 
 def _convert_idl_for_anchorpy(program_name):
-    idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
+    idl_file_path = fetch_source_idl_path(program_name)
+    converted_idl_file_path = fetch_converted_idl_path(program_name)
 
     if not os.path.exists(idl_file_path):
         print('Error during build')
         return
 
+    # Skip conversion if the source IDL didn't change since the last one
+    source_idl_hash = compute_file_hash(idl_file_path)
+    program = fetch_registered_program(program_name)
+    if program.get('source_idl_hash') == source_idl_hash and os.path.exists(converted_idl_file_path):
+        print("IDL unchanged, skipping conversion.")
+        return True
+
     idl_31 = load_idl(idl_file_path)
 
+    # IDL already converted in place by older versions of the toolchain
+    if "metadata" not in idl_31:
+        _write_converted_idl(program_name, source_idl_hash, idl_31)
+        return True
+
     idl_29 = {
         "version": idl_31["metadata"]["version"],
         "name": idl_31["metadata"]["name"],
@@ -268,11 +345,20 @@ def _convert_idl_for_anchorpy(program_name):
 
         idl_29["accounts"].append(converted_account)
 
-    with open(idl_file_path, 'w') as file:
-        file.write(json.dumps(idl_29))
+    # The source IDL is left untouched, the converted one is written next to it
+    _write_converted_idl(program_name, source_idl_hash, idl_29)
 
     return True
 
+def _write_converted_idl(program_name, source_idl_hash, idl_29):
+    converted_idl_file_path = fetch_converted_idl_path(program_name)
+    with open(converted_idl_file_path, 'w') as file:
+        file.write(json.dumps(idl_29))
+
+    update_registered_program(program_name, idl_path=fetch_source_idl_path(program_name), source_idl_hash=source_idl_hash,
+                              converted_idl_path=converted_idl_file_path,
+                              converted_idl_hash=compute_file_hash(converted_idl_file_path))
+
 def _snake_to_camel(snake_str):
     return re.sub(r'_([a-z])', lambda match: match.group(1).upper(), snake_str)
 
@@ -281,22 +367,35 @@ def _snake_to_camel(snake_str):
 # Anchorpy initialization phase functions
 # ====================================================
 
-def _initialize_anchorpy(program_name, program_id, operating_system):
-    idl_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json"
+async def _initialize_anchorpy(program_name, program_id, operating_system):
+    idl_path = fetch_converted_idl_path(program_name)
     output_directory = f"{anchor_base_path}/.anchor_files/{program_name}/anchorpy_files/"
-    anchorpy_initialization_command = f"anchorpy client-gen {idl_path} {output_directory} --program-id {program_id}"
 
-    _run_initializing_anchorpy_commands(operating_system, anchorpy_initialization_command)
+    # Skip client generation if neither the converted IDL nor the program ID changed
+    program = fetch_registered_program(program_name)
+    client_key = f"{program.get('converted_idl_hash')}:{program_id}"
+    if program.get('anchorpy_client_key') == client_key and os.path.isdir(output_directory):
+        print("Program interface unchanged, skipping anchorpy initialization.")
+        update_registered_program(program_name, built_at=current_timestamp())
+        return
 
-def _run_initializing_anchorpy_commands(operating_system, anchorpy_initialization_command):
-    print("Initializing anchorpy...")
-    result = run_command(operating_system, anchorpy_initialization_command)
-    if result is None:
+    anchorpy_initialization_command = f"anchorpy client-gen {idl_path} {output_directory} --program-id {program_id}"
+    done = await _run_initializing_anchorpy_commands(program_name, operating_system, anchorpy_initialization_command)
+    if done:
+        update_registered_program(program_name, anchorpy_client_key=client_key, program_id=program_id,
+                                  anchorpy_client_path=output_directory.removesuffix('/'), built_at=current_timestamp())
+
+async def _run_initializing_anchorpy_commands(program_name, operating_system, anchorpy_initialization_command):
+    print(f"Initializing anchorpy for {program_name}...")
+    result = await run_command_async(operating_system, anchorpy_initialization_command,
+                                     timeout=ANCHORPY_TIMEOUT, prefix=program_name)
+    if result.returncode == UNSUPPORTED_OS_EXIT_CODE:
         print("Unsupported operating system.")
-    elif result.stderr:
-        print(result.stderr)
+    elif not result.succeeded:
+        print(f"Anchorpy initialization failed (exit code {result.returncode}).")
     else:
         print("Anchorpy initialized successfully")
+    return result.succeeded
 
 
 # ====================================================
@@ -310,21 +409,10 @@ def _deploy_program(program_name, operating_system):
 
     # Manage cluster choice
     cluster = choose_cluster()
+    if cluster is None:
+        return
 
-    # Modify generated file to set chosen cluster
-    _modify_cluster_wallet(program_name, cluster, wallet_name)
-
-    # Define deploy commands to be executed
-    deploy_commands = [
-        f"cd {anchor_base_path}/.anchor_files/{program_name}/anchor_environment/",  # Change directory to environment folder
-        "anchor deploy",  # Deploy program
-    ]
-
-    # Merge commands with '&&' to execute them on the same shell
-    deploy_concatenated_command = " && ".join(deploy_commands)
-
-    # Run Anchor deploy
-    _run_deploying_commands(operating_system, deploy_concatenated_command)
+    asyncio.run(deploy_program_async(program_name, cluster, wallet_name, operating_system))
 
 def _modify_cluster_wallet(program_name, cluster, wallet_name):
     file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
@@ -338,14 +426,15 @@ def _modify_cluster_wallet(program_name, cluster, wallet_name):
     with open(file_path, 'w') as file:
         toml.dump(config, file)
 
-def _run_deploying_commands(operating_system, deploy_concatenated_command):
-    print("Deploying program...")
-    result = run_command(operating_system, deploy_concatenated_command)
-    if result is None:
+async def _run_deploying_commands(program_name, operating_system, deploy_concatenated_command):
+    print(f"Deploying program {program_name}...")
+    result = await run_command_async(operating_system, deploy_concatenated_command,
+                                     timeout=DEPLOY_TIMEOUT, prefix=program_name)
+    if result.returncode == UNSUPPORTED_OS_EXIT_CODE:
         print("Unsupported operating system.")
         return None
-    elif result.stderr:
-        print(result.stderr)
+    elif not result.succeeded:
+        print(f"Deploy of {program_name} failed (exit code {result.returncode}).")
         return None
     else:
         program_id, signature = _get_deploy_details(result.stdout)
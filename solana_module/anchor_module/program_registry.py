@@ -0,0 +1,226 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from solana_module.solana_utils import solana_base_path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Single manifest with an entry for each program handled by the toolchain
+registry_path = f"{solana_base_path}/anchor_module/.anchor_files/program_registry.json"
+
+# Locked by the updates of every process, e.g. the menus and the command line jobs
+registry_lock_path = f"{registry_path}.lock"
+REGISTRY_VERSION = 1
+
+# Clusters where the toolchain can deploy programs
+DEPLOY_CLUSTERS = ['Localnet', 'Devnet', 'Mainnet']
+
+# Parsed registry and the modification time of its file
+_cached_registry = dict()
+_registry_lock = threading.RLock()
+_registry_lock_depth = [0]
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def fetch_registered_programs():
+    # Programs with a generated anchorpy client, i.e. the initialized ones
+    programs = _load_registry()
+    return sorted(name for name, entry in programs.items() if entry.get('anchorpy_client_path'))
+
+def fetch_registered_program(program_name):
+    # Returns a copy of the program entry, empty if the program is not registered
+    return dict(_load_registry().get(program_name, {}))
+
+def update_registered_program(program_name, **fields):
+    # Read, modify and atomically replace the registry, so that readers never see a partial update
+    # and concurrent updates, of this or of other processes, aren't lost
+    with _locked_registry():
+        programs = _load_registry()
+        entry = dict(programs.get(program_name, {}))
+        entry.update(fields)
+        entry['updated_at'] = current_timestamp()
+        programs = dict(programs)
+        programs[program_name] = entry
+        _save_registry(programs)
+    return dict(entry)
+
+def remove_registered_program(program_name):
+    with _locked_registry():
+        programs = _load_registry()
+        if program_name not in programs:
+            return False
+        programs = {name: entry for name, entry in programs.items() if name != program_name}
+        _save_registry(programs)
+    return True
+
+def compute_file_hash(file_path):
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def current_timestamp():
+    return time.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _load_registry():
+    # Programs compiled before the registry existed are registered by scanning their folders once
+    if not os.path.exists(registry_path):
+        with _locked_registry():
+            if not os.path.exists(registry_path):
+                _save_registry(_scan_program_folders())
+
+    modification_time = os.stat(registry_path).st_mtime_ns
+    if _cached_registry.get('modification_time') != modification_time:
+        with open(registry_path, 'r') as file:
+            content = json.load(file)
+        if content.get('version') != REGISTRY_VERSION:
+            raise ValueError(f"Unsupported program registry version {content.get('version')}")
+        _cached_registry['programs'] = content['programs']
+        _cached_registry['modification_time'] = modification_time
+    return _cached_registry['programs']
+
+@contextlib.contextmanager
+def _locked_registry():
+    # Thread lock of this process and OS lock of the lock file, held from the load to the replace of an update
+    # (the OS lock is taken once, nested updates of the same thread already hold it)
+    with _registry_lock:
+        if _registry_lock_depth[0]:
+            _registry_lock_depth[0] += 1
+            try:
+                yield
+            finally:
+                _registry_lock_depth[0] -= 1
+            return
+        os.makedirs(os.path.dirname(registry_lock_path), exist_ok=True)
+        with open(registry_lock_path, 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            _registry_lock_depth[0] = 1
+            try:
+                yield
+            finally:
+                _registry_lock_depth[0] = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _save_registry(programs):
+    directory = os.path.dirname(registry_path)
+    os.makedirs(directory, exist_ok=True)
+
+    # Write a temporary file in the same folder and rename it over the registry
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix='.program_registry', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump({'version': REGISTRY_VERSION, 'programs': programs}, file, indent=2, sort_keys=True)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, registry_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    _cached_registry['programs'] = programs
+    _cached_registry['modification_time'] = os.stat(registry_path).st_mtime_ns
+
+def _scan_program_folders():
+    programs_path = os.path.dirname(registry_path)
+    programs = dict()
+    if not os.path.isdir(programs_path):
+        return programs
+
+    for program_name in os.listdir(programs_path):
+        program_path = os.path.join(programs_path, program_name)
+        # Only program folders have an Anchor environment
+        if os.path.isdir(os.path.join(program_path, 'anchor_environment')):
+            programs[program_name] = _scan_program_folder(program_name, program_path)
+    return programs
+
+def _scan_program_folder(program_name, program_path):
+    environment_path = f"{program_path}/anchor_environment"
+    idl_path = f"{environment_path}/target/idl/{program_name}.json"
+    converted_idl_path = f"{environment_path}/target/idl/{program_name}_anchorpy.json"
+    anchorpy_client_path = f"{program_path}/anchorpy_files"
+
+    entry = {'updated_at': current_timestamp()}
+
+    # IDL and anchorpy client
+    if os.path.exists(idl_path):
+        entry['idl_path'] = idl_path
+        entry['source_idl_hash'] = compute_file_hash(idl_path)
+        entry['built_at'] = _file_timestamp(idl_path)
+    if os.path.exists(converted_idl_path):
+        entry['converted_idl_path'] = converted_idl_path
+        entry['converted_idl_hash'] = compute_file_hash(converted_idl_path)
+    if os.path.isdir(anchorpy_client_path):
+        entry['anchorpy_client_path'] = anchorpy_client_path
+
+    # Program ID written by anchorpy client-gen
+    program_id_path = f"{anchorpy_client_path}/program_id.py"
+    if os.path.exists(program_id_path):
+        with open(program_id_path, 'r') as file:
+            match = re.search(r'Pubkey\.from_string\(\s*"([^"]+)"\s*\)', file.read())
+        if match:
+            entry['program_id'] = match.group(1)
+
+    # Cluster and wallet of the last deploy
+    anchor_toml_path = f"{environment_path}/Anchor.toml"
+    if os.path.exists(anchor_toml_path):
+        import toml
+        provider = toml.load(anchor_toml_path).get('provider', {})
+        if provider.get('cluster') in DEPLOY_CLUSTERS:
+            entry['cluster'] = provider['cluster']
+            entry['wallet'] = provider.get('wallet', '').removeprefix('../../../../solana_wallets/')
+
+    return entry
+
+def _file_timestamp(file_path):
+    return time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(os.path.getmtime(file_path)))
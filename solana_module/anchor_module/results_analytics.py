@@ -0,0 +1,273 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import csv
+import json
+import os
+import tempfile
+import numpy as np
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+
+
+# Folders where execution trace results are written
+RESULTS_FOLDERS = [f"{anchor_base_path}/execution_traces_results", f"{anchor_base_path}/json_results"]
+
+results_store_path = f"{anchor_base_path}/execution_traces_results/results_store.npz"
+
+# Folder of the fixed contracts set, one Rust file for each program
+fixed_contracts_path = "fixed_contracts"
+
+# Columns of the store: text columns are unicode arrays, numeric ones are float64 with NaN for missing values
+TEXT_COLUMNS = ['program', 'instruction', 'network', 'trace_file', 'trace_id', 'transaction_hash', 'lookup_table']
+NUMERIC_COLUMNS = ['size_bytes', 'fee_lamports', 'slots', 'compute_units', 'timestamp']
+
+# Columns which can be used to group statistics, and metrics computed for each group
+GROUP_COLUMNS = ['program', 'instruction', 'network', 'trace_file', 'lookup_table']
+METRICS = ['size_bytes', 'fee_lamports', 'slots', 'compute_units']
+
+UNKNOWN = 'unknown'
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def ingest_results(folders=None):
+    # Load every results file (CSV and JSON schemas) in a single columnar store, saved on disk
+    rows = []
+    for folder in folders or RESULTS_FOLDERS:
+        if not os.path.isdir(folder):
+            continue
+        for file_name in sorted(os.listdir(folder)):
+            rows.extend(read_results_file(os.path.join(folder, file_name)))
+
+    store = _build_store(rows)
+    _save_store(store)
+    return store
+
+def read_results_file(file_path):
+    # Rows of a results file as dicts with the store columns, empty if it isn't a results file
+    if file_path.endswith('.csv'):
+        return _read_csv_results(file_path)
+    elif file_path.endswith('.json'):
+        return _read_json_results(file_path)
+    return []
+
+def load_results_store():
+    # Load the store, ingesting results the first time
+    if not os.path.exists(results_store_path):
+        return ingest_results()
+    with np.load(results_store_path, allow_pickle=False) as data:
+        # Stores saved by older versions miss the newer columns, results are read again
+        if any(column not in data.files for column in TEXT_COLUMNS + NUMERIC_COLUMNS):
+            return ingest_results()
+        return {column: data[column] for column in TEXT_COLUMNS + NUMERIC_COLUMNS}
+
+def fetch_fixed_contracts():
+    if not os.path.isdir(fixed_contracts_path):
+        return []
+    return sorted(file_name.removesuffix('.rs') for file_name in os.listdir(fixed_contracts_path)
+                  if file_name.endswith('.rs'))
+
+def filter_results(store, since=None, **equals):
+    # Keep rows newer than "since" (epoch seconds) and matching the given column values (or one of them)
+    mask = np.ones(len(store['program']), dtype=bool)
+    if since is not None:
+        mask &= store['timestamp'] >= since
+    for column, value in equals.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= np.isin(store[column], list(value))
+        elif value is not None:
+            mask &= store[column] == value
+    return {column: values[mask] for column, values in store.items()}
+
+def compute_statistics(store, group_by=('program', 'instruction', 'network'), metrics=METRICS):
+    # Count, mean, p50, p95 and max of each metric for each group, computed on whole columns
+    n_rows = len(store['program'])
+    if n_rows == 0:
+        return []
+
+    # Integer code of the group of each row
+    group_keys = [np.unique(store[column], return_inverse=True) for column in group_by]
+    combined = np.zeros(n_rows, dtype=np.int64)
+    for labels, codes in group_keys:
+        combined = combined * len(labels) + codes
+    group_ids, group_codes, group_counts = np.unique(combined, return_inverse=True, return_counts=True)
+    first_rows = np.searchsorted(np.sort(combined), group_ids)
+    representative_rows = np.argsort(combined, kind='stable')[first_rows]
+
+    statistics = {metric: _compute_group_statistics(group_codes, len(group_ids), store[metric]) for metric in metrics}
+
+    rows = []
+    for group in range(len(group_ids)):
+        row = {column: str(store[column][representative_rows[group]]) for column in group_by}
+        row['count'] = int(group_counts[group])
+        for metric in metrics:
+            for statistic, values in statistics[metric].items():
+                row[f"{metric}_{statistic}"] = _to_json_number(values[group])
+        rows.append(row)
+    return rows
+
+def format_report(rows, group_by=('program', 'instruction', 'network'), metrics=METRICS):
+    # Text table of the statistics computed by compute_statistics
+    if not rows:
+        return "No results found."
+    columns = list(group_by) + ['count'] + [f"{metric}_{statistic}" for metric in metrics
+                                            for statistic in ('mean', 'p50', 'p95', 'max')]
+    cells = [[_format_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip()]
+    lines.append("  ".join('-' * width for width in widths))
+    for line in cells:
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _read_csv_results(file_path):
+    # Old results files have no operation name column, the program is the trace file name
+    file_name = os.path.basename(file_path)
+    program = file_name.removesuffix('.csv').removesuffix('_results').removesuffix('_result')
+    timestamp = os.path.getmtime(file_path)
+
+    rows = []
+    with open(file_path, 'r', newline='') as file:
+        for record in csv.DictReader(file):
+            rows.append({
+                'program': program,
+                'instruction': record.get('Operation_Name') or UNKNOWN,
+                'network': UNKNOWN,
+                'trace_file': file_name,
+                'trace_id': record.get('Trace_ID') or '',
+                'transaction_hash': record.get('Transaction_Hash_or_Status') or '',
+                'lookup_table': record.get('Lookup_Table') or '',
+                'size_bytes': _to_float(record.get('Transaction_Size_Bytes')),
+                'fee_lamports': _to_float(record.get('Transaction_Fees_Lamports')),
+                'slots': np.nan,
+                'compute_units': _to_float(record.get('Compute_Units')),
+                'timestamp': timestamp,
+            })
+    return rows
+
+def _read_json_results(file_path):
+    file_name = os.path.basename(file_path)
+    timestamp = os.path.getmtime(file_path)
+    try:
+        with open(file_path, 'r') as file:
+            results = json.load(file)
+    except json.JSONDecodeError as e:
+        print(f"Results file {file_path} skipped, it is not valid JSON ({e}).")
+        return []
+    if not isinstance(results, dict) or 'actions' not in results:
+        return []
+
+    program = str(results.get('trace_title') or file_name.removesuffix('.json')).removesuffix('_results')
+    network = str(results.get('network') or UNKNOWN).rstrip('*')
+
+    rows = []
+    for action in results['actions']:
+        rows.append({
+            'program': program,
+            'instruction': str(action.get('function_name') or UNKNOWN),
+            'network': network,
+            'trace_file': file_name,
+            'trace_id': str(action.get('sequence_id', '')),
+            'transaction_hash': str(action.get('transaction_hash') or ''),
+            'lookup_table': str(action.get('lookup_table') or ''),
+            'size_bytes': _to_float(action.get('transaction_size_bytes')),
+            'fee_lamports': _to_float(action.get('transaction_fees_lamports')),
+            'slots': _to_float(action.get('execution_time_in_slots')),
+            'compute_units': _to_float(action.get('compute_units')),
+            'timestamp': timestamp,
+        })
+    return rows
+
+def _build_store(rows):
+    store = {column: np.array([row[column] for row in rows], dtype=str) for column in TEXT_COLUMNS}
+    store.update({column: np.array([row[column] for row in rows], dtype=np.float64) for column in NUMERIC_COLUMNS})
+    return store
+
+def _save_store(store):
+    folder = os.path.dirname(results_store_path)
+    os.makedirs(folder, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=folder, suffix='.npz')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            np.savez(file, **store)
+        os.replace(temporary_path, results_store_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+def _compute_group_statistics(group_codes, n_groups, values):
+    valid = ~np.isnan(values)
+    counts = np.bincount(group_codes[valid], minlength=n_groups)
+    sums = np.bincount(group_codes[valid], weights=values[valid], minlength=n_groups)
+
+    # Sort by group and value, missing values go to the end of each group
+    order = np.lexsort((values, group_codes))
+    sorted_values = values[order]
+    starts = np.searchsorted(group_codes[order], np.arange(n_groups))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return {
+        'mean': mean,
+        'p50': _compute_group_quantile(sorted_values, starts, counts, 0.50),
+        'p95': _compute_group_quantile(sorted_values, starts, counts, 0.95),
+        'max': _compute_group_quantile(sorted_values, starts, counts, 1.0),
+    }
+
+def _compute_group_quantile(sorted_values, starts, counts, quantile):
+    # Linear interpolation between the closest ranks, as numpy.percentile does
+    position = quantile * np.maximum(counts - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    last = len(sorted_values) - 1
+    lower_values = sorted_values[np.minimum(starts + lower, last)]
+    upper_values = sorted_values[np.minimum(starts + upper, last)]
+    result = lower_values + (upper_values - lower_values) * (position - lower)
+    return np.where(counts > 0, result, np.nan)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_json_number(value):
+    if np.isnan(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+def _format_cell(value):
+    if value is None:
+        return '-'
+    return str(value)
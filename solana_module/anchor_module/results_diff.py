@@ -0,0 +1,187 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+from solana_module.anchor_module.results_analytics import read_results_file
+
+
+# Compared metrics and the default threshold of each one: increases above it are regressions
+DEFAULT_THRESHOLDS = {
+    'size_bytes': 0,
+    'fee_lamports': 0,
+    'slots': 2,
+    'compute_units': 0,
+}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def diff_results(baseline_path, candidate_path, thresholds=None, percent_threshold=None):
+    # Paths can be two results files or two folders, whose files are paired by name
+    thresholds = DEFAULT_THRESHOLDS | (thresholds or {})
+    file_pairs, missing_files = _pair_results_files(baseline_path, candidate_path)
+
+    actions = []
+    unchanged_actions = 0
+    instruction_deltas = dict()
+    for baseline_file, candidate_file in file_pairs:
+        for action in _diff_results_file(baseline_file, candidate_file, thresholds, percent_threshold):
+            if action['status'] == 'aligned':
+                key = (action['program'], action['instruction'])
+                deltas = instruction_deltas.setdefault(key, {metric: [] for metric in thresholds})
+                for metric in thresholds:
+                    if action[metric]['delta'] is not None:
+                        deltas[metric].append(action[metric]['delta'])
+                if not action['changed']:
+                    unchanged_actions += 1
+                    continue
+            actions.append(action)
+
+    instructions = _summarize_instructions(instruction_deltas, thresholds)
+    regressions = [action for action in actions if action['regression']]
+    return {
+        'compared_files': len(file_pairs),
+        'missing_files': missing_files,
+        'unchanged_actions': unchanged_actions,
+        'actions': actions,
+        'instructions': instructions,
+        'regressions': regressions,
+        'failed': bool(regressions),
+    }
+
+def format_diff_report(diff):
+    # Text report of the changed actions, with regressions marked
+    lines = [f"Compared {diff['compared_files']} results files, {diff['unchanged_actions']} actions unchanged."]
+    for side, files in diff['missing_files'].items():
+        if files:
+            lines.append(f"Only in {side}: {', '.join(files)}")
+
+    for action in diff['actions']:
+        marker = 'REGRESSION' if action['regression'] else action['status']
+        description = f"{action['trace_file']} #{action['trace_id']} {action['instruction']}"
+        if action['status'] != 'aligned':
+            lines.append(f"[{marker}] {description}")
+            continue
+        changes = [f"{metric} {values['baseline']:g} -> {values['candidate']:g} ({values['delta']:+g})"
+                   for metric, values in action.items()
+                   if isinstance(values, dict) and values['delta']]
+        if 'lookup_table' in action:
+            changes.append("lookup table {} -> {}".format(*(table or 'none' for table in action['lookup_table'])))
+        lines.append(f"[{marker}] {description}: {', '.join(changes)}")
+
+    for instruction in diff['instructions']:
+        if instruction['regression']:
+            changes = [f"{metric} {delta:+g}" for metric, delta in instruction['mean_deltas'].items() if delta]
+            lines.append(f"Instruction {instruction['program']}.{instruction['instruction']} mean change: {', '.join(changes)}")
+
+    lines.append(f"{len(diff['regressions'])} regressions found.")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _pair_results_files(baseline_path, candidate_path):
+    if os.path.isfile(baseline_path) and os.path.isfile(candidate_path):
+        return [(baseline_path, candidate_path)], {'baseline': [], 'candidate': []}
+    if not os.path.isdir(baseline_path) or not os.path.isdir(candidate_path):
+        raise ValueError("Compare two results files or two folders of results files.")
+
+    baseline_files = {name for name in os.listdir(baseline_path) if name.endswith(('.csv', '.json'))}
+    candidate_files = {name for name in os.listdir(candidate_path) if name.endswith(('.csv', '.json'))}
+    file_pairs = [(os.path.join(baseline_path, name), os.path.join(candidate_path, name))
+                  for name in sorted(baseline_files & candidate_files)]
+    # Files found only in one of the two folders
+    missing_files = {'baseline': sorted(baseline_files - candidate_files),
+                     'candidate': sorted(candidate_files - baseline_files)}
+    return file_pairs, missing_files
+
+def _diff_results_file(baseline_file, candidate_file, thresholds, percent_threshold):
+    baseline_rows = _index_rows(read_results_file(baseline_file))
+    candidate_rows = _index_rows(read_results_file(candidate_file))
+    trace_file = os.path.basename(candidate_file)
+
+    actions = []
+    for key in list(baseline_rows) + [key for key in candidate_rows if key not in baseline_rows]:
+        baseline_row = baseline_rows.get(key)
+        candidate_row = candidate_rows.get(key)
+        row = candidate_row or baseline_row
+        action = {'program': row['program'], 'trace_file': trace_file, 'trace_id': row['trace_id'],
+                  'instruction': row['instruction']}
+
+        if baseline_row is None or candidate_row is None:
+            action.update(status='added' if baseline_row is None else 'removed', changed=True, regression=False)
+            actions.append(action)
+            continue
+
+        action.update(status='aligned', changed=False, regression=False)
+        # Transactions compiled against a lookup table in one run only change size without changing the program
+        if baseline_row['lookup_table'] != candidate_row['lookup_table']:
+            action.update(lookup_table=[baseline_row['lookup_table'], candidate_row['lookup_table']], changed=True)
+        for metric, threshold in thresholds.items():
+            values = _compare(baseline_row[metric], candidate_row[metric])
+            action[metric] = values
+            if values['delta']:
+                action['changed'] = True
+                if _is_regression(values, threshold, percent_threshold):
+                    action['regression'] = True
+        actions.append(action)
+    return actions
+
+def _index_rows(rows):
+    # Actions are aligned by sequence ID and function name, repeated pairs by order of appearance
+    indexed = dict()
+    for row in rows:
+        key = (row['trace_id'], row['instruction'], 0)
+        while key in indexed:
+            key = (key[0], key[1], key[2] + 1)
+        indexed[key] = row
+    return indexed
+
+def _compare(baseline, candidate):
+    # Missing values (NaN) are not compared
+    if baseline != baseline or candidate != candidate:
+        return {'baseline': None, 'candidate': None, 'delta': None, 'percent': None}
+    delta = candidate - baseline
+    percent = round(delta / baseline * 100, 2) if baseline else None
+    return {'baseline': baseline, 'candidate': candidate, 'delta': delta, 'percent': percent}
+
+def _is_regression(values, threshold, percent_threshold):
+    if values['delta'] is None or values['delta'] <= threshold:
+        return False
+    return percent_threshold is None or values['percent'] is None or values['percent'] > percent_threshold
+
+def _summarize_instructions(instruction_deltas, thresholds):
+    instructions = []
+    for (program, instruction), deltas in sorted(instruction_deltas.items()):
+        mean_deltas = {metric: round(sum(values) / len(values), 2) if values else None
+                       for metric, values in deltas.items()}
+        regression = any(delta is not None and delta > thresholds[metric] for metric, delta in mean_deltas.items())
+        instructions.append({'program': program, 'instruction': instruction, 'mean_deltas': mean_deltas,
+                             'regression': regression})
+    return instructions
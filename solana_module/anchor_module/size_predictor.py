@@ -0,0 +1,256 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from collections import namedtuple
+from solana_module.anchor_module.anchor_utils import load_cached_idl, fetch_source_idl_path
+from solana_module.anchor_module.instruction_encoder import compile_instruction_encoder, PRIMITIVE_FORMATS, \
+    BIG_INTEGER_SIZES
+
+
+# Maximum size of a serialized transaction (IPv6 MTU minus headers)
+PACKET_LIMIT = 1232
+
+SIGNATURE_BYTES = 64
+PUBKEY_BYTES = 32
+BLOCKHASH_BYTES = 32
+# num_required_signatures, num_readonly_signed and num_readonly_unsigned
+HEADER_BYTES = 3
+
+# Size formula of an instruction: size = fixed_bytes + data + shortvec(data),
+# data = data_fixed_bytes + sum(per_unit_bytes * units) of the variable args.
+# Variable args map to (per_unit_bytes, unit), e.g. strings are (1, 'characters')
+SizeFormula = namedtuple('SizeFormula', ['instruction_name', 'versioned', 'num_signatures',
+                                         'num_account_keys', 'fixed_bytes', 'data_fixed_bytes', 'variable_args'])
+
+# Size formulas of each instruction, keyed by IDL modification time to follow re-compilations
+_size_formulas = dict()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def fetch_size_formula(program_name, instruction_name):
+    idl_file_path = fetch_source_idl_path(program_name)
+    idl, modification_time = load_cached_idl(idl_file_path)
+    key = (program_name, instruction_name, modification_time)
+    if key not in _size_formulas:
+        _size_formulas[key] = compile_size_formula(idl, instruction_name)
+    return _size_formulas[key]
+
+def compile_size_formula(idl, instruction_name):
+    # Accounts are assumed distinct, except the ones with a fixed address which are counted once,
+    # and the transaction is built as build_transaction_from_instruction does: legacy when
+    # the instruction has signers, v0 with the provider as payer otherwise
+    encoder = compile_instruction_encoder(idl, instruction_name)
+    num_signers = sum(1 for account in encoder.accounts if account[2])
+    fixed_addresses = {account[4] for account in encoder.accounts if account[4] is not None}
+    num_account_keys = sum(1 for account in encoder.accounts if account[4] is None) + len(fixed_addresses) + 1
+    versioned = num_signers == 0
+    if versioned:
+        num_signers += 1
+        num_account_keys += 1
+    fixed_bytes = compute_transaction_size(num_signers, num_account_keys, len(encoder.accounts), 0, versioned) - 1
+
+    types = {type_def['name']: type_def['type'] for type_def in idl.get('types', [])}
+    data_fixed_bytes = len(encoder.discriminator)
+    variable_args = dict()
+    for arg, arg_name in zip(_fetch_idl_args(idl, instruction_name), encoder.arg_names):
+        arg_fixed_bytes, variable_part = _arg_size(arg['type'], types)
+        data_fixed_bytes += arg_fixed_bytes
+        if variable_part is not None:
+            variable_args[arg_name] = variable_part
+
+    return SizeFormula(instruction_name, versioned, num_signers, num_account_keys, fixed_bytes,
+                       data_fixed_bytes, variable_args)
+
+def evaluate_size_formula(formula, units=None):
+    # Units of each variable arg: characters of strings, bytes, items of vectors, 1 if an option is present,
+    # encoded bytes for the args whose size isn't linear. Missing args count as 0 units
+    units = units or {}
+    data_length = formula.data_fixed_bytes
+    for arg_name, (per_unit_bytes, _) in formula.variable_args.items():
+        data_length += per_unit_bytes * units.get(arg_name, 0)
+    return formula.fixed_bytes + data_length + shortvec_length(data_length)
+
+def predict_transaction_size(ix, signer_pubkeys, payer_pubkey, data_length=None):
+    # Exact size of the transaction build_transaction_from_instruction would build, without building it
+    versioned = not signer_pubkeys
+    num_signatures, num_account_keys = count_transaction_keys([ix], payer_pubkey if versioned else None)
+    if data_length is None:
+        data_length = len(ix.data)
+    return compute_transaction_size(num_signatures, num_account_keys, len(ix.accounts), data_length, versioned)
+
+def predict_step_size(step):
+    return predict_transaction_size(step.instruction, step.signers, step.provider.pubkey())
+
+def predict_instructions_size(ixs, payer_pubkey, versioned, lookup_tables=()):
+    # Exact size of a transaction with several instructions, v0 ones can load accounts from lookup tables
+    num_signatures, num_account_keys = count_transaction_keys(ixs, payer_pubkey)
+    lookups_size = 0
+    if lookup_tables:
+        versioned = True
+        num_loaded_keys, lookups_size = _compile_lookups(ixs, payer_pubkey, lookup_tables)
+        num_account_keys -= num_loaded_keys
+    size = _message_prefix_size(num_signatures, num_account_keys, versioned) + lookups_size
+    size += shortvec_length(len(ixs))
+    for ix in ixs:
+        size += _instruction_size(len(ix.accounts), len(ix.data))
+    return size
+
+def count_transaction_keys(ixs, payer_pubkey=None):
+    # Signatures and account keys after deduplication, the payer is always a signer
+    key_metas = _collect_key_metas(ixs, payer_pubkey)
+    num_signatures = sum(1 for is_signer, _, _ in key_metas.values() if is_signer)
+    return num_signatures, len(key_metas)
+
+def compute_transaction_size(num_signatures, num_account_keys, num_instruction_accounts, data_length, versioned):
+    # Wire format of a transaction with a single instruction and no address lookup tables
+    return (_message_prefix_size(num_signatures, num_account_keys, versioned) + shortvec_length(1)
+            + _instruction_size(num_instruction_accounts, data_length))
+
+def shortvec_length(value):
+    # Compact-u16 length prefix
+    if value < 0x80:
+        return 1
+    if value < 0x4000:
+        return 2
+    return 3
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _message_prefix_size(num_signatures, num_account_keys, versioned):
+    size = shortvec_length(num_signatures) + SIGNATURE_BYTES * num_signatures
+    size += HEADER_BYTES + shortvec_length(num_account_keys) + PUBKEY_BYTES * num_account_keys + BLOCKHASH_BYTES
+    if versioned:
+        # Version prefix and empty list of address lookup tables
+        size += 2
+    return size
+
+def _collect_key_metas(ixs, payer_pubkey):
+    # Flags of each account key: signer, writable and invoked program
+    key_metas = dict()
+    if payer_pubkey is not None:
+        key_metas[payer_pubkey] = [True, True, False]
+    for ix in ixs:
+        for meta in ix.accounts:
+            flags = key_metas.setdefault(meta.pubkey, [False, False, False])
+            flags[0] = flags[0] or meta.is_signer
+            flags[1] = flags[1] or meta.is_writable
+        key_metas.setdefault(ix.program_id, [False, False, False])[2] = True
+    return key_metas
+
+def _compile_lookups(ixs, payer_pubkey, lookup_tables):
+    # Same as MessageV0 compilation: signers and invoked programs are never loaded, each key is loaded
+    # from the first table containing it and tables without loaded keys are left out.
+    # Returns the loaded keys and the bytes added to the (empty) list of lookups
+    remaining = {key: flags[1] for key, flags in _collect_key_metas(ixs, payer_pubkey).items()
+                 if not flags[0] and not flags[2]}
+    num_loaded_keys = 0
+    num_lookups = 0
+    lookups_size = 0
+    for lookup_table in lookup_tables:
+        table_addresses = set(lookup_table.addresses)
+        loaded = [key for key in remaining if key in table_addresses]
+        if not loaded:
+            continue
+        num_writable = sum(1 for key in loaded if remaining[key])
+        num_readonly = len(loaded) - num_writable
+        for key in loaded:
+            del remaining[key]
+        num_loaded_keys += len(loaded)
+        num_lookups += 1
+        lookups_size += (PUBKEY_BYTES + shortvec_length(num_writable) + num_writable
+                         + shortvec_length(num_readonly) + num_readonly)
+    return num_loaded_keys, lookups_size + shortvec_length(num_lookups) - shortvec_length(0)
+
+def _instruction_size(num_accounts, data_length):
+    # Program ID index, account indexes and data, each list with its length prefix
+    return 1 + shortvec_length(num_accounts) + num_accounts + shortvec_length(data_length) + data_length
+
+def _fetch_idl_args(idl, instruction_name):
+    instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction_name)
+    return instruction_dict.get('args', [])
+
+def _arg_size(idl_type, types):
+    # Returns the fixed bytes of an arg and its variable part, None if the arg has a fixed size
+    size = _fixed_size(idl_type, types)
+    if size is not None:
+        return size, None
+
+    if idl_type in ('string', 'bytes'):
+        return 4, (1, 'characters' if idl_type == 'string' else 'bytes')
+    if isinstance(idl_type, dict):
+        if 'vec' in idl_type:
+            item_size = _fixed_size(idl_type['vec'], types)
+            if item_size is not None:
+                return 4, (item_size, 'items')
+        for option, tag_size in (('option', 1), ('coption', 4)):
+            if option in idl_type:
+                inner_size = _fixed_size(idl_type[option], types)
+                if inner_size is not None:
+                    return tag_size, (inner_size, 'present')
+    # Nested variable sizes (vectors of strings, structs with strings...) are given as encoded bytes
+    return 0, (1, 'encoded bytes')
+
+def _fixed_size(idl_type, types):
+    if isinstance(idl_type, str):
+        if idl_type in PRIMITIVE_FORMATS:
+            return 1 if idl_type in ('bool', 'u8', 'i8') else int(idl_type[1:]) // 8
+        if idl_type in BIG_INTEGER_SIZES:
+            return BIG_INTEGER_SIZES[idl_type][0]
+        if idl_type in ('pubkey', 'publicKey'):
+            return PUBKEY_BYTES
+        return None
+
+    if 'array' in idl_type:
+        inner_type, length = idl_type['array']
+        item_size = _fixed_size(inner_type, types)
+        return item_size * length if item_size is not None else None
+    if 'defined' in idl_type:
+        defined = idl_type['defined']
+        type_def = types.get(defined['name'] if isinstance(defined, dict) else defined)
+        if type_def is None:
+            return None
+        if type_def['kind'] == 'struct':
+            return _fields_size(type_def.get('fields', []), types)
+        if type_def['kind'] == 'enum':
+            # Fixed only when every variant has the same size
+            sizes = {_fields_size(variant.get('fields', []), types) for variant in type_def['variants']}
+            if len(sizes) == 1 and None not in sizes:
+                return 1 + sizes.pop()
+    return None
+
+def _fields_size(fields, types):
+    size = 0
+    for field in fields:
+        field_size = _fixed_size(field['type'] if isinstance(field, dict) else field, types)
+        if field_size is None:
+            return None
+        size += field_size
+    return size
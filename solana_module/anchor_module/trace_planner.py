@@ -0,0 +1,370 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import csv
+import json
+import os
+import re
+from collections import namedtuple
+from solders.instruction import AccountMeta
+from solders.pubkey import Pubkey
+from solana_module.anchor_module.wallet_pool import load_wallet_keypair, is_wallet_name
+from solana_module.anchor_module.anchor_utils import fetch_initialized_programs, fetch_cluster, fetch_program_id, \
+    anchor_base_path
+from solana_module.anchor_module.arg_codec import fetch_instruction_args
+from solana_module.anchor_module.transaction_manager import fetch_instruction_encoder
+from solana_module.anchor_module.size_predictor import predict_transaction_size, PACKET_LIMIT
+
+
+# Step of an execution plan: everything needed to build, price and send its transaction,
+# plus the converted args (not kept by cached plans)
+PlannedStep = namedtuple('PlannedStep', ['step_id', 'program_name', 'instruction_name', 'instruction', 'signers',
+                                         'provider', 'cluster', 'is_deployed', 'send_transaction', 'args'],
+                         defaults=(None,))
+
+# Step of an execution plan waiting for a number of slots
+PlannedWait = namedtuple('PlannedWait', ['slots'])
+
+# Accounts filled by the toolchain, they are not written in traces
+IMPLICIT_ACCOUNTS = ('system_program',)
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def plan_csv_trace(rows):
+    # Returns the list of planned steps and the list of errors found in the whole trace
+    planner = _TracePlanner()
+    steps = []
+    for row_number, row in enumerate(rows, start=1):
+        if not row:
+            continue
+
+        # Slot waiting command
+        if row[0].startswith("S:"):
+            slots = row[0].removeprefix('S:').strip()
+            if not slots.isdigit():
+                planner.errors.append(f"Row {row_number}: invalid number of slots {slots}.")
+            else:
+                steps.append(PlannedWait(int(slots)))
+            continue
+
+        step = _plan_csv_row(planner, row_number, [x.strip() for x in re.split(r"[;,]", row[0])])
+        if step is not None:
+            steps.append(step)
+    return steps, planner.errors
+
+def plan_json_trace(trace, actors):
+    # Returns the list of planned steps and the list of errors found in the whole trace
+    planner = _TracePlanner()
+    steps = []
+    program_name = trace.get("trace_title")
+
+    for index, execution in enumerate(trace.get("trace_execution", []), start=1):
+        step = _plan_json_execution(planner, index, program_name, execution, actors)
+        if step is not None:
+            steps.append(step)
+    return steps, planner.errors
+
+def plan_trace_file(trace_name):
+    # Plan a trace file of the execution_traces folder, CSV or JSON
+    trace_path = f"{anchor_base_path}/execution_traces/{trace_name}"
+    if not os.path.exists(trace_path):
+        raise FileNotFoundError(f"Execution trace {trace_name} not found.")
+
+    if trace_name.lower().endswith('.json'):
+        from solana_module.anchor_module.update_anchor_utils import bind_actors
+        with open(trace_path, 'r', encoding='utf-8') as file:
+            trace = json.load(file)
+        return plan_json_trace(trace, bind_actors(trace_name))
+    with open(trace_path, 'r') as file:
+        return plan_csv_trace(list(csv.reader(file)))
+
+def has_random_accounts(trace):
+    # Plans of JSON traces with random PDAs change at every run
+    return any(isinstance(value, dict) and value.get("opt") == "r"
+               for execution in trace.get("trace_execution", [])
+               for value in (execution.get("solana", {}) | execution.get("args", {})).values())
+
+def fetch_wait_cluster(plan, index):
+    # Cluster of the steps following the wait at index (the previous ones if it is the last), where its slots
+    # are counted. Packed transactions are found by their first step, None if the plan has no step
+    for item in [*plan[index + 1:], *reversed(plan[:index])]:
+        if isinstance(item, PlannedStep):
+            return item.cluster
+        if getattr(item, 'steps', None):
+            return item.steps[0].cluster
+    return None
+
+def print_plan_errors(trace_name, errors):
+    print(f"Execution trace {trace_name} is not valid, nothing has been sent:")
+    for error in errors:
+        print(f"- {error}")
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+class _TracePlanner:
+    # State shared by the steps of a trace: errors, loaded wallets and program clusters
+    __slots__ = ('errors', 'wallets', 'clusters', 'initialized_programs')
+
+    def __init__(self):
+        self.errors = []
+        self.wallets = dict()
+        self.clusters = dict()
+        self.initialized_programs = set(fetch_initialized_programs())
+
+    def load_wallet(self, wallet_name, context):
+        if wallet_name not in self.wallets:
+            self.wallets[wallet_name] = load_wallet_keypair(wallet_name)
+        keypair = self.wallets[wallet_name]
+        if keypair is None:
+            self.errors.append(f"{context}: wallet {wallet_name} not found in solana_wallets or in the wallet pool.")
+        return keypair
+
+    def fetch_encoder(self, program_name, instruction_name, context):
+        if program_name not in self.initialized_programs:
+            self.errors.append(f"{context}: program {program_name} not initialized yet.")
+            return None
+        try:
+            return fetch_instruction_encoder(program_name, instruction_name)
+        except (ValueError, FileNotFoundError) as e:
+            self.errors.append(f"{context}: {e}")
+            return None
+
+    def fetch_cluster(self, program_name):
+        if program_name not in self.clusters:
+            self.clusters[program_name] = fetch_cluster(program_name)
+        return self.clusters[program_name]
+
+    def build_step(self, context, first_error, step_id, program_name, encoder, accounts, signers, args,
+                   remaining_accounts, provider, send_transaction):
+        # Arguments are converted and encoded now, so that type errors are found before sending anything
+        final_args = dict()
+        for compiled_arg in fetch_instruction_args(program_name, encoder.name):
+            if compiled_arg.name not in args:
+                self.errors.append(f"{context}: missing value for arg {compiled_arg.name} ({compiled_arg.description}).")
+                continue
+            try:
+                final_args[compiled_arg.name] = compiled_arg.convert(args[compiled_arg.name])
+            except ValueError as e:
+                self.errors.append(f"{context}: invalid value for arg {compiled_arg.name}: {e}")
+
+        # Errors found while planning this step, it can't be built
+        if len(self.errors) > first_error:
+            return None
+
+        try:
+            instruction = encoder.encode(accounts, final_args, remaining_accounts)
+        except (ValueError, TypeError, OverflowError) as e:
+            self.errors.append(f"{context}: {e}")
+            return None
+
+        # Transactions above the packet limit would be rejected when sent
+        size = predict_transaction_size(instruction, signers, provider.pubkey())
+        if size > PACKET_LIMIT:
+            self.errors.append(f"{context}: transaction would be {size} bytes, above the {PACKET_LIMIT} bytes packet limit.")
+            return None
+
+        cluster, is_deployed = self.fetch_cluster(program_name)
+        return PlannedStep(step_id, program_name, encoder.name, instruction, signers, provider, cluster, is_deployed,
+                           send_transaction, final_args)
+
+def _plan_csv_row(planner, row_number, execution_trace):
+    if len(execution_trace) < 3:
+        planner.errors.append(f"Row {row_number}: expected trace ID, program and instruction.")
+        return None
+    trace_id, program_name, instruction_name = execution_trace[:3]
+    context = f"Execution trace {trace_id}"
+    first_error = len(planner.errors)
+
+    encoder = planner.fetch_encoder(program_name, instruction_name, context)
+    if encoder is None:
+        return None
+
+    # Columns: accounts, remaining accounts (R:), args, provider wallet, send flag
+    required_accounts = _fetch_trace_accounts(encoder)
+    arg_names = encoder.arg_names
+    if len(execution_trace) < 3 + len(required_accounts) + len(arg_names) + 2:
+        planner.errors.append(f"{context}: expected {len(required_accounts)} accounts ({', '.join(required_accounts)}), "
+                              f"{len(arg_names)} args ({', '.join(arg_names)}), provider wallet and send flag.")
+        return None
+
+    accounts = dict()
+    signers = dict()
+    i = 3
+    for account, (is_signer, _) in required_accounts.items():
+        value = execution_trace[i]
+        if value.startswith("W:"):
+            keypair = planner.load_wallet(value.removeprefix('W:'), f"{context}, account {account}")
+            if keypair is not None:
+                accounts[account] = keypair.pubkey()
+                if is_signer:
+                    signers[account] = keypair
+        elif value.startswith("P:") or value.startswith("T:"):
+            if is_signer:
+                planner.errors.append(f"{context}: account {account} must sign, it must be a wallet (W:).")
+            pubkey = _parse_pubkey(planner, value[2:], f"{context}, account {account}")
+            if pubkey is not None:
+                accounts[account] = pubkey
+        else:
+            planner.errors.append(f"{context}: invalid value {value} for account {account}, "
+                                  f"expected W:wallet_name, P:pda_address or T:token_account_address.")
+        i += 1
+
+    remaining_accounts = []
+    while i < len(execution_trace) and execution_trace[i].startswith("R:"):
+        keypair = planner.load_wallet(execution_trace[i].removeprefix('R:'), f"{context}, remaining account")
+        if keypair is not None:
+            remaining_accounts.append(AccountMeta(pubkey=keypair.pubkey(), is_signer=False, is_writable=False))
+        i += 1
+
+    if len(execution_trace) < i + len(arg_names) + 2:
+        planner.errors.append(f"{context}: expected {len(arg_names)} args ({', '.join(arg_names)}), "
+                              f"provider wallet and send flag after the accounts.")
+        return None
+    args = dict(zip(arg_names, execution_trace[i:i + len(arg_names)]))
+    i += len(arg_names)
+
+    provider = planner.load_wallet(execution_trace[i], f"{context}, provider")
+    send_transaction = execution_trace[i + 1].lower() == 'true'
+
+    return planner.build_step(context, first_error, trace_id, program_name, encoder, accounts, signers, args,
+                              remaining_accounts, provider, send_transaction)
+
+def _plan_json_execution(planner, index, program_name, execution, actors):
+    step_id = execution.get("sequence_id", str(index))
+    context = f"Execution trace {step_id}"
+    first_error = len(planner.errors)
+    instruction_name = execution.get("function_name")
+
+    encoder = planner.fetch_encoder(program_name, instruction_name, context)
+    if encoder is None:
+        return None
+
+    # Actors, Solana specific values and args share the same namespace, as in the trace format
+    values = dict(actors) | dict(execution.get("solana", {})) | dict(execution.get("args", {}))
+
+    # Derive PDAs first, seeds can refer to other values of the step
+    for name, value in list(values.items()):
+        if isinstance(value, dict):
+            values[name] = _derive_json_pda(planner, program_name, name, value, values, actors, context)
+
+    required_accounts = _fetch_trace_accounts(encoder)
+    accounts = dict()
+    signers = dict()
+    for account, (is_signer, fixed_address) in required_accounts.items():
+        if account not in values:
+            # Accounts with a fixed address (programs, sysvars) are filled by the encoder
+            if fixed_address is None:
+                planner.errors.append(f"{context}: missing value for account {account}, "
+                                      f"the names on the trace must be the same of the program.")
+            continue
+        value = actors.get(values[account], values[account]) if isinstance(values[account], str) else values[account]
+        if value is None:
+            # PDA derivation failed, the error has already been reported
+            continue
+        elif isinstance(value, Pubkey):
+            pubkey, keypair = value, None
+        elif is_wallet_name(value):
+            keypair = planner.load_wallet(value, f"{context}, account {account}")
+            pubkey = keypair.pubkey() if keypair is not None else None
+        else:
+            pubkey, keypair = _parse_pubkey(planner, str(value), f"{context}, account {account}"), None
+        if pubkey is None:
+            continue
+        accounts[account] = pubkey
+        if is_signer:
+            if keypair is None:
+                planner.errors.append(f"{context}: account {account} must sign, it must be a wallet.")
+            else:
+                signers[account] = keypair
+
+    # Provider can be an actor or a wallet file name
+    provider = None
+    provider_wallet = values.get("provider_wallet")
+    if provider_wallet is None:
+        planner.errors.append(f"{context}: insert the field 'provider_wallet' in the trace.")
+    else:
+        provider = planner.load_wallet(actors.get(provider_wallet, provider_wallet), f"{context}, provider")
+
+    send_transaction = str(values.get("send_transaction", False)).lower() == 'true'
+
+    return planner.build_step(context, first_error, step_id, program_name, encoder, accounts, signers, values, [],
+                              provider, send_transaction)
+
+def _derive_json_pda(planner, program_name, name, value, values, actors, context):
+    # Options: s (seeds in "param"), r (random key), p (key in "param")
+    opt = value.get("opt")
+    params = value.get("param", [])
+    context = f"{context}, PDA {name}"
+
+    if opt == "s":
+        seeds = []
+        for param in params:
+            seed_value = values.get(param, param)
+            if isinstance(seed_value, Pubkey):
+                seeds.append(bytes(seed_value))
+            elif is_wallet_name(seed_value):
+                keypair = planner.load_wallet(seed_value, context)
+                if keypair is None:
+                    return None
+                seeds.append(bytes(keypair.pubkey()))
+            elif isinstance(seed_value, str):
+                seeds.append(seed_value.encode())
+            else:
+                planner.errors.append(f"{context}: seed {param} must be a wallet or a string.")
+                return None
+        try:
+            program_id = fetch_program_id(program_name)
+        except FileNotFoundError as e:
+            planner.errors.append(f"{context}: {e}")
+            return None
+        return Pubkey.find_program_address(seeds, program_id)[0]
+    elif opt == "r":
+        return Pubkey.from_bytes(os.urandom(32))
+    elif opt == "p":
+        if not params:
+            planner.errors.append(f"{context}: write the PDA key in 'param'.")
+            return None
+        return _parse_pubkey(planner, params[0], context)
+    else:
+        planner.errors.append(f"{context}: 'opt' must be one of s (seeds), r (random) or p (PDA key).")
+        return None
+
+def _fetch_trace_accounts(encoder):
+    # Accounts written in the trace, with their signer flag and their fixed address (if any)
+    return {name: (is_signer, fixed_address) for name, _, is_signer, _, fixed_address in encoder.accounts
+            if name not in IMPLICIT_ACCOUNTS}
+
+def _parse_pubkey(planner, value, context):
+    try:
+        return Pubkey.from_string(value)
+    except ValueError:
+        planner.errors.append(f"{context}: invalid address {value}.")
+        return None
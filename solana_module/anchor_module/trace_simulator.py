@@ -0,0 +1,144 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+from solders.account_decoder import UiAccountEncoding
+from solders.rpc.config import RpcSimulateTransactionConfig, RpcSimulateTransactionAccountsConfig
+from solders.rpc.requests import SimulateLegacyTransaction, SimulateVersionedTransaction
+from solders.rpc.responses import SimulateTransactionResp
+from solders.transaction import VersionedTransaction
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.trace_planner import PlannedStep
+from solana_module.anchor_module.transaction_manager import build_offline_transaction, fetch_fee_payer
+from solana_module.anchor_module.compute_profiler import parse_compute_logs
+
+
+# Steps simulated at the same time
+DEFAULT_CONCURRENCY = 8
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def simulate_plan(plan, concurrency=DEFAULT_CONCURRENCY, cluster=None):
+    # Every step is simulated on its own against the current state of the cluster. Nothing lands, so the
+    # steps don't need to be ordered and run concurrently: steps depending on the changes of previous
+    # steps (e.g. an account initialized earlier in the trace) fail as they would if sent alone
+    steps = [step for step in plan if isinstance(step, PlannedStep)]
+    clients = dict()
+    for step in steps:
+        if (cluster or step.cluster) not in clients:
+            clients[cluster or step.cluster] = create_client(cluster or step.cluster)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def simulate(step):
+        async with semaphore:
+            return await simulate_step(clients[cluster or step.cluster], step)
+
+    try:
+        return await asyncio.gather(*(simulate(step) for step in steps))
+    finally:
+        for client in clients.values():
+            await client.close()
+
+async def simulate_step(client, step):
+    # The blockhash is replaced by the node and signatures aren't verified, so the transaction is built
+    # offline and no signer is needed
+    result = {'step_id': step.step_id, 'program': step.program_name, 'instruction': step.instruction_name}
+    payer = fetch_fee_payer(step.instruction, step.signers, step.provider).pubkey()
+    signer_pubkeys = [keypair.pubkey() for keypair in step.signers.values()]
+    transaction = build_offline_transaction(step.instruction, signer_pubkeys, payer)
+    addresses = list(dict.fromkeys([payer] + [meta.pubkey for meta in step.instruction.accounts if meta.is_writable]))
+
+    try:
+        accounts_before = (await client.get_multiple_accounts(addresses)).value
+        response = await client._provider.make_request(_simulate_transaction_body(transaction, addresses),
+                                                       SimulateTransactionResp)
+        simulation = response.value
+    except Exception as e:
+        result.update({'success': False, 'error': f"{type(e).__name__}: {e}"})
+        return result
+
+    result.update({
+        'success': simulation.err is None,
+        'error': str(simulation.err) if simulation.err is not None else None,
+        'units_consumed': simulation.units_consumed,
+        'invocations': parse_compute_logs(simulation.logs or []),
+        'account_changes': compare_accounts(addresses, accounts_before, simulation.accounts or []),
+        'logs': simulation.logs or [],
+    })
+    return result
+
+def compare_accounts(addresses, accounts_before, accounts_after):
+    # Writable accounts whose lamports, data or owner would change (None is an account that doesn't exist)
+    changes = []
+    for address, before, after in zip(addresses, accounts_before, accounts_after):
+        if before == after:
+            continue
+        change = {'address': str(address),
+                  'lamports_change': (after.lamports if after else 0) - (before.lamports if before else 0)}
+        if before is None:
+            change['status'] = 'created'
+        elif after is None or after.lamports == 0:
+            change['status'] = 'closed'
+        else:
+            change['status'] = 'modified'
+        if after is not None:
+            change['data_length'] = len(after.data)
+            change['data_changed'] = before is None or bytes(before.data) != bytes(after.data)
+            change['owner'] = str(after.owner)
+        changes.append(change)
+    return changes
+
+def format_simulation_report(results):
+    lines = [f"{'step':>6}  {'instruction':<24}  {'result':<8}  {'CU':>8}  changed accounts"]
+    for result in results:
+        changed = ', '.join(f"{change['address'][:8]}.. {change['status']} {change['lamports_change']:+}"
+                            for change in result.get('account_changes', []))
+        units = result.get('units_consumed')
+        lines.append(f"{result['step_id']:>6}  {result['instruction']:<24}  "
+                     f"{'ok' if result['success'] else 'failed':<8}  {units if units is not None else '-':>8}  {changed}")
+        if result['error'] is not None:
+            lines.append(f"{'':>6}  {result['error']}")
+    succeeded = sum(result['success'] for result in results)
+    lines.append(f"{succeeded}/{len(results)} steps would succeed")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _simulate_transaction_body(transaction, addresses):
+    # Not exposed by the RPC client, which always keeps the blockhash of the transaction
+    config = RpcSimulateTransactionConfig(
+        sig_verify=False,
+        replace_recent_blockhash=True,
+        accounts=RpcSimulateTransactionAccountsConfig(addresses, UiAccountEncoding.Base64),
+    )
+    if isinstance(transaction, VersionedTransaction):
+        return SimulateVersionedTransaction(transaction, config)
+    return SimulateLegacyTransaction(transaction, config)
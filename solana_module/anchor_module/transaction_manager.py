@@ -21,23 +21,44 @@
 # THE SOFTWARE.
 
 
-import sys
-from pathlib import Path
-import importlib
-from solders.message import MessageV0
-from solders.transaction import VersionedTransaction
+import asyncio
+import time
+from solders.hash import Hash
+from solders.message import Message, MessageV0
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction, Transaction as UnsignedTransaction
+from solders.transaction_status import TransactionConfirmationStatus
+from solana.rpc.types import TxOpts
 from solana.transaction import Transaction
-from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.anchor_utils import load_cached_idl, fetch_source_idl_path, fetch_program_id
+from solana_module.anchor_module.instruction_encoder import compile_instruction_encoder
+
+
+# Base fee charged for each signature of a transaction
+LAMPORTS_PER_SIGNATURE = 5000
+
+# Seconds waited for a sent transaction to be confirmed
+CONFIRMATION_TIMEOUT = 60
+
+# Compiled instruction encoders, keyed by IDL modification time to follow re-compilations
+_instruction_encoders = dict()
 
 
 # ====================================================
 # PUBLIC FUNCTIONS
 # ====================================================
 
-async def build_transaction(program_name, instruction, accounts, args, signer_account_keypairs, client, provider):
-    # Get instruction from anchorpy
-    function = _import_function(program_name, instruction)
-    ix = _prepare_function(accounts, args, function)
+async def build_transaction(program_name, instruction, accounts, args, signer_account_keypairs, client, provider, remaining_accounts=None):
+    # Encode instruction directly from the IDL
+    ix = build_instruction(program_name, instruction, accounts, args, remaining_accounts)
+    return await build_transaction_from_instruction(ix, signer_account_keypairs, client, provider)
+
+async def build_transaction_from_instruction(ix, signer_account_keypairs, client, provider, lookup_tables=()):
+    # With lookup tables the transaction is always v0, paid by the same wallet as without them
+    if lookup_tables:
+        payer = fetch_fee_payer(ix, signer_account_keypairs, provider.wallet.payer)
+        return await build_packed_transaction([ix], signer_account_keypairs.values(), payer, True, client,
+                                              lookup_tables)
 
     # Get latest blockhash
     resp = await client.get_latest_blockhash()
@@ -67,12 +88,71 @@ async def build_transaction(program_name, instruction, accounts, args, signer_ac
 
     return tx
 
+async def build_packed_transaction(ixs, keypairs, payer, versioned, client, lookup_tables=()):
+    # Transaction with several instructions, signed by the payer and by the signers the instructions require
+    resp = await client.get_latest_blockhash()
+    blockhash = resp.value.blockhash
+
+    required_signers = {meta.pubkey for ix in ixs for meta in ix.accounts if meta.is_signer}
+    required_signers.add(payer.pubkey())
+    signers = list({keypair.pubkey(): keypair for keypair in [payer] + list(keypairs)
+                    if keypair.pubkey() in required_signers}.values())
+
+    if not versioned and not lookup_tables:
+        tx = Transaction(fee_payer=payer.pubkey()).add(*ixs)
+        tx.recent_blockhash = blockhash
+        tx.sign(*signers)
+    else:
+        msg = MessageV0.try_compile(
+            payer=payer.pubkey(),
+            instructions=ixs,
+            address_lookup_table_accounts=list(lookup_tables),
+            recent_blockhash=blockhash
+        )
+        tx = VersionedTransaction(msg, signers)
+
+    return tx
+
+def fetch_fee_payer(ix, signer_account_keypairs, provider_keypair):
+    # Without signers the provider pays, otherwise the first writable signer does (the first signer if none is writable)
+    if not signer_account_keypairs:
+        return provider_keypair
+    keypairs = {keypair.pubkey(): keypair for keypair in signer_account_keypairs.values()}
+    signer_metas = sorted([meta for meta in ix.accounts if meta.is_signer and meta.pubkey in keypairs],
+                          key=lambda meta: not meta.is_writable)
+    if signer_metas:
+        return keypairs[signer_metas[0].pubkey]
+    return next(iter(keypairs.values()))
+
+def build_offline_transaction(ix, signer_pubkeys, payer_pubkey):
+    # Same layout as build_transaction_from_instruction, with a default blockhash and placeholder signatures:
+    # the size is exact and no RPC call is needed
+    if signer_pubkeys:
+        msg = Message.new_with_blockhash([ix], None, Hash.default())
+        return UnsignedTransaction.populate(msg, [Signature.default()] * msg.header.num_required_signatures)
+
+    msg = MessageV0.try_compile(
+        payer=payer_pubkey,
+        instructions=[ix],
+        address_lookup_table_accounts=[],
+        recent_blockhash=Hash.default()
+    )
+    return VersionedTransaction.populate(msg, [Signature.default()] * msg.header.num_required_signatures)
+
+def estimate_base_fee(tx):
+    # Fee without priority fees, as returned by get_fee_for_message
+    return LAMPORTS_PER_SIGNATURE * tx.message.header.num_required_signatures
+
+def build_instruction(program_name, instruction, accounts, args, remaining_accounts=None):
+    encoder = fetch_instruction_encoder(program_name, instruction)
+    return encoder.encode(accounts, args, remaining_accounts)
+
 def measure_transaction_size(tx):
     # Check transaction type
     if isinstance(tx, Transaction):
         # Compute transaction size
         serialized_tx = tx.serialize()
-    elif isinstance(tx, VersionedTransaction):
+    elif isinstance(tx, (VersionedTransaction, UnsignedTransaction)):
         # Manually serialize transaction
         serialized_tx = bytes(tx)
     else:
@@ -102,56 +182,31 @@ async def compute_transaction_fees(client, tx):
 async def send_transaction(provider, tx):
     return await provider.send(tx)
 
-
-
-
-# ====================================================
-# PRIVATE FUNCTIONS
-# ====================================================
-
-def _import_function(program_name: str, instruction_name: str):
-    # Update absolute path in the root folder of the package
-    program_root = Path(f"{anchor_base_path}/.anchor_files/{program_name}").resolve()
-
-    if not program_root.exists():
-        raise FileNotFoundError(f"The folder {program_root} does not exist. Check program name")
-
-    # Path to the instruction
-    module_path = program_root / "anchorpy_files" / "instructions" / f"{instruction_name}.py"
-
-    if not module_path.exists():
-        raise FileNotFoundError(f"The file {module_path} does not exist. Verify instruction name.")
-
-    # Add program root to sys.path to enable relative imports
-    if str(program_root) not in sys.path:
-        sys.path.append(str(program_root))
-
-    # Complete name of the module to import
-    module_name = f"anchorpy_files.instructions.{instruction_name}"
-
-    # Dynamic import of the module
-    module = importlib.import_module(module_name)
-
-    # Verify that the function exists
-    if not hasattr(module, instruction_name):
-        raise AttributeError(f"The module {module_name} does not contain the function {instruction_name}.")
-
-    return getattr(module, instruction_name)
-
-def _prepare_function(accounts, args, function):
-    if accounts:
-        if args:
-            # Call instruction with given accounts and args
-            ix = function(accounts=accounts, args=args)
-        else:
-            # Call instruction only with given accounts
-            ix = function(accounts=accounts)
-    else:
-        if args:
-            # Call instruction with given accounts and args
-            ix = function(args=args)
-        else:
-            # Call instruction only with given accounts
-            ix = function()
-
-    return  ix
\ No newline at end of file
+async def submit_transaction(client, tx, skip_preflight=False):
+    # Sends without waiting for the confirmation, which can be awaited with wait_for_confirmation
+    raw = tx.serialize() if isinstance(tx, Transaction) else bytes(tx)
+    response = await client.send_raw_transaction(raw, opts=TxOpts(skip_confirmation=True, skip_preflight=skip_preflight))
+    return response.value
+
+async def wait_for_confirmation(client, signature, timeout=CONFIRMATION_TIMEOUT, poll_interval=0.2):
+    # Status of the transaction once confirmed (or failed), None if it isn't confirmed before the timeout
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        status = (await client.get_signature_statuses([signature])).value[0]
+        if status is not None and (status.err is not None or status.confirmation_status in
+                                   (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)):
+            return status
+        await asyncio.sleep(poll_interval)
+    return None
+
+def fetch_instruction_encoder(program_name, instruction_name):
+    idl_file_path = fetch_source_idl_path(program_name)
+    idl, modification_time = load_cached_idl(idl_file_path)
+
+    # Compile the encoder only the first time the instruction is used
+    key = (program_name, instruction_name, modification_time)
+    encoder = _instruction_encoders.get(key)
+    if encoder is None:
+        encoder = compile_instruction_encoder(idl, instruction_name, fetch_program_id(program_name, idl))
+        _instruction_encoders[key] = encoder
+    return encoder
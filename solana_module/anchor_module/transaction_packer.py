@@ -0,0 +1,202 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from collections import namedtuple
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.trace_planner import PlannedWait, fetch_wait_cluster
+from solana_module.anchor_module.transaction_manager import build_packed_transaction, \
+    fetch_fee_payer, LAMPORTS_PER_SIGNATURE
+from solana_module.anchor_module.size_predictor import predict_instructions_size, count_transaction_keys, PACKET_LIMIT
+from solana_module.anchor_module.delivery_engine import deliver_transaction
+
+
+# Compute units available to a transaction, and allocated by default to each instruction
+MAX_TRANSACTION_COMPUTE_UNITS = 1_400_000
+DEFAULT_INSTRUCTION_COMPUTE_UNITS = 200_000
+
+# Consecutive steps of a plan sent as a single transaction
+PackedTransaction = namedtuple('PackedTransaction', ['steps', 'payer', 'keypairs', 'versioned', 'size_bytes',
+                                                     'num_signatures', 'compute_units'])
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def pack_plan(plan, compute_units=None):
+    # Consecutive compatible steps are greedily packed, waits are barriers and the order of the steps is kept
+    # (instructions of a transaction run in order). Compute units can be given by step ID, e.g. measured ones
+    compute_units = compute_units or {}
+    packed = []
+    current = None
+    for step in plan:
+        if isinstance(step, PlannedWait):
+            packed.append(step)
+            current = None
+            continue
+
+        units = compute_units.get(step.step_id, DEFAULT_INSTRUCTION_COMPUTE_UNITS)
+        extended = _extend_packed_transaction(current, step, units) if current is not None else None
+        if extended is not None:
+            packed[-1] = current = extended
+        else:
+            current = _new_packed_transaction(step, units)
+            packed.append(current)
+    return packed
+
+def summarize_packing(packed):
+    # Totals of the plan sent one step per transaction and packed, fees are base fees (no priority fees)
+    unpacked_totals = {'transactions': 0, 'size_bytes': 0, 'fee_lamports': 0}
+    packed_totals = {'transactions': 0, 'size_bytes': 0, 'fee_lamports': 0}
+    transactions = []
+    for packed_transaction in packed:
+        if isinstance(packed_transaction, PlannedWait):
+            continue
+        fee = LAMPORTS_PER_SIGNATURE * packed_transaction.num_signatures
+        packed_totals['transactions'] += 1
+        packed_totals['size_bytes'] += packed_transaction.size_bytes
+        packed_totals['fee_lamports'] += fee
+        transactions.append({'step_ids': [step.step_id for step in packed_transaction.steps],
+                             'size_bytes': packed_transaction.size_bytes, 'fee_lamports': fee,
+                             'compute_units': packed_transaction.compute_units})
+
+        for step in packed_transaction.steps:
+            single = _new_packed_transaction(step, 0)
+            unpacked_totals['transactions'] += 1
+            unpacked_totals['size_bytes'] += single.size_bytes
+            unpacked_totals['fee_lamports'] += LAMPORTS_PER_SIGNATURE * single.num_signatures
+
+    savings = {key: unpacked_totals[key] - packed_totals[key] for key in unpacked_totals}
+    return {'unpacked': unpacked_totals, 'packed': packed_totals, 'savings': savings, 'transactions': transactions}
+
+def format_packing_report(summary):
+    lines = []
+    for transaction in summary['transactions']:
+        step_ids = ', '.join(str(step_id) for step_id in transaction['step_ids'])
+        lines.append(f"Transaction of steps {step_ids}: {transaction['size_bytes']} bytes, {transaction['fee_lamports']} lamports, "
+                     f"{transaction['compute_units']} compute units")
+    for label in ('unpacked', 'packed', 'savings'):
+        totals = summary[label]
+        lines.append(f"{label.capitalize()}: {totals['transactions']} transactions, {totals['size_bytes']} bytes, "
+                     f"{totals['fee_lamports']} lamports")
+    return "\n".join(lines)
+
+async def send_packed_plan(packed):
+    # Send the packed transactions in order, returns the hash (or status) of each one
+    results = []
+    clients = dict()
+    try:
+        for index, packed_transaction in enumerate(packed):
+            if isinstance(packed_transaction, PlannedWait):
+                await wait_planned_slots(packed, index, clients)
+                continue
+
+            first_step = packed_transaction.steps[0]
+            step_ids = [step.step_id for step in packed_transaction.steps]
+            if not first_step.send_transaction:
+                results.append({'step_ids': step_ids, 'transaction_hash': 'Transaction not sent'})
+                continue
+            if not first_step.is_deployed:
+                results.append({'step_ids': step_ids, 'transaction_hash': 'Program not deployed with toolchain'})
+                continue
+
+            # One client for each cluster, reused by all the transactions
+            cluster = first_step.cluster
+            if cluster not in clients:
+                clients[cluster] = create_client(cluster)
+
+            def build():
+                return build_packed_transaction([step.instruction for step in packed_transaction.steps],
+                                                packed_transaction.keypairs, packed_transaction.payer,
+                                                packed_transaction.versioned, clients[cluster])
+
+            delivery = await deliver_transaction(clients[cluster], await build(), build)
+            print(f"Packed transaction of steps {', '.join(str(step_id) for step_id in step_ids)} {delivery.outcome}!")
+            results.append({'step_ids': step_ids, 'transaction_hash': delivery.signature, 'outcome': delivery.outcome,
+                            'attempts': delivery.attempts})
+    finally:
+        for client in clients.values():
+            await client.close()
+    return results
+
+async def wait_planned_slots(plan, index, clients, cluster=None):
+    # Waits the slots of the PlannedWait at index of a plan (or packed plan) on the cluster of its steps,
+    # unless another cluster is given. Clients are created in clients, by cluster, and closed by the caller
+    from solana_module.anchor_module.automatic_data_insertion_manager import wait_for_slots
+
+    cluster = cluster or fetch_wait_cluster(plan, index)
+    if cluster is None:
+        return
+    if cluster not in clients:
+        clients[cluster] = create_client(cluster)
+    await wait_for_slots(clients[cluster], plan[index].slots)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _new_packed_transaction(step, units):
+    # Same layout build_transaction_from_instruction uses for a single step
+    payer = fetch_fee_payer(step.instruction, step.signers, step.provider)
+    versioned = not step.signers
+    keypairs = tuple(step.signers.values())
+    size = predict_instructions_size([step.instruction], payer.pubkey(), versioned)
+    num_signatures = count_transaction_keys([step.instruction], payer.pubkey())[0]
+    return PackedTransaction((step,), payer, keypairs, versioned, size, num_signatures, units)
+
+def _extend_packed_transaction(packed_transaction, step, units):
+    # Returns the packed transaction with the step added, None if the step is not compatible
+    first_step = packed_transaction.steps[0]
+    if (step.cluster, step.is_deployed, step.send_transaction) != \
+            (first_step.cluster, first_step.is_deployed, first_step.send_transaction):
+        return None
+    if step.provider.pubkey() != first_step.provider.pubkey():
+        return None
+    payer = packed_transaction.payer
+    if fetch_fee_payer(step.instruction, step.signers, step.provider).pubkey() != payer.pubkey():
+        return None
+
+    # Every signer required by the instructions must have its keypair
+    keypairs = packed_transaction.keypairs + tuple(step.signers.values())
+    available_signers = {keypair.pubkey() for keypair in keypairs}
+    available_signers.add(payer.pubkey())
+    if any(meta.is_signer and meta.pubkey not in available_signers for meta in step.instruction.accounts):
+        return None
+
+    compute_units = packed_transaction.compute_units + units
+    if compute_units > MAX_TRANSACTION_COMPUTE_UNITS:
+        return None
+
+    # Signed steps need a legacy transaction, as they do when sent alone
+    versioned = packed_transaction.versioned and not step.signers
+    ixs = [packed_step.instruction for packed_step in packed_transaction.steps] + [step.instruction]
+    size = predict_instructions_size(ixs, payer.pubkey(), versioned)
+    if size > PACKET_LIMIT:
+        return None
+
+    num_signatures = count_transaction_keys(ixs, payer.pubkey())[0]
+    return PackedTransaction(packed_transaction.steps + (step,), payer, keypairs, versioned, size, num_signatures,
+                             compute_units)
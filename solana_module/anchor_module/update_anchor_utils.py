@@ -24,12 +24,13 @@
 import os
 import json
 import re
-import toml
 import importlib
 import importlib.util
 from based58 import b58encode
 from solders.pubkey import Pubkey
 from solana_module.solana_utils import solana_base_path, choose_wallet, load_keypair_from_file, selection_menu
+from solana_module.anchor_module.program_registry import fetch_registered_programs, fetch_registered_program
+from solana_module.anchor_module.wallet_pool import fetch_pool_wallet_names
 from solana.rpc.async_api import AsyncClient
 
 
@@ -43,24 +44,8 @@ anchor_base_path = f"{solana_base_path}/anchor_module"
 # ====================================================
 
 def fetch_initialized_programs():
-    path_to_explore = f"{anchor_base_path}/.anchor_files"
-    programs_with_anchorpy_files = []
-
-    # Check if the base directory exists before proceeding
-    if not os.path.exists(path_to_explore):
-        return programs_with_anchorpy_files
-
-    # Iterate program folders
-    for program in os.listdir(path_to_explore):
-        program_path = os.path.join(path_to_explore, program)
-
-        # Check if anchorpy_files folder is present
-        if os.path.isdir(program_path):
-            anchorpy_path = os.path.join(program_path, 'anchorpy_files')
-            if os.path.isdir(anchorpy_path):
-                programs_with_anchorpy_files.append(program)
-
-    return programs_with_anchorpy_files
+    # Programs with anchorpy files, as recorded in the program registry
+    return fetch_registered_programs()
 
 def fetch_program_instructions(idl):
     instructions = []
@@ -95,9 +80,8 @@ def choose_instruction(idl):
         return selection_menu('instruction', instructions)
 
 def fetch_cluster(program_name):
-    file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
-    config = toml.load(file_path)
-    cluster = config['provider']['cluster']
+    # Cluster of the last deploy made through the toolchain
+    cluster = fetch_registered_program(program_name).get('cluster')
     if cluster == "Localnet" or cluster == "Devnet" or cluster == "Mainnet":
         return cluster, True
     else:
@@ -243,7 +227,12 @@ def bind_actors(trace_name):
     trace_actors  = data["trace_actors"]
     wallets_path = f'{solana_base_path}/solana_wallets'
     wallets = os.listdir(wallets_path)
-    
+
+    # Traces with more actors than wallet files use the wallet pool, if it is large enough
+    pool_wallet_names = fetch_pool_wallet_names()
+    if len(wallets) <= len(trace_actors) <= len(pool_wallet_names):
+        wallets = [None] + pool_wallet_names
+
 
     try:
         for j in range(len(trace_actors)):
@@ -1,22 +1,17 @@
 
 import os
-import re
 import json
-import asyncio
-from solders.pubkey import Pubkey
 from anchorpy import Wallet, Provider
-from solana_module.anchor_module.transaction_manager import build_transaction, measure_transaction_size, \
-    compute_transaction_fees, send_transaction
-from solana_module.solana_utils import load_keypair_from_file, solana_base_path, create_client, selection_menu
-from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs, \
-    fetch_program_instructions, fetch_required_accounts, fetch_signer_accounts, fetch_args, check_type, convert_type, \
-    fetch_cluster, load_idl, check_if_array , check_if_vec , bind_actors , is_pda , build_complete_dict , generate_pda_automatically , find_sol_arg , \
-    get_network_from_client , find_args
-
-from spl.token.async_client import AsyncToken
-from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
-from solders.pubkey import Pubkey as SoldersPubkey
-from solana.rpc.async_api import AsyncClient
+from solana_module.anchor_module.transaction_manager import build_transaction_from_instruction, \
+    measure_transaction_size, compute_transaction_fees
+from solana_module.solana_utils import create_client, selection_menu
+from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs
+from solana_module.anchor_module.update_anchor_utils import bind_actors, get_network_from_client
+from solana_module.anchor_module.trace_planner import plan_json_trace, print_plan_errors, has_random_accounts
+from solana_module.anchor_module.lookup_tables import load_lookup_tables
+from solana_module.anchor_module.compute_profiler import simulate_compute_units
+from solana_module.anchor_module.delivery_engine import deliver_transaction
+from solana_module.anchor_module.plan_cache import compute_plan_key, load_cached_plan, save_cached_plan
 
 # ====================================================
 # PUBLIC FUNCTIONS
@@ -29,235 +24,119 @@ async def run_execution_trace():
         print("No program has been initialized yet.")
         return
 
-    results = []
-
     execution_traces = _find_execution_traces()
     file_name = selection_menu('execution trace', execution_traces)
     if file_name is None:
         return
-    json_file = _read_json(f"{anchor_base_path}/execution_traces/{file_name}")
-    actors = bind_actors(file_name)
-   
-
-    # Create async client outside the loop
-    client = AsyncClient("https://api.devnet.solana.com")
-    #search fotr the network
-    network = get_network_from_client(client)
-    progrma_name = json_file["trace_title"]
-
-    try:
-        # For each execution trace
-        for trace in json_file["trace_execution"]:
-
-            args = find_args(trace) 
-            print(f"\n\n\n{args}\n\n\n")
-            sol_args = find_sol_arg(trace)
-            
-            complete_dict = generate_pda_automatically(actors ,progrma_name , sol_args , args)
-
-            
-            
-
-            # Get execution trace ID
-            trace_id = trace["sequence_id"]
-            print(f"Working on execution trace with ID {trace_id}...")
-
-            # Manage program
-            program_name = json_file["trace_title"]
-            if program_name not in initialized_programs:
-                print(f"Program {program_name} not initialized yet (execution trace {trace_id}).")
-                return
-
-            # Manage instruction
-            idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
-            idl = load_idl(idl_file_path)
-            instructions = fetch_program_instructions(idl)
-            instruction = trace["function_name"]
-            if instruction not in instructions:
-                print(f"Instruction {instruction} not found for the program {program_name} (execution trace {trace_id}).")
-
-            # Manage accounts
-            required_accounts = fetch_required_accounts(instruction, idl)
-            signer_accounts = fetch_signer_accounts(instruction, idl)
-            final_accounts = dict()
-            signer_accounts_keypairs = dict()
-
-
-            # Initialize remaining accounts list
-            remaining_accounts = []
-            from solders.instruction import AccountMeta
-            
-            
-            for account in required_accounts:
-                # If it is a wallet
-
-                if not is_pda(complete_dict[account]):
-                    
-                    
-                    file_path = f"{solana_base_path}/solana_wallets/{complete_dict[account]}"
-
-
-                    keypair = load_keypair_from_file(file_path)
-                    if keypair is None:
-                        print(f"Wallet for account {account} not found at path {file_path}.")
-
+    return await execute_execution_trace(file_name)
 
-                        return
-                    if account in signer_accounts:
-                        signer_accounts_keypairs[account] = keypair
-                    final_accounts[account] = keypair.pubkey()
-
-
-                # If it is a PDA
-                elif is_pda(complete_dict[account]):
-                    
-                    try:
-                        pda_key = Pubkey.from_string(complete_dict[account])
-                        final_accounts[account] = pda_key
-                    except Exception as e:
-                        print(f"Invalid PDA key format for account {account}: {extracted_key}. Error: {e}")
-                        return
-                # If it is a Token Account (manual input)
-                #elif execution_trace[i].startswith("T:"):
-                #    extracted_key = execution_trace[i].removeprefix('T:')
-                #    try:
-                #        token_account_key = Pubkey.from_string(extracted_key)
-                #        final_accounts[account] = token_account_key
-                #        print(f"Token account {account} added with address: {token_account_key}")
-                #    except Exception as e:
-                #        print(f"Invalid token account key format for account {account}: {extracted_key}. Error: {e}")
-                #        return
-                else:
-                    print("work on errors")
-                    return
-                
-
-            # Manage args
-            required_args = fetch_args(instruction, idl)
-            final_args = dict()
-            for arg in required_args:
-                
-               
-                # Manage arrays
-                array_type, array_length = check_if_array(arg)
-                vec_type = check_if_vec(arg)
-                if array_type is not None and array_length is not None:
-                    array_values = complete_dict[arg].split()
-
-                    # Check if array has correct length
-                    if len(array_values) != array_length:
-                        print(f"Error: Expected array of length {array_length}, but got {len(array_values)}")
-                        return
+async def execute_execution_trace(file_name):
+    # Fetch initialized programs
+    initialized_programs = fetch_initialized_programs()
+    if len(initialized_programs) == 0:
+        print("No program has been initialized yet.")
+        return
 
-                    # Convert array elements basing on the type
-                    valid_values = []
-                    for j in range(len(array_values)):
-                        converted_value = convert_type(array_type, array_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j} in the array. Please try again.")
-                            return
+    results = []
 
-                    final_args[arg['name']] = valid_values
-                #vectors handling
-                elif vec_type is not None:
-                    vec_values = complete_dict[arg].split()
-                    #check if vec has more than zero 
-                    if len(vec_values) == 0:
-                        print("vec cannot have zero elements")
-                        return
-                    
-                    # Convert vec elements basing on the type
-                    valid_values = []
-                    for j in range(len(vec_values)):
-                        converted_value = convert_type(vec_type, vec_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j} in the vector. Please try again.")
-                            return
+    trace_path = f"{anchor_base_path}/execution_traces/{file_name}"
+    json_file = _read_json(trace_path)
+    if json_file is None:
+        print(f"Execution trace {file_name} not found.")
+        return
 
-                    final_args[arg['name']] = valid_values
+    # Planning phase: the whole trace is resolved and validated before sending anything,
+    # unless the same trace has already been planned with the same programs and wallets
+    plan_key = compute_plan_key(trace_path)
+    plan = load_cached_plan(plan_key)
+    if plan is None:
+        actors = bind_actors(file_name)
+        plan, errors = plan_json_trace(json_file, actors)
+        if errors:
+            print_plan_errors(file_name, errors)
+            return
+        if not has_random_accounts(json_file):
+            save_cached_plan(plan_key, plan)
+    else:
+        print(f"Using the cached plan of {file_name}.")
 
-                # Manage classical args
-                else:
-                    type = check_type(arg["type"])
-                    if type is None:
-                        print(f"Unsupported type for arg {arg['name']}")
-                        return
+    # Create async client outside the loop
+    client = create_client("Devnet")
+    #search fotr the network
+    network = get_network_from_client(client)
+    clients_for_transaction = dict()
+    lookup_tables = dict()
 
-                    if type == "bytes":      
-                            aux = complete_dict[arg['name']].encode('utf-8')
-                            final_args[arg['name']] = aux
-                            
-                    else:
-                        try:
-                            converted_value = convert_type(type, complete_dict[arg['name']])
-                            final_args[arg['name']] = converted_value
-                        except KeyError as e :
-                            print(f"The names on the trace and the names on the contract must be the same , the error is caused by {e} ")
-                            
+    try:
+        # For each planned step
+        for step in plan:
+            print(f"Working on execution trace with ID {step.step_id}...")
 
-                
+            # One client for each cluster, reused by all the steps
+            if step.cluster not in clients_for_transaction:
+                clients_for_transaction[step.cluster] = create_client(step.cluster)
+            client_for_transaction = clients_for_transaction[step.cluster]
+            provider = Provider(client_for_transaction, Wallet(step.provider))
 
-            # Manage provider
-            try :
-                provider_keypair_path = f"{solana_base_path}/solana_wallets/{complete_dict["provider_wallet"]})"
-                keypair = load_keypair_from_file(provider_keypair_path)
-                if keypair is None:
-                    print("Provider wallet not found. Transaction cannot be sent.")
-            except KeyError :
-                print("Provider wallet not found.Insert the field 'provider_wallet' in the json trace")
-                return
-                
-            cluster, is_deployed = fetch_cluster(program_name)
-            client_for_transaction = create_client(cluster)
-            provider_wallet = Wallet(keypair)
-            provider = Provider(client_for_transaction, provider_wallet)
+            # Lookup table created for the program, if any, loaded once for each program and cluster
+            lookup_key = (step.program_name, step.cluster)
+            if lookup_key not in lookup_tables:
+                lookup_tables[lookup_key] = await load_lookup_tables(client_for_transaction, *lookup_key)
 
             start_slot = (await client.get_slot()).value
 
-            transaction = await build_transaction(program_name, instruction, final_accounts, final_args, 
-                                                signer_accounts_keypairs, client_for_transaction, provider)
+            transaction = await build_transaction_from_instruction(step.instruction, step.signers,
+                                                                   client_for_transaction, provider,
+                                                                   lookup_tables[lookup_key])
 
             end_slot = (await client.get_slot()).value
             elapsed_slots = end_slot - start_slot
 
-
             size = measure_transaction_size(transaction)
             fees = await compute_transaction_fees(client_for_transaction, transaction)
+            compute_units = await simulate_compute_units(client_for_transaction, transaction) or {}
 
             # json building
-
-
-            
-            if str(complete_dict["send_transaction"]).lower() == 'true':
-                if is_deployed:
-                    transaction_hash = await send_transaction(provider, transaction)
-                    
+            transaction_hash = "Transaction not sent"
+            delivery = None
+            if step.send_transaction:
+                if step.is_deployed:
+                    # Rebuilt with a fresh blockhash only if it expires without landing
+                    delivery = await deliver_transaction(
+                        client_for_transaction, transaction,
+                        lambda: build_transaction_from_instruction(step.instruction, step.signers, client_for_transaction,
+                                                                   provider, lookup_tables[lookup_key]))
+                    transaction_hash = delivery.signature
                 else:
                     transaction_hash = "program is not deployed"
 
-            json_action = {"sequence_id" : trace_id ,
-                            "function_name": instruction ,
+            json_action = {"sequence_id" : step.step_id ,
+                            "function_name": step.instruction_name ,
                             "transaction_size_bytes": size,
                             "transaction_fees_lamports": fees,
+                            "compute_units": compute_units.get('units_consumed'),
+                            "compute_unit_invocations": compute_units.get('invocations', []),
+                            "lookup_table": str(lookup_tables[lookup_key][0].key) if lookup_tables[lookup_key] else None,
                             "transaction_hash": f"{transaction_hash}",
+                            "delivery_outcome": delivery.outcome if delivery else None,
+                            "delivery_attempts": delivery.attempts if delivery else 0,
                             "execution_time_in_slots": elapsed_slots
                         }
 
             # Append results
             results.append(json_action)
-            print(f"Execution trace {trace["sequence_id"]} results computed!")
+            print(f"Execution trace {step.step_id} results computed!")
 
     finally:
         await client.close()
+        for client_for_transaction in clients_for_transaction.values():
+            await client_for_transaction.close()
 
     # CSV writing
     file_name_without_extension = file_name.removesuffix(".json")
     file_path = _write_json(file_name_without_extension, results , network)
     print(f"Results written successfully to {file_path}")
+    return file_path
 
 
 # ====================================================
@@ -0,0 +1,233 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from solders.keypair import Keypair
+from solders.system_program import transfer, TransferParams
+from solana_module.solana_utils import solana_base_path, load_keypair_from_file, create_client
+
+
+# Master seed and size of the pool, and the last balances read on each cluster. Keypairs aren't saved:
+# each one is derived from the seed and its index
+wallet_pool_path = f"{solana_base_path}/wallet_pool.json"
+
+# Prefix of the names of the pool wallets in the traces and in the actors bindings, e.g. pool:17
+POOL_PREFIX = "pool:"
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Lamports requested by each airdrop, where the faucet is available
+AIRDROP_LIMITS = {'Localnet': 500 * LAMPORTS_PER_SOL, 'Devnet': 2 * LAMPORTS_PER_SOL}
+
+# Accounts of each getMultipleAccounts call
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# Funding transactions delivered at the same time
+FUNDING_CONCURRENCY = 4
+
+# Derived keypairs, keyed by seed and index
+_derived_keypairs = dict()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def create_wallet_pool(size, seed=None):
+    # The same seed always derives the same wallets, so a pool can be resized keeping its funded wallets
+    pool = fetch_wallet_pool() or dict()
+    if seed is not None and bytes.fromhex(seed).hex() != pool.get('seed'):
+        pool = {'seed': bytes.fromhex(seed).hex()}
+    pool.setdefault('seed', os.urandom(32).hex())
+    pool.setdefault('balances', dict())
+    pool['size'] = size
+    _save_wallet_pool(pool)
+    return pool
+
+def fetch_wallet_pool():
+    if not os.path.exists(wallet_pool_path):
+        return None
+    with open(wallet_pool_path, 'r') as file:
+        return json.load(file)
+
+def fetch_pool_wallet_names():
+    pool = fetch_wallet_pool()
+    return [f"{POOL_PREFIX}{index}" for index in range(pool['size'])] if pool else []
+
+def is_wallet_name(value):
+    # Wallet files of solana_wallets and pool wallets
+    return isinstance(value, str) and (value.lower().endswith('.json') or value.startswith(POOL_PREFIX))
+
+def load_wallet_keypair(wallet_name):
+    # Keypair of a wallet file or of a pool wallet, None if it doesn't exist
+    if not wallet_name.startswith(POOL_PREFIX):
+        return load_keypair_from_file(f"{solana_base_path}/solana_wallets/{wallet_name}")
+    pool = fetch_wallet_pool()
+    index = wallet_name.removeprefix(POOL_PREFIX)
+    if pool is None or not index.isdigit() or int(index) >= pool['size']:
+        return None
+    return derive_pool_keypair(pool['seed'], int(index))
+
+def derive_pool_keypair(seed, index):
+    key = (seed, index)
+    if key not in _derived_keypairs:
+        _derived_keypairs[key] = Keypair.from_seed(hashlib.sha256(bytes.fromhex(seed) + index.to_bytes(8, 'little')).digest())
+    return _derived_keypairs[key]
+
+def derive_funder_keypair(seed):
+    # Wallet receiving the airdrops that fund the pool, not an actor
+    return Keypair.from_seed(hashlib.sha256(bytes.fromhex(seed) + b'funder').digest())
+
+def fetch_pool_keypairs():
+    pool = fetch_wallet_pool()
+    return [derive_pool_keypair(pool['seed'], index) for index in range(pool['size'])] if pool else []
+
+async def fund_wallet_pool(cluster, lamports, funder_wallet=None):
+    # Tops up every pool wallet below the given lamports with transfers packed in multi-transfer transactions,
+    # from the funder wallet or, without it, from airdrops (Localnet and Devnet)
+    pool = fetch_wallet_pool()
+    if pool is None:
+        raise ValueError("No wallet pool, create it first.")
+    if funder_wallet is None and cluster not in AIRDROP_LIMITS:
+        raise ValueError(f"Airdrops aren't available on {cluster}, give a funder wallet.")
+    funder = load_wallet_keypair(funder_wallet) if funder_wallet else derive_funder_keypair(pool['seed'])
+    if funder is None:
+        raise FileNotFoundError(f"Wallet {funder_wallet} not found.")
+
+    # Imported here, they depend on the Anchor module
+    from solana_module.anchor_module.size_predictor import predict_instructions_size, PACKET_LIMIT
+    from solana_module.anchor_module.transaction_manager import build_packed_transaction, LAMPORTS_PER_SIGNATURE
+    from solana_module.anchor_module.delivery_engine import deliver_transaction
+
+    keypairs = fetch_pool_keypairs()
+    client = create_client(cluster)
+    try:
+        # A transfer leaving an empty wallet below the rent exempt minimum fails, with its whole transaction
+        minimum_balance = (await client.get_minimum_balance_for_rent_exemption(0)).value
+        if lamports < minimum_balance:
+            raise ValueError(f"Wallets must be funded with at least {minimum_balance} lamports, "
+                             f"the rent exempt minimum.")
+        balances = await fetch_balances(client, [keypair.pubkey() for keypair in keypairs])
+        ixs = [transfer(TransferParams(from_pubkey=funder.pubkey(), to_pubkey=keypair.pubkey(),
+                                       lamports=lamports - balance))
+               for keypair, balance in zip(keypairs, balances) if balance < lamports]
+
+        # Greedy packing: transfers are added to a transaction until it would exceed the packet limit
+        batches = []
+        for ix in ixs:
+            if batches and predict_instructions_size(batches[-1] + [ix], funder.pubkey(), False) <= PACKET_LIMIT:
+                batches[-1].append(ix)
+            else:
+                batches.append([ix])
+        total_lamports = sum(lamports - balance for balance in balances if balance < lamports)
+        print(f"Funding {len(ixs)} wallets of the pool with {len(batches)} transactions...")
+
+        if funder_wallet is None and ixs:
+            await _airdrop(client, cluster, funder.pubkey(), total_lamports + LAMPORTS_PER_SIGNATURE * len(batches))
+
+        semaphore = asyncio.Semaphore(FUNDING_CONCURRENCY)
+
+        async def send(batch):
+            async with semaphore:
+                def build():
+                    return build_packed_transaction(batch, [], funder, False, client)
+                return await deliver_transaction(client, await build(), build)
+
+        deliveries = await asyncio.gather(*(send(batch) for batch in batches))
+        pool_balances = await _record_balances(client, cluster, pool, keypairs)
+    finally:
+        await client.close()
+
+    return {'funded_wallets': len(ixs), 'transactions': len(batches), 'lamports': total_lamports,
+            'failed_transactions': [delivery._asdict() for delivery in deliveries if delivery.outcome != 'landed'],
+            'balances': pool_balances}
+
+async def refresh_pool_balances(cluster):
+    pool = fetch_wallet_pool()
+    if pool is None:
+        raise ValueError("No wallet pool, create it first.")
+    client = create_client(cluster)
+    try:
+        return await _record_balances(client, cluster, pool, fetch_pool_keypairs())
+    finally:
+        await client.close()
+
+async def fetch_balances(client, pubkeys):
+    # Lamports of each account, 0 for the ones that don't exist
+    balances = []
+    for start in range(0, len(pubkeys), MAX_ACCOUNTS_PER_REQUEST):
+        accounts = (await client.get_multiple_accounts(pubkeys[start:start + MAX_ACCOUNTS_PER_REQUEST])).value
+        balances += [account.lamports if account is not None else 0 for account in accounts]
+    return balances
+
+def format_pool_balances(balances):
+    lamports = balances['lamports']
+    lines = [f"{len(lamports)} wallets on {balances['cluster']}, read at {balances['updated_at']}"]
+    if lamports:
+        lines.append(f"  total {sum(lamports) / LAMPORTS_PER_SOL:g} SOL, min {min(lamports) / LAMPORTS_PER_SOL:g} SOL, "
+                     f"max {max(lamports) / LAMPORTS_PER_SOL:g} SOL, empty {lamports.count(0)}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _airdrop(client, cluster, pubkey, lamports):
+    from solana_module.anchor_module.transaction_manager import wait_for_confirmation
+    while lamports > 0:
+        amount = min(lamports, AIRDROP_LIMITS[cluster])
+        signature = (await client.request_airdrop(pubkey, amount)).value
+        status = await wait_for_confirmation(client, signature)
+        if status is None or status.err is not None:
+            raise RuntimeError(f"Airdrop of {amount} lamports to {pubkey} failed.")
+        lamports -= amount
+
+async def _record_balances(client, cluster, pool, keypairs):
+    balances = {'cluster': cluster, 'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'lamports': await fetch_balances(client, [keypair.pubkey() for keypair in keypairs])}
+    pool.setdefault('balances', dict())[cluster] = balances
+    _save_wallet_pool(pool)
+    return balances
+
+def _save_wallet_pool(pool):
+    # Write a temporary file in the same folder and rename it over the pool, the seed can't be lost by a crash
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(wallet_pool_path), prefix='.wallet_pool',
+                                                       suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump(pool, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, wallet_pool_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
@@ -0,0 +1,172 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import itertools
+import random
+import time
+from collections import namedtuple
+from solana_module.solana_utils import create_client
+from solana_module.anchor_module.load_generator import build_replicas, run_setup, send_load_transaction
+from solana_module.anchor_module.latency_histogram import LatencyHistogram
+
+
+# Replicas of each step of the mix, the transactions of a step in flight at the same time
+DEFAULT_REPLICAS = 32
+
+# Seconds each arrival rate runs
+DEFAULT_DURATION = 30
+
+# Step of a JSON trace (as trace:step) with its weight in the mix and its replicas
+Workload = namedtuple('Workload', ['name', 'weight', 'replicas'])
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def build_workloads(mix, setups=None, replicas=DEFAULT_REPLICAS):
+    # Mix is a dict of trace:step and weight, e.g. {"auction.json:3": 60, "storage.json:1": 30},
+    # setups a dict of trace and the setup steps of its replicas, e.g. {"auction.json": ["1", "2"]}
+    setups = setups or dict()
+    workloads = []
+    errors = []
+    for name, weight in mix.items():
+        trace_name, _, step_id = name.rpartition(':')
+        if not trace_name or not step_id:
+            raise ValueError(f"Invalid step {name} of the mix, expected trace:step, e.g. auction.json:3.")
+        if float(weight) <= 0:
+            raise ValueError(f"Invalid weight {weight} of {name}, it must be positive.")
+        step_replicas, step_errors = build_replicas(trace_name, step_id, replicas, setups.get(trace_name, ()))
+        errors += [f"{name}: {error}" for error in step_errors]
+        workloads.append(Workload(name, float(weight), step_replicas))
+    return workloads, errors
+
+async def run_workload(workloads, rates, duration=DEFAULT_DURATION, cluster='Localnet', seed=None):
+    # Open loop: at each rate, steps of the mix arrive with Poisson inter-arrival times and are sent
+    # whatever the number of transactions in flight. An arrival finding all the replicas of its step
+    # in flight waits for one, and the wait is its queueing delay
+    generator = random.Random(seed)
+    client = create_client(cluster)
+    try:
+        ready_workloads = []
+        for workload in workloads:
+            replicas = await run_setup(client, workload.replicas)
+            if replicas:
+                ready_workloads.append(workload._replace(replicas=replicas))
+            else:
+                print(f"No replica of {workload.name} is ready, it is left out of the mix.")
+        if not ready_workloads:
+            print("No step of the mix is ready to be sent.")
+            return {'workloads': [], 'levels': []}
+
+        levels = []
+        for rate in rates:
+            print(f"Sending {rate} transactions per second for {duration} seconds...")
+            levels.append(await _run_rate(client, ready_workloads, rate, duration, generator))
+    finally:
+        await client.close()
+
+    total_weight = sum(workload.weight for workload in ready_workloads)
+    return {'workloads': [{'name': workload.name, 'instruction': workload.replicas[0].step.instruction_name,
+                           'share': round(workload.weight / total_weight, 3), 'replicas': len(workload.replicas)}
+                          for workload in ready_workloads],
+            'levels': levels}
+
+def format_workload_report(report):
+    lines = []
+    for level in report['levels']:
+        lines.append(f"offered {level['offered_rate']}/s ({level['target_rate']}/s target), achieved "
+                     f"{level['achieved_rate']}/s: {level['arrivals']} arrivals, {level['landed']} landed, "
+                     f"{level['failed']} failed, {level['dropped']} dropped")
+        lines.append(f"  {'step':<24}  {'instruction':<16}  {'arrivals':>8}  {'landed':>6}  {'queue p50':>9}  "
+                     f"{'queue p99':>9}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'max ms':>8}")
+        for name, workload in level['workloads'].items():
+            queueing = workload['queueing_ms']
+            latency = workload['latency_ms']
+            lines.append(f"  {name:<24}  {workload['instruction']:<16}  {workload['arrivals']:>8}  "
+                         f"{workload['landed']:>6}  {_format_latency(queueing.get('p50')):>9}  "
+                         f"{_format_latency(queueing.get('p99')):>9}  {_format_latency(latency.get('p50')):>8}  "
+                         f"{_format_latency(latency.get('p90')):>8}  {_format_latency(latency.get('p99')):>8}  "
+                         f"{_format_latency(latency.get('max')):>8}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _run_rate(client, workloads, rate, duration, generator):
+    pools = dict()
+    statistics = dict()
+    for workload in workloads:
+        pools[workload.name] = asyncio.Queue()
+        for replica in workload.replicas:
+            pools[workload.name].put_nowait(replica)
+        statistics[workload.name] = {'instruction': workload.replicas[0].step.instruction_name, 'arrivals': 0,
+                                     'landed': 0, 'failed': 0, 'dropped': 0, 'queueing': LatencyHistogram(),
+                                     'latency': LatencyHistogram()}
+    weights = [workload.weight for workload in workloads]
+    sequence = itertools.count(1)
+
+    async def arrive(workload, arrival_time):
+        step_statistics = statistics[workload.name]
+        replica = await pools[workload.name].get()
+        step_statistics['queueing'].record((time.perf_counter() - arrival_time) * 1000)
+        try:
+            outcome, _ = await send_load_transaction(client, replica.step, next(sequence))
+        finally:
+            pools[workload.name].put_nowait(replica)
+        step_statistics[outcome] += 1
+        if outcome == 'landed':
+            # From the arrival, queueing included
+            step_statistics['latency'].record((time.perf_counter() - arrival_time) * 1000)
+
+    tasks = []
+    start_time = time.perf_counter()
+    arrival_time = start_time
+    while True:
+        arrival_time += generator.expovariate(rate)
+        if arrival_time - start_time >= duration:
+            break
+        await asyncio.sleep(max(0, arrival_time - time.perf_counter()))
+        workload = generator.choices(workloads, weights)[0]
+        statistics[workload.name]['arrivals'] += 1
+        tasks.append(asyncio.create_task(arrive(workload, arrival_time)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start_time
+
+    totals = {outcome: sum(step_statistics[outcome] for step_statistics in statistics.values())
+              for outcome in ('arrivals', 'landed', 'failed', 'dropped')}
+    return {'target_rate': rate, 'offered_rate': round(totals['arrivals'] / duration, 2),
+            'achieved_rate': round(totals['landed'] / elapsed, 2), 'elapsed_s': round(elapsed, 2), **totals,
+            'workloads': {name: {'instruction': step_statistics['instruction'],
+                                 **{outcome: step_statistics[outcome] for outcome in totals},
+                                 'queueing_ms': step_statistics['queueing'].summary(),
+                                 'latency_ms': step_statistics['latency'].summary()}
+                          for name, step_statistics in statistics.items()}}
+
+def _format_latency(value):
+    return '-' if value is None else f"{value:.1f}"
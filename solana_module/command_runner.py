@@ -0,0 +1,159 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+
+
+# Exit codes used when the process has not been able to report its own
+TIMEOUT_EXIT_CODE = 124
+CANCELLED_EXIT_CODE = 130
+UNSUPPORTED_OS_EXIT_CODE = 127
+
+
+@dataclass
+class CommandResult:
+    command: str
+    returncode: int
+    stdout: str = ''
+    stderr: str = ''
+    timed_out: bool = False
+    cancelled: bool = False
+    duration: float = 0.0
+    stdout_lines: list = field(default_factory=list, repr=False)
+    stderr_lines: list = field(default_factory=list, repr=False)
+
+    @property
+    def succeeded(self):
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def run_command_async(operating_system, command, timeout=None, prefix=None, echo=True, on_line=None):
+    # Build the process launcher basing on the operating system
+    start = time.monotonic()
+    if operating_system == "Windows":
+        process = await asyncio.create_subprocess_exec(
+            "wsl", command,  # On Windows, use WSL to execute commands in a Linux shell
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    elif operating_system == "Darwin" or operating_system == "Linux":
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True  # Own process group, so the whole pipeline can be killed
+        )
+    else:
+        return CommandResult(command, UNSUPPORTED_OS_EXIT_CODE, stderr="Unsupported operating system.")
+
+    result = CommandResult(command, returncode=0)
+
+    # Read both streams line by line while the process is running
+    readers = asyncio.gather(
+        _stream_lines(process.stdout, 'stdout', result.stdout_lines, prefix, echo, on_line),
+        _stream_lines(process.stderr, 'stderr', result.stderr_lines, prefix, echo, on_line),
+    )
+    try:
+        await asyncio.wait_for(_wait_process(process, readers), timeout)
+        result.returncode = process.returncode
+    except asyncio.TimeoutError:
+        await _terminate_process(process)
+        readers.cancel()
+        result.timed_out = True
+        result.returncode = TIMEOUT_EXIT_CODE
+        print(f"{_format_prefix(prefix)}Command timed out after {timeout} seconds.")
+    except asyncio.CancelledError:
+        # Do not leave orphan processes behind, then propagate the cancellation
+        await _terminate_process(process)
+        readers.cancel()
+        result.cancelled = True
+        result.returncode = CANCELLED_EXIT_CODE
+        raise
+    finally:
+        result.stdout = ''.join(result.stdout_lines)
+        result.stderr = ''.join(result.stderr_lines)
+        result.duration = time.monotonic() - start
+
+    return result
+
+async def run_commands_concurrently(operating_system, commands, timeout=None, echo=True):
+    # Commands is a dict {label: command}, every label is used as prefix of the streamed lines
+    tasks = {
+        label: asyncio.create_task(run_command_async(operating_system, command, timeout=timeout, prefix=label, echo=echo))
+        for label, command in commands.items()
+    }
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        # If the caller is cancelled, cancel every running command
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
+    return {label: task.result() for label, task in tasks.items()}
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _wait_process(process, readers):
+    await readers
+    await process.wait()
+
+async def _stream_lines(stream, stream_name, lines, prefix, echo, on_line):
+    while True:
+        raw_line = await stream.readline()
+        if not raw_line:
+            return
+        line = raw_line.decode(errors='replace')
+        lines.append(line)
+        if on_line is not None:
+            on_line(stream_name, line)
+        if echo:
+            print(f"{_format_prefix(prefix)}{line}", end='' if line.endswith('\n') else '\n')
+
+async def _terminate_process(process):
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        return
+    await process.wait()
+
+def _format_prefix(prefix):
+    return f"[{prefix}] " if prefix else ''
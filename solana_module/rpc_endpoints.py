@@ -0,0 +1,283 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import deque
+import httpx
+from solana_module.solana_utils import solana_base_path
+from solana_module.rpc_rate_limiter import DEFAULT_RATE_LIMITS, RateLimitedTransport
+
+
+# Optional file with the RPC URLs of each cluster, e.g. {"Devnet": ["https://api.devnet.solana.com", "https://..."]}
+endpoints_path = f"{solana_base_path}/rpc_endpoints.json"
+
+# Endpoints of the clusters without an entry in the endpoints file
+DEFAULT_ENDPOINTS = {
+    'Localnet': ["http://localhost:8899"],
+    'Devnet': ["https://api.devnet.solana.com"],
+    'Mainnet': ["https://api.mainnet-beta.solana.com"],
+}
+
+# Idempotent reads sent to a second endpoint when the first one is slower than its p95
+HEDGED_METHODS = {'getSlot', 'getLatestBlockhash', 'getSignatureStatuses'}
+
+# Latencies kept for each endpoint and method, and the ones needed before using their p95
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Seconds waited before hedging while the p95 of the method is unknown
+DEFAULT_HEDGE_DELAY = 0.5
+
+# Seconds an endpoint is left out of the routing after a failure, and timeout of the health checks
+UNHEALTHY_INTERVAL = 30
+HEALTH_CHECK_TIMEOUT = 5
+
+# Weight of the last latency in the moving average used to rank the endpoints
+LATENCY_SMOOTHING = 0.2
+
+# Parsed endpoints file and its modification time
+_cached_endpoints = dict()
+
+# Health and latencies of the endpoints of the process, keyed by URL and shared by all the sessions.
+# Connections aren't shared: they belong to the event loop of their session
+_endpoints = dict()
+
+
+class RpcEndpoint:
+    __slots__ = ['url', 'checked', 'average_latency', 'latencies', 'unhealthy_until', 'requests', 'failures',
+                 'hedges_sent', 'hedges_won']
+
+    def __init__(self, url):
+        self.url = url
+        self.checked = False
+        self.average_latency = None
+        self.latencies = dict()
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def is_healthy(self):
+        return self.unhealthy_until <= time.monotonic()
+
+    def record_latency(self, method, latency):
+        self.latencies.setdefault(method, deque(maxlen=LATENCY_WINDOW)).append(latency)
+        self.average_latency = latency if self.average_latency is None else \
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.average_latency
+
+    def record_failure(self):
+        self.failures += 1
+        self.unhealthy_until = time.monotonic() + UNHEALTHY_INTERVAL
+
+    def hedge_delay(self, method):
+        latencies = self.latencies.get(method, ())
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return statistics.quantiles(latencies, n=20)[-1]
+
+
+class EndpointSetTransport(httpx.AsyncBaseTransport):
+    # Transport of the HTTP session of the RPC clients of a cluster with several endpoints: each request goes
+    # to the fastest healthy endpoint, and to the next one if it fails. Hedged reads are also sent to the
+    # second fastest endpoint once the first one is slower than its p95, and the first answer is used
+    def __init__(self, urls):
+        self.endpoints = [fetch_endpoint(url) for url in urls]
+        # Public endpoints keep their rate limits
+        self.transports = {url: RateLimitedTransport(url, DEFAULT_RATE_LIMITS[url]) if url in DEFAULT_RATE_LIMITS
+                           else httpx.AsyncHTTPTransport() for url in urls}
+
+    async def handle_async_request(self, request):
+        # Endpoints are checked once for the process, by the first session using them
+        unchecked_endpoints = [endpoint for endpoint in self.endpoints if not endpoint.checked]
+        if unchecked_endpoints:
+            for endpoint in unchecked_endpoints:
+                endpoint.checked = True
+            await check_endpoints(unchecked_endpoints, self.transports)
+
+        method = _fetch_method(request)
+        endpoints = rank_endpoints(self.endpoints)
+        error = None
+        if method in HEDGED_METHODS and len(endpoints) > 1:
+            response, error = await self._send_hedged(request, method, endpoints[0], endpoints[1])
+            if response is not None:
+                return response
+            endpoints = endpoints[2:]
+
+        for endpoint in endpoints:
+            try:
+                return await _send_to_endpoint(endpoint, self.transports[endpoint.url], request, method)
+            except httpx.TransportError as e:
+                error = e
+                print(f"RPC endpoint {endpoint.url} failed ({type(e).__name__}), trying the next one.")
+        raise error or httpx.ConnectError("No RPC endpoint available")
+
+    async def _send_hedged(self, request, method, first, second):
+        # Response and None, or None and the last error if both the endpoints failed
+        primary = asyncio.ensure_future(_send_to_endpoint(first, self.transports[first.url], request, method))
+        done, _ = await asyncio.wait([primary], timeout=first.hedge_delay(method))
+        if done and primary.exception() is None:
+            return primary.result(), None
+
+        second.hedges_sent += 1
+        hedge = asyncio.ensure_future(_send_to_endpoint(second, self.transports[second.url], request, method))
+        pending = {primary, hedge} - done
+        response = None
+        error = primary.exception() if done else None
+        while pending and response is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif response is None:
+                    response = task.result()
+                    if task is not primary:
+                        second.hedges_won += 1
+        for task in pending:
+            task.cancel()
+        if response is None:
+            print(f"RPC endpoints {first.url} and {second.url} failed ({type(error).__name__}).")
+        return response, error
+
+    async def aclose(self):
+        for transport in self.transports.values():
+            await transport.aclose()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def fetch_cluster_endpoints(cluster):
+    # URLs of the cluster from the endpoints file if it has them, the public ones otherwise
+    if os.path.exists(endpoints_path):
+        modification_time = os.stat(endpoints_path).st_mtime_ns
+        if _cached_endpoints.get('modification_time') != modification_time:
+            with open(endpoints_path, 'r') as file:
+                _cached_endpoints['endpoints'] = json.load(file)
+            _cached_endpoints['modification_time'] = modification_time
+        if _cached_endpoints['endpoints'].get(cluster):
+            return list(_cached_endpoints['endpoints'][cluster])
+    return list(DEFAULT_ENDPOINTS.get(cluster, []))
+
+def create_endpoint_set_session(urls, timeout):
+    # Each session has its own connections, while the health and latencies of the endpoints are known to all
+    return httpx.AsyncClient(timeout=timeout, transport=EndpointSetTransport(urls))
+
+def fetch_endpoint(url):
+    endpoint = _endpoints.get(url)
+    if endpoint is None:
+        endpoint = RpcEndpoint(url)
+        _endpoints[url] = endpoint
+    return endpoint
+
+async def check_endpoints(endpoints, transports):
+    # getHealth of all the endpoints at the same time, the latency of the healthy ones ranks them
+    async def check(endpoint):
+        request = httpx.Request('POST', endpoint.url, json={'jsonrpc': '2.0', 'id': 1, 'method': 'getHealth'})
+        start_time = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(transports[endpoint.url].handle_async_request(request),
+                                              HEALTH_CHECK_TIMEOUT)
+            await response.aread()
+            healthy = response.status_code == 200 and json.loads(response.content).get('result') == 'ok'
+        except (httpx.TransportError, asyncio.TimeoutError, ValueError):
+            healthy = False
+        if healthy:
+            endpoint.record_latency('getHealth', time.perf_counter() - start_time)
+        else:
+            print(f"RPC endpoint {endpoint.url} is not healthy.")
+            endpoint.record_failure()
+
+    await asyncio.gather(*(check(endpoint) for endpoint in endpoints))
+
+def rank_endpoints(endpoints):
+    # Healthy endpoints from the fastest, then the unhealthy ones from the first to be checked again
+    healthy = sorted((endpoint for endpoint in endpoints if endpoint.is_healthy()),
+                     key=lambda endpoint: endpoint.average_latency if endpoint.average_latency is not None else 0)
+    unhealthy = sorted((endpoint for endpoint in endpoints if not endpoint.is_healthy()),
+                       key=lambda endpoint: endpoint.unhealthy_until)
+    return healthy + unhealthy
+
+def fetch_endpoint_metrics():
+    metrics = []
+    for endpoint in _endpoints.values():
+        if endpoint.checked:
+            latencies = [latency for method_latencies in endpoint.latencies.values() for latency in method_latencies]
+            metrics.append({'endpoint': endpoint.url, 'healthy': endpoint.is_healthy(), 'requests': endpoint.requests,
+                            'failures': endpoint.failures, 'hedges_sent': endpoint.hedges_sent,
+                            'hedges_won': endpoint.hedges_won,
+                            'average_latency_ms': round(endpoint.average_latency * 1000, 1)
+                            if endpoint.average_latency is not None else None,
+                            'p95_latency_ms': round(statistics.quantiles(latencies, n=20)[-1] * 1000, 1)
+                            if len(latencies) >= 2 else None})
+    return metrics
+
+def format_endpoint_metrics(metrics):
+    lines = [f"{'endpoint':<38}  {'healthy':<7}  {'requests':>8}  {'failures':>8}  {'hedges':>6}  {'won':>5}  "
+             f"{'avg ms':>8}  {'p95 ms':>8}"]
+    for metric in metrics:
+        lines.append(f"{metric['endpoint']:<38}  {str(metric['healthy']):<7}  {metric['requests']:>8}  "
+                     f"{metric['failures']:>8}  {metric['hedges_sent']:>6}  {metric['hedges_won']:>5}  "
+                     f"{str(metric['average_latency_ms'] or '-'):>8}  {str(metric['p95_latency_ms'] or '-'):>8}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _send_to_endpoint(endpoint, transport, request, method):
+    endpoint.requests += 1
+    start_time = time.perf_counter()
+    try:
+        response = await transport.handle_async_request(_retarget_request(request, endpoint.url))
+        # The body is read here, so that the latency is the one of the whole answer
+        await response.aread()
+    except httpx.TransportError:
+        endpoint.record_failure()
+        raise
+    if response.status_code >= 500 or response.status_code == 429:
+        endpoint.record_failure()
+        raise httpx.RemoteProtocolError(f"HTTP {response.status_code} from {endpoint.url}", request=request)
+    endpoint.record_latency(method, time.perf_counter() - start_time)
+    return response
+
+def _retarget_request(request, url):
+    headers = {name: value for name, value in request.headers.items() if name.lower() not in ('host', 'content-length')}
+    return httpx.Request(request.method, url, headers=headers, content=request.content)
+
+def _fetch_method(request):
+    try:
+        body = json.loads(request.content)
+    except ValueError:
+        return None
+    if isinstance(body, list):
+        body = body[0] if body else {}
+    return body.get('method')
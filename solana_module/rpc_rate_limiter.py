@@ -0,0 +1,214 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import asyncio
+import json
+import random
+import time
+import httpx
+
+
+# Requests per second of each method class on the public endpoints, a bit under their limits
+# (100 requests every 10 seconds for each IP, 40 for a single method). Endpoints not listed aren't limited
+DEFAULT_RATE_LIMITS = {
+    "https://api.devnet.solana.com": {'read': 4, 'poll': 3, 'send': 1.5, 'simulate': 1.5},
+    "https://api.mainnet-beta.solana.com": {'read': 4, 'poll': 3, 'send': 1.5, 'simulate': 1.5},
+}
+
+# Class of the RPC methods, each class has its own bucket. Methods not listed are 'read'
+METHOD_CLASSES = {
+    'sendTransaction': 'send',
+    'simulateTransaction': 'simulate',
+    'getSignatureStatuses': 'poll',
+    'getSlot': 'poll',
+    'getBlockHeight': 'poll',
+}
+
+# Requests sent at once before the rate applies
+BURST = 2
+
+# Backoff after a throttled request: doubles at each retry, up to the maximum, with jitter
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30
+MAX_RETRIES = 6
+
+# After a throttled request the rate is halved (not below the minimum), after each successful request
+# it grows back by this fraction of the configured rate
+MIN_RATE_FRACTION = 0.1
+RATE_RECOVERY = 0.02
+
+# Buckets shared by all the clients of the process, keyed by endpoint and method class
+_buckets = dict()
+
+
+class TokenBucket:
+    __slots__ = ['max_rate', 'rate', 'next_time', 'blocked_until', 'requests', 'throttled', 'connection_errors',
+                 'retries', 'waited_seconds']
+
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.rate = rate
+        self.next_time = 0.0
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.connection_errors = 0
+        self.retries = 0
+        self.waited_seconds = 0.0
+
+    def reserve(self):
+        # Seconds to wait before sending. The slot is reserved without awaiting, so concurrent
+        # requests of the same event loop never get the same slot
+        now = time.monotonic()
+        interval = 1 / self.rate
+        slot = max(self.next_time, now)
+        self.next_time = slot + interval
+        return max(slot - now - (BURST - 1) * interval, 0.0)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+
+    def on_throttled(self, delay):
+        self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        # Slots restart after the block, at the reduced rate
+        self.next_time = max(self.next_time, self.blocked_until)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    # Transport of the HTTP session of the RPC clients: requests wait for their bucket and throttled ones
+    # (HTTP 429 or connection errors) are sent again after a backoff. Sending again is safe: a signed
+    # transaction has always the same signature and can't land twice
+    def __init__(self, endpoint, rate_limits, transport=None):
+        self.endpoint = endpoint
+        self.rate_limits = rate_limits
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        bucket = fetch_bucket(self.endpoint, _fetch_method_class(request), self.rate_limits)
+        for attempt in range(MAX_RETRIES + 1):
+            await _wait_for_slot(bucket)
+            bucket.requests += 1
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                bucket.connection_errors += 1
+                if attempt == MAX_RETRIES:
+                    raise
+                bucket.on_throttled(_compute_backoff(attempt))
+            else:
+                if response.status_code != 429 or attempt == MAX_RETRIES:
+                    if response.status_code != 429:
+                        bucket.on_success()
+                    return response
+                bucket.throttled += 1
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                await response.aclose()
+                bucket.on_throttled(max(retry_after, _compute_backoff(attempt)))
+            bucket.retries += 1
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def create_rate_limited_session(endpoint, timeout):
+    # HTTP session for the RPC client of the endpoint, None if the endpoint isn't limited
+    rate_limits = DEFAULT_RATE_LIMITS.get(endpoint)
+    if rate_limits is None:
+        return None
+    return httpx.AsyncClient(timeout=timeout, transport=RateLimitedTransport(endpoint, rate_limits))
+
+def configure_rate_limits(endpoint, rate_limits):
+    # Requests per second of each method class of the endpoint, e.g. for a private RPC with higher limits.
+    # None removes the limits of the endpoint
+    if rate_limits is None:
+        DEFAULT_RATE_LIMITS.pop(endpoint, None)
+    else:
+        DEFAULT_RATE_LIMITS[endpoint] = dict(rate_limits)
+    for key in [key for key in _buckets if key[0] == endpoint]:
+        del _buckets[key]
+
+def fetch_bucket(endpoint, method_class, rate_limits):
+    key = (endpoint, method_class)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = TokenBucket(rate_limits.get(method_class, rate_limits.get('read')))
+        _buckets[key] = bucket
+    return bucket
+
+def fetch_rate_limiter_metrics():
+    return [{'endpoint': endpoint, 'method_class': method_class, 'requests': bucket.requests,
+             'throttled': bucket.throttled, 'connection_errors': bucket.connection_errors, 'retries': bucket.retries,
+             'waited_seconds': round(bucket.waited_seconds, 2), 'rate': round(bucket.rate, 2),
+             'max_rate': bucket.max_rate}
+            for (endpoint, method_class), bucket in _buckets.items()]
+
+def format_rate_limiter_metrics(metrics):
+    lines = [f"{'endpoint':<38}  {'class':<8}  {'requests':>8}  {'throttled':>9}  {'conn err':>8}  "
+             f"{'retries':>7}  {'waited s':>8}  {'rate/s':>6}"]
+    for metric in metrics:
+        lines.append(f"{metric['endpoint']:<38}  {metric['method_class']:<8}  {metric['requests']:>8}  "
+                     f"{metric['throttled']:>9}  {metric['connection_errors']:>8}  {metric['retries']:>7}  "
+                     f"{metric['waited_seconds']:>8}  {metric['rate']:>6}")
+    return "\n".join(lines)
+
+
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _wait_for_slot(bucket):
+    start_time = time.monotonic()
+    await asyncio.sleep(bucket.reserve())
+    # The endpoint may have throttled another request while this one was waiting, then a new slot is reserved
+    while bucket.blocked_until > time.monotonic():
+        await asyncio.sleep(bucket.reserve())
+    bucket.waited_seconds += time.monotonic() - start_time
+
+def _fetch_method_class(request):
+    try:
+        body = json.loads(request.content)
+    except ValueError:
+        return 'read'
+    # Batch requests are classified by their first method
+    if isinstance(body, list):
+        body = body[0] if body else {}
+    return METHOD_CLASSES.get(body.get('method'), 'read')
+
+def _compute_backoff(attempt):
+    backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt)
+    return random.uniform(backoff / 2, backoff)
+
+def _parse_retry_after(value):
+    # Seconds (the date format isn't used by RPC endpoints)
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
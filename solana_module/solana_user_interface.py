@@ -21,8 +21,7 @@
 # THE SOFTWARE.
 
 
-from solana_module.solana_utilities import request_balance, get_public_key, close_program
-from solana_module.anchor_module import anchor_user_interface
+# Languages and utilities are imported when chosen, so that menus are printed without loading their dependencies
 # ADD HERE NEW SOLANA LANGUAGES REQUIRED IMPORTS (STARTING FROM THE PROJECT ROOT)
 
 
@@ -69,6 +68,7 @@ def _choose_language():
         choice = input()
 
         if choice == '1':
+            from solana_module.anchor_module import anchor_user_interface
             anchor_user_interface.choose_action()
             choice = None
         # ADD HERE NEW LANGUAGE CALLS
@@ -91,12 +91,15 @@ def _choose_utility():
         choice = input()
 
         if choice == '1':
+            from solana_module.solana_utilities import request_balance
             request_balance()
             choice = None
         elif choice == '2':
+            from solana_module.solana_utilities import get_public_key
             get_public_key()
             choice = None
         elif choice == '3':
+            from solana_module.solana_utilities import close_program
             close_program()
         elif choice == '0':
             return
@@ -21,12 +21,12 @@
 # THE SOFTWARE.
 
 
+import asyncio
 import json
 import os
 from solders.keypair import Keypair
-from solana.rpc.async_api import AsyncClient
-import subprocess
 import platform
+from solana_module.command_runner import run_command_async
 
 
 solana_base_path = "solana_module"
@@ -45,19 +45,38 @@ def load_keypair_from_file(file_path):
         return None
 
 def create_client(cluster):
-    # Define rpc basing on the cluster
-    rpc_url = None
-    if cluster == "Localnet":
-        rpc_url = "http://localhost:8899"
-    elif cluster == "Devnet":
-        rpc_url = "https://api.devnet.solana.com"
-    elif cluster == "Mainnet":
-        rpc_url = "https://api.mainnet-beta.solana.com"
+    # RPC endpoints of the cluster, the public ones unless others are listed in rpc_endpoints.json
+    # (imported here, the RPC stack is slow to import and not needed by the menus)
+    from solana_module.rpc_endpoints import fetch_cluster_endpoints
+    rpc_urls = fetch_cluster_endpoints(cluster)
 
     # Crete client
-    client = AsyncClient(rpc_url)
+    from solana.rpc.async_api import AsyncClient
+    client = AsyncClient(rpc_urls[0] if rpc_urls else None)
+
+    if len(rpc_urls) > 1:
+        # Each call goes to the fastest healthy endpoint, reads are hedged on a second one
+        from solana_module.rpc_endpoints import create_endpoint_set_session
+        client._provider.session = create_endpoint_set_session(rpc_urls, client._provider.session.timeout)
+    else:
+        # Calls to public endpoints go through a rate limiter shared by all the clients
+        from solana_module.rpc_rate_limiter import create_rate_limited_session
+        session = create_rate_limited_session(client._provider.endpoint_uri, client._provider.session.timeout)
+        if session is not None:
+            client._provider.session = session
     return client
 
+async def fetch_balance(wallet_name, cluster):
+    keypair = load_keypair_from_file(f"{solana_base_path}/solana_wallets/{wallet_name}")
+    if keypair is None:
+        raise FileNotFoundError(f"Wallet {wallet_name} not found.")
+    client = create_client(cluster)
+    try:
+        resp = await client.get_balance(keypair.pubkey())
+        return keypair.pubkey(), resp.value
+    finally:
+        await client.close()
+
 def choose_wallet():
     wallet_names = _get_wallet_names()
     chosen_wallet = selection_menu('wallet', wallet_names)
@@ -88,29 +107,25 @@ def selection_menu(to_be_chosen, choices):
         else:
             print("Please choose a valid choice.")
 
-def perform_program_closure(program_id, cluster, wallet_name):
+def perform_program_closure(program_id, cluster, wallet_name, timeout=None):
+    return asyncio.run(perform_program_closure_async(program_id, cluster, wallet_name, timeout))
+
+async def perform_program_closure_async(program_id, cluster, wallet_name, timeout=None):
     command_cluster = _associate_command_cluster(cluster)
     if command_cluster is None:
         return
 
     command = f"solana program close {program_id} --keypair {solana_base_path}/solana_wallets/{wallet_name} --url {command_cluster} --bypass-warning"
     operating_system = platform.system()
-    result = run_command(operating_system, command)
-    if result.stderr:
-        print(result.stderr)
-    else:
-        print(result.stdout)
+    # Output is streamed while the command runs, the exit code tells if it failed
+    result = await run_command_async(operating_system, command, timeout=timeout, prefix=f"close {program_id}")
+    if not result.succeeded:
+        print(f"Program closure failed (exit code {result.returncode}).")
     return result
 
-def run_command(operating_system, command):
-    if operating_system == "Windows":
-        result = subprocess.run(["wsl", command], capture_output=True, text=True) # On Windows, use WSL to execute commands in a Linux shell
-    elif platform.system() == "Darwin" or platform.system() == "Linux":
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    else:
-        result = None
-
-    return result
+def run_command(operating_system, command, timeout=None):
+    # Blocking wrapper around the async command runner, for callers outside an event loop
+    return asyncio.run(run_command_async(operating_system, command, timeout=timeout))
 
 
 
@@ -0,0 +1,121 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Modules which must not be imported before the first menu is printed
+HEAVY_MODULES = ['anchorpy', 'solana.rpc', 'spl', 'toml', 'based58', 'httpx']
+
+# Menu modules whose import time is reported
+MENU_MODULES = [
+    'user_interface',
+    'solana_module.solana_user_interface',
+    'solana_module.anchor_module.anchor_user_interface',
+]
+
+FIRST_PROMPT = "Choose a module:"
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the startup time of the toolchain.")
+    parser.add_argument('--runs', type=int, default=5, help="Number of cold starts to measure")
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest imports to print for each menu module")
+    parser.add_argument('--max-ms', type=float, default=None, help="Fail if the median time to the first prompt is higher")
+    arguments = parser.parse_args(argv)
+
+    failed = False
+
+    # Cold start to first prompt
+    timings = [measure_time_to_first_prompt() for _ in range(arguments.runs)]
+    median = statistics.median(timings)
+    print(f"Time to first prompt: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms ({arguments.runs} runs)")
+    if arguments.max_ms is not None and median > arguments.max_ms:
+        print(f"FAIL: median time to first prompt is higher than {arguments.max_ms} ms")
+        failed = True
+
+    # Import time breakdown of menu modules, without the modules imported by the interpreter itself
+    interpreter_imports = measure_import_times(None)
+    for module in MENU_MODULES:
+        imports = {name: cumulative for name, cumulative in measure_import_times(module).items()
+                   if name not in interpreter_imports}
+        total = imports[module] if module in imports else sum(imports.values())
+        print(f"\n{module}: {total / 1000:.1f} ms cumulative")
+        slowest = sorted(((cumulative, name) for name, cumulative in imports.items() if name != module), reverse=True)
+        for cumulative, name in slowest[:arguments.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    # Heavy dependencies must be loaded only when a feature needs them
+    startup_imports = measure_import_times(MENU_MODULES[0])
+    eager_modules = [heavy for heavy in HEAVY_MODULES
+                     if any(name == heavy or name.startswith(heavy + '.') for name in startup_imports)]
+    if eager_modules:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(eager_modules)}")
+        failed = True
+
+    return 1 if failed else 0
+
+def measure_time_to_first_prompt():
+    # Start the toolchain, wait for the first menu and exit from it
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-u', 'user_interface.py'], cwd=ROOT_PATH,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    elapsed = None
+    for line in process.stdout:
+        if FIRST_PROMPT in line:
+            elapsed = (time.perf_counter() - start) * 1000
+            break
+    process.communicate('0\n')
+    if elapsed is None:
+        raise RuntimeError("The toolchain exited without printing the first prompt.")
+    return elapsed
+
+def measure_import_times(module):
+    # Returns {module name: cumulative import time in microseconds}, module None measures the interpreter alone
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_PATH,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Import of {module} failed:\n{result.stderr}")
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,7 +21,7 @@
 # THE SOFTWARE.
 
 
-from solana_module.solana_user_interface import choose_action
+# Modules are imported when chosen, so that the first menu is printed without loading their dependencies
 # ADD HERE NEW MODULES REQUIRED IMPORTS (STARTING FROM THE PROJECT ROOT)
 
 
@@ -40,6 +40,7 @@ def choose_module(supported_modules):
         choice = input()
 
         if choice == '1':
+            from solana_module.solana_user_interface import choose_action
             choose_action()
             choice = None # Reset choice
         # ADD HERE NEW MODULE CALLS (elif)